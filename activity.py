@@ -0,0 +1,77 @@
+"""
+Activity analytics over solve timestamps, computed on datetime64[D] day arrays.
+
+Used by the progress aggregates (backfill and streak refresh) and the
+dashboard heatmap, and intended as the single source for any stats endpoint.
+Days are UTC, like the solve timestamps and UserDailyActivity keys.
+"""
+from datetime import date, datetime
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ActivitySummary(NamedTuple):
+    days: np.ndarray        # Distinct active days (datetime64[D], ascending)
+    counts: np.ndarray      # Solves per active day
+    run_at_last: int        # Consecutive active days ending at the last active day
+    longest_streak: int
+    current_streak: int     # run_at_last if the user was active today or yesterday
+
+    @property
+    def last_active(self):
+        return self.days[-1].astype(date) if len(self.days) else None
+
+    def heatmap(self, window_days=None, today=None):
+        """{'YYYY-MM-DD': count}, optionally limited to the last `window_days` days."""
+        days, counts = self.days, self.counts
+        if window_days is not None:
+            keep = days >= _as_day(today) - np.timedelta64(window_days, 'D')
+            days, counts = days[keep], counts[keep]
+        return dict(zip(np.datetime_as_string(days, unit='D').tolist(), counts.tolist()))
+
+    def weekly_counts(self, weeks, today=None):
+        """Solves per 7-day bucket, oldest first; the last bucket ends today."""
+        offsets = (_as_day(today) - self.days).astype(np.int64) // 7
+        keep = (offsets >= 0) & (offsets < weeks)
+        buckets = np.bincount(offsets[keep], weights=self.counts[keep], minlength=weeks)
+        return buckets[::-1].astype(np.int64)
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _as_day(value=None):
+    return np.datetime64(value or datetime.utcnow().date(), 'D')
+
+def to_days(timestamps):
+    """datetime/date sequence (or datetime64 array) -> datetime64[D] array."""
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype('datetime64[D]')
+    # Going through proleptic ordinals is ~30x faster than numpy's per-object datetime parsing
+    ordinals = np.fromiter(map(date.toordinal, timestamps), dtype=np.int64, count=len(timestamps))
+    return (ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+
+def run_lengths(days):
+    """(run ending at the last day, longest run) for sorted distinct datetime64[D] days."""
+    if not len(days): return 0, 0
+    breaks = np.flatnonzero(np.diff(days).astype(np.int64) != 1) + 1
+    bounds = np.concatenate(([0], breaks, [len(days)]))
+    runs = np.diff(bounds)
+    return int(runs[-1]), int(runs.max())
+
+def summarize(timestamps, today=None):
+    """Distinct days, per-day counts and streaks for a user's solve timestamps."""
+    days, counts = np.unique(to_days(timestamps), return_counts=True)
+    return _summary(days, counts, today)
+
+def from_daily(days, counts, today=None):
+    """The same summary from per-day rows (UserDailyActivity), ascending by day."""
+    return _summary(to_days(days), np.asarray(counts, dtype=np.int64), today)
+
+def _summary(days, counts, today):
+    run_at_last, longest = run_lengths(days)
+    current = 0
+    if len(days) and days[-1] >= _as_day(today) - np.timedelta64(1, 'D'):
+        current = run_at_last
+    return ActivitySummary(days, counts, run_at_last, longest, current)
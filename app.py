@@ -1,20 +1,44 @@
 import pandas as pd
-from flask import Flask, render_template, abort, request, jsonify, redirect, url_for, flash, session
+import numpy as np
+import msgspec
+from flask import Flask, render_template, abort, request, jsonify, redirect, url_for, flash, session, g, has_app_context
+from flask import before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
 from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
-from flask_session import Session
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
-from sqlalchemy import text, or_
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from werkzeug.http import is_resource_modified
 from datetime import timedelta, datetime, date
+from typing import NamedTuple
+from passwords import HasherBusy, PasswordHasher
+from problem_graph import MAX_HOPS, NEIGHBOUR_KINDS, ProblemGraph
+from problem_index import ProblemIndex
+from recommender import RECENT_SEEDS, Recommender
+from roadmap import RoadmapEngine
+from search_index import SearchIndex
+from ttl_cache import TTLCache
+import activity
+import fast_state
+import metrics
+import note_search
+import note_store
+import srs
+import click
+import hashlib
 import json
-import math
+import mmap
 import os
 import re
 import random
+import shutil
+import threading
+import time
 
 # --- APP CONFIGURATION ---
 app = Flask(__name__)
@@ -23,20 +47,23 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_key_change_in_prod_
 # --- 1. DATABASE CONFIG ---
 database_url = os.environ.get('DATABASE_URL')
 
+RENDER_INSTANCE_DIR = os.environ.get('RENDER_INSTANCE_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance'))
+if not os.path.exists(RENDER_INSTANCE_DIR):
+    os.makedirs(RENDER_INSTANCE_DIR)
+
 if database_url:
     if database_url.startswith("postgres://"):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 else:
-    RENDER_INSTANCE_DIR = os.environ.get('RENDER_INSTANCE_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance'))
-    if not os.path.exists(RENDER_INSTANCE_DIR):
-        os.makedirs(RENDER_INSTANCE_DIR)
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(RENDER_INSTANCE_DIR, 'dsa_progress.db')
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # --- 2. SESSION SECURITY ---
-app.config['SESSION_TYPE'] = 'sqlalchemy'
+# Sessions and rate-limit counters live in the fast-state store (see fast_state.py),
+# not the main DB: a shared WAL SQLite file by default, redis://... across hosts.
+app.config['FAST_STATE_URL'] = os.environ.get('FAST_STATE_URL', 'sqlite:///' + os.path.join(RENDER_INSTANCE_DIR, 'fast_state.sqlite3'))
 app.config['SESSION_PERMANENT'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 app.config['SESSION_USE_SIGNER'] = True
@@ -45,19 +72,30 @@ app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# --- 3. PASSWORD HASHING ---
+# Hashes run on a small per-worker pool (see passwords.py). Changing the cost is
+# safe: existing hashes keep working and are upgraded on the user's next login.
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 1)) # 0 = hash on the request thread
+# Queued + running hashes before logins get 503s; keep it below gunicorn's
+# thread count so logins waiting on the pool can't tie up every thread.
+app.config['PASSWORD_HASH_QUEUE'] = int(os.environ.get('PASSWORD_HASH_QUEUE', 4))
+
 # --- INITIALIZE EXTENSIONS ---
 db = SQLAlchemy(app)
-app.config['SESSION_SQLALCHEMY'] = db 
 bcrypt = Bcrypt(app)
+hasher = PasswordHasher(bcrypt, rounds=app.config['BCRYPT_LOG_ROUNDS'],
+                        workers=app.config['PASSWORD_HASH_WORKERS'],
+                        max_pending=app.config['PASSWORD_HASH_QUEUE'])
 migrate = Migrate(app, db)
-server_session = Session(app)
+limiter_storage_uri = fast_state.init_app(app, app.config['FAST_STATE_URL'], db)
 csrf = CSRFProtect(app)
 
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["2000 per day", "500 per hour"],
-    storage_uri="memory://"
+    storage_uri=limiter_storage_uri
 )
 
 login_manager = LoginManager(app)
@@ -65,7 +103,11 @@ login_manager.login_view = 'login'
 login_manager.session_protection = "strong"
 login_manager.login_message_category = "error"
 
-DATA = pd.DataFrame()
+CATALOG = None  # Catalog, set by load_data() and swapped whole by CATALOG_RELOADER
+
+# 'eager' builds every topic roadmap at load (shared via gunicorn preload),
+# 'lazy' builds each topic on its first request.
+app.config['ROADMAP_MODE'] = os.environ.get('ROADMAP_MODE', 'eager')
 
 # --- MODELS ---
 class User(db.Model, UserMixin):
@@ -84,20 +126,121 @@ class SolvedProblem(db.Model):
     # SRS Fields
     next_review_at = db.Column(db.DateTime, nullable=True)
     srs_interval = db.Column(db.Float, default=1.0) # Days until next review
+    srs_ease = db.Column(db.Float, nullable=False, default=srs.DEFAULT_EASE, server_default='2.5') # SM-2 ease factor
+    srs_reps = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Successful recalls in a row (the solve is the first)
+    last_reviewed_at = db.Column(db.DateTime, nullable=True) # Solve or last review: next_review_at counts from here
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'problem_id', name='_user_problem_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'problem_id', name='_user_problem_uc'),
+        # Due-review lookups: range scan per user, already ordered by due date
+        db.Index('ix_solved_problem_user_next_review', 'user_id', 'next_review_at'),
+        # Daily due-queue rollover: one range scan over every user's reviews
+        db.Index('ix_solved_problem_next_review', 'next_review_at'),
+    )
 
 class Note(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     problem_id = db.Column(db.Integer, nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    content = db.Column(db.Text, nullable=True) # Legacy plain text; moved into note_blob on startup
+    content_hash = db.Column(db.String(64), nullable=True) # NoteBlob.digest of the current text
+    size = db.Column(db.Integer, nullable=True) # UTF-8 bytes of the current text
     updated_at = db.Column(db.DateTime, nullable=False, default=db.func.now(), onupdate=db.func.now())
     __table_args__ = (db.UniqueConstraint('user_id', 'problem_id', name='_user_problem_note_uc'),)
 
+# --- NOTE BLOBS & REVISIONS (maintained by save_note, see note_store.py) ---
+class NoteBlob(db.Model):
+    """One compressed note body per distinct text, shared by every note with that text."""
+    digest = db.Column(db.String(64), primary_key=True) # SHA-256 of the UTF-8 text
+    data = db.Column(db.LargeBinary, nullable=False) # zlib
+    size = db.Column(db.Integer, nullable=False) # Uncompressed bytes
+    refs = db.Column(db.Integer, nullable=False, default=1) # Notes pointing here; deleted at 0
+
+class NoteRevision(db.Model):
+    """An earlier version of a note, stored as a delta against the next newer version."""
+    id = db.Column(db.Integer, primary_key=True)
+    note_id = db.Column(db.Integer, db.ForeignKey('note.id'), nullable=False)
+    saved_at = db.Column(db.DateTime, nullable=False) # When this version was saved
+    created_at = db.Column(db.DateTime, nullable=False) # When a newer save replaced it
+    size = db.Column(db.Integer, nullable=False) # UTF-8 bytes of this version
+    is_full = db.Column(db.Boolean, nullable=False, default=False) # data is the whole text, not a delta
+    data = db.Column(db.LargeBinary, nullable=False)
+    __table_args__ = (db.Index('ix_note_revision_note', 'note_id', 'id'),)
+
+class NoteTerm(db.Model):
+    """Search postings for the portable notes index (NOTE_SEARCH_BACKEND=table)."""
+    note_id = db.Column(db.Integer, db.ForeignKey('note.id'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    occurrences = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index('ix_note_term_user_term', 'user_id', 'term'),)
+
+# --- PROGRESS AGGREGATES (maintained incrementally by toggle_progress) ---
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_solved = db.Column(db.Integer, nullable=False, default=0)
+    last_active_on = db.Column(db.Date, nullable=True)
+    current_run = db.Column(db.Integer, nullable=False, default=0) # Consecutive active days ending at last_active_on
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    # Bumped on every progress change; drives ETags and /api/progress?since=
+    progress_version = db.Column(db.Integer, nullable=False, default=0)
+    progress_floor = db.Column(db.Integer, nullable=False, default=0) # Oldest version still in ProgressChange
+    progress_updated_at = db.Column(db.DateTime, nullable=True)
+
+class UserDailyActivity(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    solved_count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', name='_user_day_uc'),)
+
+class UserTopicProgress(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    topic_slug = db.Column(db.String(40), nullable=False)
+    solved_count = db.Column(db.Integer, nullable=False, default=0) # Solved problems on this topic's roadmap
+    __table_args__ = (db.UniqueConstraint('user_id', 'topic_slug', name='_user_topic_uc'),)
+
+class ProgressChange(db.Model):
+    """Recent solve/unsolve log per user, for delta sync (solved_at NULL = unsolved)."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    problem_id = db.Column(db.Integer, nullable=False)
+    solved_at = db.Column(db.DateTime, nullable=True)
+    __table_args__ = (db.Index('ix_progress_change_user_version', 'user_id', 'version'),)
+
+# --- DUE-REVIEW QUEUE (maintained by toggle/resolve and the daily rollover) ---
+class DueReview(db.Model):
+    """A solved_problem row due before the queue horizon: overdue, due later today or never scheduled."""
+    solved_id = db.Column(db.Integer, primary_key=True) # SolvedProblem.id
+    user_id = db.Column(db.Integer, nullable=False)
+    problem_id = db.Column(db.Integer, nullable=False)
+    due_at = db.Column(db.DateTime, nullable=True) # SolvedProblem.next_review_at (NULL: never scheduled)
+    __table_args__ = (db.Index('ix_due_review_user_due', 'user_id', 'due_at'),)
+
+class DueQueueState(db.Model):
+    id = db.Column(db.Integer, primary_key=True) # Single row, id 1
+    horizon = db.Column(db.DateTime, nullable=False) # The queue holds every review due before this
+
+# Per-worker cache of user rows for load_user. The only edit after signup is a
+# rehash on login (which pops the entry), so the TTL mainly bounds how long a
+# deleted account could linger.
+USER_CACHE = TTLCache(maxsize=4096, ttl=float(os.environ.get('USER_CACHE_TTL', 300)))
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    uid = int(user_id)
+    row = USER_CACHE.get(uid)
+    if row is None:
+        user = db.session.get(User, uid)
+        if user is not None:
+            USER_CACHE.set(uid, (user.username, user.password))
+        return user
+    # Rebuild the instance from cached columns and attach it without a SELECT
+    user = User(id=uid, username=row[0], password=row[1])
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 # --- ENSURE TABLES & COLUMNS EXIST ---
 with app.app_context():
@@ -117,9 +260,164 @@ with app.app_context():
                 print("✅ Migration applied successfully.")
         else:
             print("✅ Database schema is up to date.")
+
+        if 'srs_ease' not in columns:
+            print("⚠️ Migrating Database: Adding SM-2 scheduling columns...")
+            with db.engine.connect() as conn:
+                conn.execute(text("ALTER TABLE solved_problem ADD COLUMN srs_ease FLOAT NOT NULL DEFAULT 2.5"))
+                conn.execute(text("ALTER TABLE solved_problem ADD COLUMN srs_reps INTEGER NOT NULL DEFAULT 1"))
+                conn.execute(text("ALTER TABLE solved_problem ADD COLUMN last_reviewed_at TIMESTAMP"))
+                # Intervals past the first day mean at least one successful review already
+                conn.execute(text("UPDATE solved_problem SET srs_reps = 2 WHERE srs_interval > 1"))
+                conn.commit()
+                print("✅ Migration applied successfully.")
+
+        note_columns = [c['name'] for c in inspector.get_columns('note')]
+        if 'content_hash' not in note_columns:
+            print("⚠️ Migrating Database: Adding note storage columns...")
+            with db.engine.connect() as conn:
+                conn.execute(text("ALTER TABLE note ADD COLUMN content_hash VARCHAR(64)"))
+                conn.execute(text("ALTER TABLE note ADD COLUMN size INTEGER"))
+                conn.commit()
+                print("✅ Migration applied successfully.")
+
+        stats_columns = [c['name'] for c in inspector.get_columns('user_stats')]
+        if 'progress_version' not in stats_columns:
+            print("⚠️ Migrating Database: Adding progress version columns...")
+            with db.engine.connect() as conn:
+                conn.execute(text("ALTER TABLE user_stats ADD COLUMN progress_version INTEGER NOT NULL DEFAULT 0"))
+                conn.execute(text("ALTER TABLE user_stats ADD COLUMN progress_floor INTEGER NOT NULL DEFAULT 0"))
+                conn.execute(text("ALTER TABLE user_stats ADD COLUMN progress_updated_at TIMESTAMP"))
+                conn.commit()
+                print("✅ Migration applied successfully.")
+
+        # create_all() skips indexes on tables that already exist
+        for index in SolvedProblem.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
             
     except Exception as e:
         print(f"❌ Database Init Error: {e}")
+    # Don't hand pooled connections to forked workers (gunicorn preload_app)
+    db.engine.dispose()
+
+# --- SQL STATEMENT COUNTING ---
+# Every statement run inside a request is counted in g.sql_statements. With
+# SQL_COUNT_HEADER=1 responses report it as X-SQL-Statements, so tests and
+# benchmarks can pin a statement budget per endpoint.
+app.config['SQL_COUNT_HEADER'] = os.environ.get('SQL_COUNT_HEADER') == '1'
+
+def count_statement(*_):
+    if has_app_context():
+        g.sql_statements = g.get('sql_statements', 0) + 1
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+
+@app.after_request
+def report_statement_count(response):
+    if app.config['SQL_COUNT_HEADER']:
+        response.headers['X-SQL-Statements'] = str(g.get('sql_statements', 0))
+    return response
+
+# --- METRICS ---
+# Per-worker request, SQL, template, cache and catalog-load metrics (see
+# metrics.py), served as Prometheus text on /metrics. METRICS_TOKEN, if set,
+# is required as a bearer token there. PROFILE_SAMPLE_RATE > 0 runs the stack
+# sampler on that fraction of requests; read the stacks from /metrics/profile.
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+
+METRICS = metrics.Metrics()
+PROFILER = metrics.StackSampler(interval=float(os.environ.get('PROFILE_INTERVAL', 0.005)))
+METRICS.describe('http_requests_total', 'counter', 'Requests by endpoint and status code.')
+METRICS.describe('http_request_duration_seconds', 'histogram', 'Request handling time by endpoint.')
+METRICS.describe('http_request_sql_seconds_total', 'counter', 'Time spent in SQL statements by endpoint.')
+METRICS.describe('http_request_sql_statements_total', 'counter', 'SQL statements run by endpoint.')
+METRICS.describe('sql_statement_duration_seconds', 'histogram', 'Execution time of single SQL statements.')
+METRICS.describe('template_render_duration_seconds', 'histogram', 'Jinja render time by template.')
+METRICS.describe('cache_hits_total', 'counter', 'Per-worker cache hits.')
+METRICS.describe('cache_misses_total', 'counter', 'Per-worker cache misses.')
+METRICS.describe('cache_entries', 'gauge', 'Entries currently held by per-worker caches.')
+METRICS.describe('roadmap_build_seconds_total', 'counter', 'Time spent building topic roadmaps for the current catalog.')
+METRICS.describe('catalog_load_phase_seconds', 'gauge', 'Duration of each phase of the last catalog load.')
+METRICS.describe('catalog_loads_total', 'counter', 'Catalog loads by source (snapshot, CSV).')
+METRICS.describe('catalog_problems', 'gauge', 'Problems in the current catalog.')
+METRICS.describe('password_hash_rejected_total', 'counter', 'Hashes refused because the bcrypt queue was full.')
+METRICS.describe('profiler_samples_total', 'counter', 'Stack samples taken by the request profiler.')
+
+def time_statement(conn, *_):
+    if app.config['METRICS_ENABLED']:
+        conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+def record_statement(conn, *_):
+    starts = conn.info.get('statement_start')
+    if not starts: return
+    elapsed = time.perf_counter() - starts.pop()
+    METRICS.observe('sql_statement_duration_seconds', elapsed)
+    if has_app_context():
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', time_statement)
+    event.listen(db.engine, 'after_cursor_execute', record_statement)
+
+@app.before_request
+def start_request_metrics():
+    if not app.config['METRICS_ENABLED']: return
+    g.request_start = time.perf_counter()
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    if rate > 0 and random.random() < rate:
+        PROFILER.start(request.endpoint or '(unmatched)')
+        g.profiled = True
+
+def observe_request(start, status):
+    endpoint = request.endpoint or '(unmatched)'
+    METRICS.observe('http_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+    METRICS.inc('http_requests_total', endpoint=endpoint, status=status)
+    if 'sql_statements' in g:
+        METRICS.inc('http_request_sql_statements_total', g.sql_statements, endpoint=endpoint)
+        METRICS.inc('http_request_sql_seconds_total', g.get('sql_seconds', 0.0), endpoint=endpoint)
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None: observe_request(start, response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Always runs, unlike after_request (skipped when an exception propagates):
+    # a sampled thread left in the profiler would be sampled for good
+    if g.pop('profiled', False): PROFILER.stop()
+    start = g.pop('request_start', None)
+    if start is not None: observe_request(start, 500)  # after_request never ran
+
+@before_render_template.connect_via(app)
+def start_render_timer(sender, template, context, **extra):
+    if app.config['METRICS_ENABLED']:
+        g.render_start = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def record_render_time(sender, template, context, **extra):
+    start = g.pop('render_start', None)
+    if start is not None:
+        METRICS.observe('template_render_duration_seconds', time.perf_counter() - start, template=template.name)
+
+@METRICS.collector
+def collect_state_metrics():
+    """Counters kept by the caches, roadmaps and hasher themselves, read at scrape time."""
+    for name, cache in (('user', USER_CACHE), ('solved', SOLVED_CACHE), ('recommend', RECOMMEND_CACHE)):
+        yield 'cache_hits_total', {'cache': name}, cache.hits
+        yield 'cache_misses_total', {'cache': name}, cache.misses
+        yield 'cache_entries', {'cache': name}, len(cache)
+    catalog = CATALOG
+    yield 'cache_hits_total', {'cache': 'roadmap'}, catalog.roadmaps.hits
+    yield 'cache_misses_total', {'cache': 'roadmap'}, catalog.roadmaps.misses
+    yield 'roadmap_build_seconds_total', {}, sum(catalog.roadmaps.build_seconds.values())
+    yield 'catalog_problems', {}, len(catalog.data)
+    yield 'password_hash_rejected_total', {}, hasher.rejected
+    yield 'profiler_samples_total', {}, PROFILER.samples
 
 # --- DATA LOGIC ---
 TOPIC_PRIORITY = [
@@ -173,173 +471,472 @@ def assign_primary_topic(tags):
                 return slug
     return None
 
-def calculate_signal_score(row):
+# Signal score tuning: optimal "fair" acceptance rate and spread per difficulty
+ACCEPTANCE_TARGETS = {'Easy': 67.5, 'Medium': 52.5, 'Hard': 45.0}
+ACCEPTANCE_SPREADS = {'Easy': 17.5, 'Medium': 17.5, 'Hard': 15.0}
+CLASSIC_MULTIPLIER = 2.5
+
+def parse_submissions(col):
+    """Vectorized parse of submission counts ('1.2M', '500K', '734') into int64."""
+    s = col.fillna(0).astype(str).str.upper().str.strip()
+    scale = np.where(s.str.contains('M', regex=False), 1000000,
+                     np.where(s.str.contains('K', regex=False), 1000, 1))
+    num = pd.to_numeric(s.str.replace('M', '', regex=False).str.replace('K', '', regex=False), errors='coerce')
+    parsed = np.trunc(num.to_numpy(dtype=float) * scale)
+    return pd.Series(np.nan_to_num(parsed, nan=0.0).astype(np.int64), index=col.index)
+
+def calculate_like_ratios(likes, dislikes):
+    """Like ratio (0-100) damped for problems with fewer than 1000 votes."""
+    likes = np.asarray(likes, dtype=float)
+    total = likes + np.asarray(dislikes, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = (likes / total) * np.minimum(total / 1000, 1) * 100
+    return np.where(total > 0, ratio, 0.0)
+
+def calculate_signal_scores(df):
     """
-    Substance Score Logic (Refined):
+    Substance Score Logic (Refined), computed over whole columns:
     1. Base: Log of submissions (Popularity) + Likes.
     2. Quality: Gaussian 'Sweet Spot' for acceptance rate (No cliff edges).
     3. Classic Multiplier: 2.5x boost for Classics (Ensures quality still matters).
     """
     # 1. Base Components (Popularity & Likes)
-    sub_score = math.log1p(row.get('TotalSubmissions', 0)) * 2
-    like_score = row.get('adjusted_like_ratio', 0) * 0.5
-    
+    sub_score = np.log1p(df['TotalSubmissions'].to_numpy(dtype=float)) * 2
+    like_score = df['adjusted_like_ratio'].to_numpy(dtype=float) * 0.5
+
     # 2. Smooth Acceptance Bonus (Gaussian)
-    # Replaces the rigid if/else blocks with a smooth curve
-    rate = row.get('AcceptanceRate', 0)
-    diff = row.get('Difficulty', 'Medium')
+    rate = df['AcceptanceRate'].to_numpy(dtype=float)
+    optimal = df['Difficulty'].map(ACCEPTANCE_TARGETS).fillna(52.5).to_numpy(dtype=float)
+    spread = df['Difficulty'].map(ACCEPTANCE_SPREADS).fillna(17.5).to_numpy(dtype=float)
+
+    # Calculate deviation from optimal (0 = perfect match)
+    deviation = np.abs(rate - optimal) / spread
+    # Max bonus 20, decays smoothly as rate moves away from optimal
+    acc_bonus = np.maximum(0, 20 * np.exp(-deviation**2))
+
+    base_score = sub_score + like_score + acc_bonus
+
+    # 3. The Classic Multiplier
+    # Multiplying (rather than adding a flat bonus) means a terrible classic
+    # won't necessarily beat an amazing non-classic.
+    multiplier = np.where(df['ID'].isin(CLASSIC_PROBLEM_IDS).to_numpy(), CLASSIC_MULTIPLIER, 1.0)
+
+    return base_score * multiplier
+
+# --- CATALOG SNAPSHOT ---
+# `flask build-catalog` writes the parsed + scored catalog as a msgpack snapshot
+# keyed by the CSV content hash, so workers can skip the pandas parse on boot.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CATALOG_CSV = os.path.join(BASE_DIR, 'leetcode_with_submissions.csv')
+CATALOG_SNAPSHOT = os.environ.get('CATALOG_SNAPSHOT', os.path.join(BASE_DIR, 'leetcode_with_submissions.snapshot'))
+SNAPSHOT_FORMAT_VERSION = 1
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_catalog_frame(csv_path):
+    """Parses the scraped CSV into the scored DataFrame used by the app."""
+    df = pd.read_csv(csv_path)
+    df.rename(columns={'Acceptance Rate (%)':'AcceptanceRate','Premium Only':'PremiumOnly','Total Submissions':'TotalSubmissions'}, inplace=True)
     
-    # Define optimal "Fair" acceptance rates
-    targets = {'Easy': 67.5, 'Medium': 52.5, 'Hard': 45.0}
-    spreads = {'Easy': 17.5, 'Medium': 17.5, 'Hard': 15.0}
+    # Filter Algorithms & Free only
+    df = df[(df['Category'] == 'Algorithms') & (df['PremiumOnly'] == False)].copy()
     
-    optimal = targets.get(diff, 52.5)
-    spread = spreads.get(diff, 17.5)
+    # Parse Topics
+    df['Topics'] = df['Topics'].fillna('').apply(lambda x: [t.strip() for t in x.split(',') if t.strip()])
     
-    # Calculate deviation from optimal (0 = perfect match)
-    deviation = abs(rate - optimal) / spread
-    # Max bonus 20, decays smoothly as rate moves away from optimal
-    acc_bonus = max(0, 20 * math.exp(-deviation**2))
+    # Parse Submissions (handling '1.2M', '500K')
+    df['TotalSubmissions'] = parse_submissions(df['TotalSubmissions'])
     
-    base_score = sub_score + like_score + acc_bonus
+    # Calculate Adjusted Likes
+    df['adjusted_like_ratio'] = calculate_like_ratios(df['Likes'], df['Dislikes'])
     
-    # 3. The Classic Multiplier (The Critical Fix)
-    # Instead of adding +100, we multiply. This means a terrible classic 
-    # won't necessarily beat an amazing non-classic.
-    multiplier = 2.5 if row['ID'] in CLASSIC_PROBLEM_IDS else 1.0
+    # Topic Assignment
+    df['AssignedTopic'] = df['Topics'].apply(assign_primary_topic)
+    df = df[df['AssignedTopic'].notna()]
     
-    return base_score * multiplier
+    # Calculate Final Signal Score
+    df['signal_score'] = calculate_signal_scores(df)
+    return df
+
+def write_catalog_snapshot(df, csv_hash, path=CATALOG_SNAPSHOT):
+    """Numeric columns are stored as raw arrays, object columns as msgpack lists."""
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if col.dtype == object:
+            columns.append({'name': name, 'values': col.tolist()})
+        else:
+            columns.append({'name': name, 'dtype': col.dtype.str, 'data': col.to_numpy().tobytes()})
+    payload = {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'csv_sha256': csv_hash,
+        'index': df.index.to_numpy(dtype=np.int64).tobytes(),
+        'columns': columns,
+    }
+    # Write-then-rename so concurrent readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(msgspec.msgpack.encode(payload))
+    os.replace(tmp_path, path)
+
+def read_catalog_snapshot(csv_hash, path=CATALOG_SNAPSHOT):
+    """Returns the snapshot DataFrame, or None if it is missing, stale or unreadable."""
+    if not os.path.exists(path): return None
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            payload = msgspec.msgpack.decode(buf)
+    except (OSError, ValueError, msgspec.DecodeError):
+        return None
+    if payload.get('version') != SNAPSHOT_FORMAT_VERSION or payload.get('csv_sha256') != csv_hash:
+        return None
+
+    index = pd.Index(np.frombuffer(payload['index'], dtype=np.int64))
+    data = {}
+    for col in payload['columns']:
+        if 'values' in col:
+            data[col['name']] = pd.Series(col['values'], index=index, dtype=object)
+        else:
+            data[col['name']] = pd.Series(np.frombuffer(col['data'], dtype=np.dtype(col['dtype'])).copy(), index=index)
+    return pd.DataFrame(data, index=index)
+
+class Catalog(NamedTuple):
+    """Everything derived from one CSV version. Swapped as a unit, never mutated."""
+    version: str              # sha256 of the CSV
+    stamp: tuple              # (mtime_ns, size) of the CSV when it was hashed
+    data: pd.DataFrame
+    index: ProblemIndex
+    graph: ProblemGraph
+    search: SearchIndex
+    roadmaps: RoadmapEngine
+    recommender: Recommender
+    source: str
+
+def catalog_stamp():
+    st = os.stat(CATALOG_CSV)
+    return (st.st_mtime_ns, st.st_size)
+
+def assemble_catalog(version, stamp, df, roadmaps, source, phases=None):
+    """Builds the per-version lookup structures around a catalog frame."""
+    phases = phases or metrics.PhaseTimer()
+    with phases('index'): index = ProblemIndex(df)
+    with phases('graph'): graph = ProblemGraph(df)
+    with phases('search'): search = SearchIndex(df)
+    with phases('recommender'): recommender = Recommender(graph, index, roadmaps, RADAR_GROUPS)
+    return Catalog(version, stamp, df, index, graph, search, roadmaps, recommender, source)
+
+def empty_catalog():
+    data = pd.DataFrame()
+    return assemble_catalog('', None, data, RoadmapEngine(data, SLUG_TO_NAME_MAP, mode='lazy'), 'empty')
+
+def build_catalog(roadmap_mode=None):
+    """Loads CATALOG_CSV (via its snapshot when fresh) into a new Catalog. Raises on failure."""
+    phases = metrics.PhaseTimer()
+    with phases('hash'):
+        stamp = catalog_stamp()
+        csv_hash = hash_file(CATALOG_CSV)
+    with phases('snapshot'): df = read_catalog_snapshot(csv_hash)
+    source = 'snapshot'
+    if df is None:
+        with phases('parse'): df = build_catalog_frame(CATALOG_CSV)
+        source = 'CSV'
+    with phases('roadmaps'):
+        roadmaps = RoadmapEngine(df, SLUG_TO_NAME_MAP, mode=roadmap_mode or app.config['ROADMAP_MODE'])
+    catalog = assemble_catalog(csv_hash, stamp, df, roadmaps, source, phases)
+    METRICS.clear('catalog_load_phase_seconds')  # A snapshot load has no 'parse' phase
+    for phase, seconds in phases.seconds.items():
+        METRICS.set('catalog_load_phase_seconds', seconds, phase=phase)
+    METRICS.inc('catalog_loads_total', source=source)
+    return catalog
 
 def load_data():
-    global DATA
+    global CATALOG
     try:
-        if not os.path.exists('leetcode_with_submissions.csv'):
+        if not os.path.exists(CATALOG_CSV):
             print("❌ CSV File not found.")
+            CATALOG = empty_catalog()
             return
-        df = pd.read_csv('leetcode_with_submissions.csv')
-        df.rename(columns={'Acceptance Rate (%)':'AcceptanceRate','Premium Only':'PremiumOnly','Total Submissions':'TotalSubmissions'}, inplace=True)
-        
-        # Filter Algorithms & Free only
-        df = df[(df['Category'] == 'Algorithms') & (df['PremiumOnly'] == False)].copy()
-        
-        # Parse Topics
-        df['Topics'] = df['Topics'].fillna('').apply(lambda x: [t.strip() for t in x.split(',') if t.strip()])
-        
-        # Parse Submissions (handling '1.2M', '500K')
-        def parse_subs(x):
-            s = str(x).upper().strip()
-            if 'M' in s: return int(float(s.replace('M','')) * 1000000)
-            if 'K' in s: return int(float(s.replace('K','')) * 1000)
-            try: return int(float(s))
-            except: return 0
-            
-        df['TotalSubmissions'] = df['TotalSubmissions'].fillna(0).apply(parse_subs)
-        
-        # Calculate Adjusted Likes
-        df['adjusted_like_ratio'] = df.apply(lambda r: (r['Likes']/(r['Likes']+r['Dislikes']))*min((r['Likes']+r['Dislikes'])/1000,1)*100 if (r['Likes']+r['Dislikes'])>0 else 0, axis=1)
-        
-        # Topic Assignment
-        df['AssignedTopic'] = df['Topics'].apply(assign_primary_topic)
-        df = df[df['AssignedTopic'].notna()]
-        
-        # Calculate Final Signal Score
-        df['signal_score'] = df.apply(calculate_signal_score, axis=1)
-        
-        DATA = df
-        print(f"✅ Data Loaded: {len(DATA)} problems.")
+        CATALOG = build_catalog()
+        print(f"✅ Data Loaded: {len(CATALOG.data)} problems (from {CATALOG.source}).")
     except Exception as e:
         print(f"❌ Data Load Error: {e}")
-        DATA = pd.DataFrame()
-
-# --- TOPIC ROADMAP CACHE ---
-TOPIC_CACHE = {}
+        CATALOG = empty_catalog()
 
-def get_curated_problems_for_topic(topic_slug):
+def get_catalog():
     """
-    GAME DESIGN PROGRESSION LOGIC (v2)
-    -----------------------------
-    1. Tutorial: 2 Easy -> 1 Medium
-    2. Adaptive Wave: Adjusts difficulty pattern based on the topic's inventory.
+    The catalog for the current request. Pinned in `g` on first use, so a
+    request keeps one consistent version even if a reload swaps CATALOG meanwhile.
     """
-    if topic_slug in TOPIC_CACHE: return TOPIC_CACHE[topic_slug]
-    if DATA.empty: return []
+    if not has_app_context(): return CATALOG
+    if 'catalog' not in g:
+        g.catalog = CATALOG
+    return g.catalog
 
-    df_topic = DATA[DATA['AssignedTopic'] == topic_slug].copy()
-    if df_topic.empty: return []
+# --- CATALOG HOT RELOAD ---
+# Workers poll the CSV's (mtime, size) at most every CATALOG_POLL_SECONDS. On a
+# change, a background thread hashes it, loads the new version (the snapshot
+# if `flask publish-catalog` wrote one, otherwise a full parse) and swaps
+# CATALOG. Requests keep being served from the old catalog until the swap.
+app.config['CATALOG_POLL_SECONDS'] = float(os.environ.get('CATALOG_POLL_SECONDS', 30))
 
-    # 1. Bucket and Sort by Signal Score
-    pool_e = df_topic[df_topic['Difficulty'] == 'Easy'].sort_values('signal_score', ascending=False).to_dict('records')
-    pool_m = df_topic[df_topic['Difficulty'] == 'Medium'].sort_values('signal_score', ascending=False).to_dict('records')
-    pool_h = df_topic[df_topic['Difficulty'] == 'Hard'].sort_values('signal_score', ascending=False).to_dict('records')
+class CatalogReloader:
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_check = time.monotonic() + interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.last_error = None
 
-    # 2. Determine Adaptive Pattern (Inventory Check)
-    total_problems = len(pool_e) + len(pool_m) + len(pool_h)
-    hard_ratio = len(pool_h) / total_problems if total_problems > 0 else 0
-    
-    if hard_ratio > 0.25:
-        # Abundance of Hards: Standard Game Loop
-        wave_pattern = ['Medium', 'Medium', 'Hard', 'Easy']
-    elif hard_ratio > 0.10:
-        # Moderate Hards: Spaced out Boss fights
-        wave_pattern = ['Medium', 'Medium', 'Medium', 'Hard', 'Easy']
-    else:
-        # Conservation Mode: Rarely use Hards
-        wave_pattern = ['Medium', 'Easy', 'Medium', 'Medium', 'Hard', 'Easy']
+    def poll(self):
+        """Cheap enough for every request: one clock read until the interval elapses."""
+        now = time.monotonic()
+        if self.interval <= 0 or now < self.next_check: return
+        with self.lock:
+            if now < self.next_check or (self.thread and self.thread.is_alive()): return
+            self.next_check = now + self.interval
+            try:
+                if catalog_stamp() == CATALOG.stamp: return
+            except OSError:
+                return # CSV missing: keep serving what we have
+            self.thread = threading.Thread(target=self.reload, name='catalog-reload', daemon=True)
+            self.thread.start()
 
-    roadmap = []
-    
-    def pop_best(difficulty_tier):
-        """Attempts to pop from specific tier, with intelligent fallbacks."""
-        if difficulty_tier == 'Easy':
-            if pool_e: return pool_e.pop(0)
-            if pool_m: return pool_m.pop(0) # Fallback: Doable Medium
-            if pool_h: return pool_h.pop(0) # Fallback: Only Hards left
-        elif difficulty_tier == 'Medium':
-            if pool_m: return pool_m.pop(0)
-            if pool_e: return pool_e.pop(0) # Fallback: Easy
-            if pool_h: return pool_h.pop(0) # Fallback: Hard
-        elif difficulty_tier == 'Hard':
-            if pool_h: return pool_h.pop(0)
-            if pool_m: return pool_m.pop(0) # Fallback: A chunky Medium
-            if pool_e: return pool_e.pop(0) # Fallback: Easy
-        return None
+    def reload(self):
+        """Rebuilds and swaps the catalog if the CSV content changed. Returns True on swap."""
+        global CATALOG
+        try:
+            current = CATALOG
+            candidate = build_catalog() if hash_file(CATALOG_CSV) != current.version else None
+            if candidate is None:
+                CATALOG = current._replace(stamp=catalog_stamp()) # Touched, same content
+                return False
+            CATALOG = candidate
+            self.last_error = None
+            print(f"🔄 Catalog reloaded: {current.version[:12]} -> {candidate.version[:12]}, "
+                  f"{len(candidate.data)} problems (from {candidate.source}).")
+            return True
+        except Exception as e:
+            self.last_error = e
+            print(f"❌ Catalog reload failed, keeping {CATALOG.version[:12]}: {e}")
+            return False
 
-    # --- PHASE 1: THE TUTORIAL ---
-    for _ in range(2):
-        p = pop_best('Easy')
-        if p: roadmap.append(p)
-    
-    p = pop_best('Medium')
-    if p: roadmap.append(p)
+CATALOG_RELOADER = CatalogReloader(app.config['CATALOG_POLL_SECONDS'])
 
-    # --- PHASE 2: THE ADAPTIVE WAVE ---
-    MAX_ITEMS = 60
-    idx = 0
-    pattern_len = len(wave_pattern)
-    
-    while (pool_e or pool_m or pool_h) and len(roadmap) < MAX_ITEMS:
-        target_diff = wave_pattern[idx % pattern_len]
-        problem = pop_best(target_diff)
-        
-        if problem:
-            if problem['ID'] not in [x['ID'] for x in roadmap]:
-                roadmap.append(problem)
-        else:
-            break
-            
-        idx += 1
+@app.before_request
+def poll_catalog():
+    CATALOG_RELOADER.poll()
+
+@app.cli.command('build-catalog')
+def build_catalog_command():
+    """Parse the problem CSV and write the catalog snapshot used on worker boot."""
+    csv_hash = hash_file(CATALOG_CSV)
+    df = build_catalog_frame(CATALOG_CSV)
+    write_catalog_snapshot(df, csv_hash)
+    print(f"✅ Catalog snapshot written: {len(df)} problems -> {CATALOG_SNAPSHOT}")
 
-    TOPIC_CACHE[topic_slug] = roadmap
-    return roadmap
+@app.cli.command('publish-catalog')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+def publish_catalog_command(csv_path):
+    """Validate a new problem CSV, snapshot it, and install it for running workers to pick up."""
+    csv_hash = hash_file(csv_path)
+    if csv_hash == CATALOG.version:
+        print("Catalog unchanged, nothing to publish.")
+        return
+    df = build_catalog_frame(csv_path)
+    if df.empty:
+        raise click.ClickException(f"{csv_path} yields no usable problems, refusing to publish.")
+    # Snapshot first, so workers that notice the new CSV load it without parsing
+    write_catalog_snapshot(df, csv_hash)
+    tmp_path = f"{CATALOG_CSV}.{os.getpid()}.tmp"
+    shutil.copyfile(csv_path, tmp_path)
+    os.replace(tmp_path, CATALOG_CSV)
+    interval = app.config['CATALOG_POLL_SECONDS']
+    print(f"✅ Published catalog {csv_hash[:12]}: {len(df)} problems. " +
+          (f"Workers swap it in within {interval:g}s." if interval > 0 else "Polling is off: restart workers to load it."))
+
+    new_topics = RoadmapEngine(df, SLUG_TO_NAME_MAP, mode='eager').topic_ids()
+    if new_topics != CATALOG.roadmaps.topic_ids():
+        print("⚠️ Roadmap membership changed: run `flask rebuild-stats` to refresh per-topic progress.")
+
+# --- TOPIC ROADMAPS ---
+def get_curated_problems_for_topic(topic_slug):
+    """Curated roadmap for a topic (see roadmap.build_roadmap for the progression logic)."""
+    return get_catalog().roadmaps.get(topic_slug)
 
 def get_problem_details(pid):
-    if DATA.empty: return None
-    row = DATA[DATA['ID'] == int(pid)]
-    if row.empty: return None
-    return row.iloc[0].to_dict()
+    """Returns the shared (read-only) Problem record for an ID, or None."""
+    return get_catalog().index.get(int(pid))
 
 load_data()
 
+# --- PROGRESS AGGREGATES ---
+def upsert_statement(model):
+    """INSERT ... ON CONFLICT for dialects that support it, plain INSERT otherwise."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return db.insert(model)
+    return insert(model)
+
+HEATMAP_DAYS = 16 * 7 # Matches the dashboard grid (16 columns x 7 days)
+
+def current_streak_for(stats, today=None):
+    """A run only counts as current if the user was active today or yesterday."""
+    if not stats or not stats.last_active_on: return 0
+    today = today or datetime.utcnow().date() # Day keys are UTC dates
+    return stats.current_run if stats.last_active_on >= today - timedelta(days=1) else 0
+
+def refresh_streaks(stats):
+    """Recomputes streak fields from the (small) set of active days."""
+    days = [d for (d,) in UserDailyActivity.query.with_entities(UserDailyActivity.day).filter_by(user_id=stats.user_id).order_by(UserDailyActivity.day.asc()).all()]
+    stats.current_run, stats.longest_streak = activity.run_lengths(activity.to_days(days))
+    stats.last_active_on = days[-1] if days else None
+
+def rebuild_user_stats(user_id):
+    """Recomputes every aggregate for a user from SolvedProblem (backfill / repair)."""
+    UserDailyActivity.query.filter_by(user_id=user_id).delete()
+    UserTopicProgress.query.filter_by(user_id=user_id).delete()
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+    db.session.add(stats)
+
+    solved = SolvedProblem.query.with_entities(SolvedProblem.problem_id, SolvedProblem.solved_at).filter_by(user_id=user_id).all()
+    summary = activity.summarize([solved_at for _, solved_at in solved])
+    roadmaps = get_catalog().roadmaps
+    topics = {}
+    for pid, _ in solved:
+        slug = roadmaps.topic_of(pid)
+        if slug: topics[slug] = topics.get(slug, 0) + 1
+
+    db.session.add_all([
+        UserDailyActivity(user_id=user_id, day=d, solved_count=n)
+        for d, n in zip(summary.days.astype(date).tolist(), summary.counts.tolist())
+    ])
+    db.session.add_all([UserTopicProgress(user_id=user_id, topic_slug=t, solved_count=n) for t, n in topics.items()])
+    stats.total_solved = len(solved)
+    stats.current_run, stats.longest_streak = summary.run_at_last, summary.longest_streak
+    stats.last_active_on = summary.last_active
+
+    # Rows may have changed behind our back: invalidate ETags and force delta
+    # clients into a full resync.
+    ProgressChange.query.filter_by(user_id=user_id).delete()
+    stats.progress_version = (stats.progress_version or 0) + 1
+    stats.progress_floor = stats.progress_version
+    stats.progress_updated_at = datetime.utcnow()
+    return stats
+
+def get_user_stats(user_id):
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        # First visit since aggregates were introduced: backfill once
+        stats = rebuild_user_stats(user_id)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback() # Another request backfilled first
+            stats = db.session.get(UserStats, user_id)
+    return stats
+
+def add_solved_counts(model, key, user_id, deltas):
+    """
+    Adds {key: delta} to the user's `model` rows as solved_count = solved_count
+    + delta (never below 0), inserting missing rows, so concurrent requests
+    can't lose each other's updates. Caller commits.
+    """
+    t = model.__table__
+    count = t.c.solved_count + db.bindparam('delta')
+    count = db.case((count < 0, 0), else_=count)
+    rows = [{'user_id': user_id, key: k, 'solved_count': max(d, 0), 'delta': d} for k, d in deltas.items() if d]
+    if not rows: return
+    stmt = upsert_statement(t) # Core insert: the ORM one drops the 'delta' key
+    if hasattr(stmt, 'on_conflict_do_update'):
+        db.session.execute(stmt.on_conflict_do_update(index_elements=['user_id', key], set_={'solved_count': count}), rows)
+        return
+    existing = set(db.session.execute(db.select(t.c[key]).where(t.c.user_id == user_id, t.c[key].in_(deltas))).scalars())
+    updates = [{'row_key': r[key], 'delta': r['delta']} for r in rows if r[key] in existing]
+    if updates: db.session.execute(t.update().where(
+        t.c.user_id == user_id, t.c[key] == db.bindparam('row_key')).values(solved_count=count), updates)
+    inserts = [{'user_id': user_id, key: r[key], 'solved_count': r['solved_count']} for r in rows if r[key] not in existing]
+    if inserts: db.session.execute(t.insert(), inserts)
+
+def apply_progress_deltas(user_id, changes):
+    """
+    Applies solves (+1) / unsolves (-1) to the user's aggregates in a few
+    queries, whatever the batch size, and logs them under a new progress
+    version. `changes` is [(problem_id, solved_at, delta)]; for unsolves
+    solved_at is the removed row's. Caller commits.
+    """
+    stats = get_user_stats(user_id)
+    if not changes: return
+    # Bumping the version first locks the stats row until commit, so requests
+    # for the same user (other tabs) apply their changes one at a time.
+    total = UserStats.total_solved + sum(d for _, _, d in changes)
+    stmt = db.update(UserStats).where(UserStats.user_id == user_id).values(
+        total_solved=db.case((total < 0, 0), else_=total),
+        progress_version=UserStats.progress_version + 1, progress_updated_at=datetime.utcnow())
+    if db.engine.dialect.update_returning:
+        db.session.execute(stmt.returning(UserStats), execution_options={'populate_existing': True})
+    else:
+        db.session.execute(stmt)
+        db.session.refresh(stats)
+
+    roadmaps = get_catalog().roadmaps
+    topic_deltas, day_deltas = {}, {}
+    for pid, solved_at, delta in changes:
+        slug = roadmaps.topic_of(pid)
+        if slug: topic_deltas[slug] = topic_deltas.get(slug, 0) + delta
+        day_deltas[solved_at.date()] = day_deltas.get(solved_at.date(), 0) + delta
+    add_solved_counts(UserTopicProgress, 'topic_slug', user_id, topic_deltas)
+
+    existing = dict(db.session.execute(db.select(UserDailyActivity.day, UserDailyActivity.solved_count).where(
+        UserDailyActivity.user_id == user_id, UserDailyActivity.day.in_(day_deltas))).all())
+    new_days = [d for d, delta in day_deltas.items() if d not in existing and delta > 0]
+    emptied = [d for d, delta in day_deltas.items() if delta < 0 and existing.get(d, 0) + delta <= 0]
+    add_solved_counts(UserDailyActivity, 'day', user_id, {d: delta for d, delta in day_deltas.items() if d in existing or delta > 0})
+    if emptied:
+        # The day went inactive, which can split a run
+        db.session.execute(db.delete(UserDailyActivity).where(
+            UserDailyActivity.user_id == user_id, UserDailyActivity.day.in_(emptied), UserDailyActivity.solved_count <= 0))
+
+    # A single new active day extends or restarts the run in O(1); anything
+    # else (inactive days, several or out-of-order new days) recomputes it.
+    last = stats.last_active_on
+    if not emptied and len(new_days) == 1 and (last is None or new_days[0] > last):
+        solved_on = new_days[0]
+        stats.current_run = stats.current_run + 1 if last and solved_on == last + timedelta(days=1) else 1
+        stats.last_active_on = solved_on
+        stats.longest_streak = max(stats.longest_streak, stats.current_run)
+    elif emptied or new_days:
+        refresh_streaks(stats)
+
+    log_progress_changes(stats, changes)
+
+def apply_progress_delta(user_id, problem_id, solved_at, delta):
+    """Applies one solve (+1) or unsolve (-1) to the user's aggregates. Caller commits."""
+    apply_progress_deltas(user_id, [(problem_id, solved_at, delta)])
+
+PROGRESS_LOG_VERSIONS = 500 # Versions of change history kept per user for ?since=
+
+def log_progress_changes(stats, changes):
+    """Logs `changes` under stats.progress_version, already bumped by the caller."""
+    version = stats.progress_version
+    db.session.add_all([
+        ProgressChange(user_id=stats.user_id, version=version, problem_id=pid, solved_at=solved_at if delta > 0 else None)
+        for pid, solved_at, delta in changes
+    ])
+    # Trim in steps rather than on every write
+    if version - (stats.progress_floor or 0) > 2 * PROGRESS_LOG_VERSIONS:
+        stats.progress_floor = version - PROGRESS_LOG_VERSIONS
+        ProgressChange.query.filter(
+            ProgressChange.user_id == stats.user_id, ProgressChange.version <= stats.progress_floor
+        ).delete(synchronize_session=False)
+
 # --- NARRATIVE SRS TEMPLATES ---
 SRS_STORIES = [
     "ALERT: Unauthorized entity '{title}' breached containment sector 4.",
@@ -352,30 +949,583 @@ SRS_STORIES = [
     "DANGER: Sentient code segment '{title}' attempting to escape."
 ]
 
+# --- DUE QUEUE ---
+# due_review mirrors the solved_problem rows due before a horizon (the next
+# UTC midnight), so the dashboard reads a user's handful of due reviews and
+# the "due today" count without touching solved_problem. Kept in sync by:
+# - toggle/batch (unsolves drop their entry; new solves are due tomorrow, past the horizon)
+# - resolve and the SRS rebalance (reviews rescheduled past the horizon leave the queue)
+# - the rollover: once the horizon passes, the first request in each worker starts a
+#   background copy of the reviews due in the new day (`flask rollover-due-queue`
+#   does the same from cron). Until it lands, reads fall back to solved_problem.
+DUE_QUEUE_RECHECK_SECONDS = 60 # How often a worker re-reads a stale horizon
+DUE_QUEUE_ID_CHUNK = 5000 # IDs per IN (...) when re-queueing rescheduled rows
+
+def next_midnight(now):
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+
+def fill_due_queue(before, since=None, user_id=None, solved_ids=None):
+    """Copies solved_problem rows due in [since, before) into the queue (since=None: also unscheduled ones)."""
+    sp = SolvedProblem.__table__
+    due = sp.c.next_review_at
+    cond = db.and_(due >= since, due < before) if since else db.or_(due.is_(None), due < before)
+    if user_id is not None: cond = db.and_(sp.c.user_id == user_id, cond)
+    if solved_ids is not None: cond = db.and_(sp.c.id.in_(solved_ids), cond)
+    stmt = upsert_statement(DueReview).from_select(
+        ['solved_id', 'user_id', 'problem_id', 'due_at'], db.select(sp.c.id, sp.c.user_id, sp.c.problem_id, due).where(cond))
+    if hasattr(stmt, 'on_conflict_do_nothing'):
+        stmt = stmt.on_conflict_do_nothing(index_elements=['solved_id']) # Another worker's rollover got there first
+    return db.session.execute(stmt).rowcount
+
+def set_due_horizon(horizon):
+    state = db.session.get(DueQueueState, 1)
+    if state is None: db.session.add(DueQueueState(id=1, horizon=horizon))
+    else: state.horizon = horizon
+
+def backfill_due_queue(now=None):
+    """Rebuilds the whole queue from solved_problem. Returns the number of queued reviews."""
+    horizon = next_midnight(now or datetime.utcnow())
+    DueReview.query.delete(synchronize_session=False)
+    count = fill_due_queue(horizon)
+    set_due_horizon(horizon)
+    db.session.commit()
+    DUE_QUEUE.reset()
+    return count
+
+def rollover_due_queue(now=None):
+    """Moves the horizon to the next midnight, queueing the reviews due in between. Returns how many."""
+    horizon = next_midnight(now or datetime.utcnow())
+    state = db.session.get(DueQueueState, 1)
+    if state is None: return backfill_due_queue(now)
+    if state.horizon >= horizon: return 0
+    count = fill_due_queue(horizon, since=state.horizon)
+    state.horizon = horizon
+    db.session.commit()
+    DUE_QUEUE.reset()
+    return count
+
+def refresh_due_queue(user_id, now=None):
+    """Re-queues one user's reviews (after writing their solved_problem rows directly). Caller commits."""
+    DueReview.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    state = db.session.get(DueQueueState, 1)
+    fill_due_queue(state.horizon if state else next_midnight(now or datetime.utcnow()), user_id=user_id)
+
+def requeue_reviews(solved_ids):
+    """Re-syncs the queue entries of rows rescheduled in bulk (the SRS rebalance). Caller commits."""
+    state = db.session.get(DueQueueState, 1)
+    if state is None: return
+    for start in range(0, len(solved_ids), DUE_QUEUE_ID_CHUNK):
+        batch = solved_ids[start:start + DUE_QUEUE_ID_CHUNK]
+        DueReview.query.filter(DueReview.solved_id.in_(batch)).delete(synchronize_session=False)
+        fill_due_queue(state.horizon, solved_ids=batch)
+
+def delete_solved_rows(user_id, problem_ids, now):
+    """
+    Unsolves: deletes the rows, and the queue entries of any that were due.
+    Returns {problem_id: solved_at} for the rows actually deleted (another tab
+    may have got there first). Caller commits.
+    """
+    sp = SolvedProblem.__table__
+    cond = db.and_(sp.c.user_id == user_id, sp.c.problem_id.in_(problem_ids))
+    cols = (sp.c.problem_id, sp.c.solved_at, sp.c.next_review_at)
+    if db.engine.dialect.delete_returning:
+        rows = db.session.execute(db.delete(sp).where(cond).returning(*cols)).all()
+    else:
+        # Lock the rows first, so the ones returned are the ones deleted
+        rows = db.session.execute(db.select(*cols).where(cond).with_for_update()).all()
+        if rows: db.session.execute(db.delete(sp).where(cond))
+    if any(r.next_review_at is None or r.next_review_at < next_midnight(now) for r in rows):
+        DueReview.query.filter(DueReview.user_id == user_id, DueReview.problem_id.in_([r.problem_id for r in rows])).delete(synchronize_session=False)
+    return {r.problem_id: r.solved_at for r in rows}
+
+def check_due_queue():
+    """(missing, extra, stale) solved IDs: queue entries vs the solved_problem rows due before the horizon."""
+    state = db.session.get(DueQueueState, 1)
+    if state is None: return None
+    sp = SolvedProblem.__table__
+    expected = dict(db.session.execute(db.select(sp.c.id, sp.c.next_review_at).where(
+        db.or_(sp.c.next_review_at.is_(None), sp.c.next_review_at < state.horizon))).all())
+    queued = dict(db.session.execute(db.select(DueReview.solved_id, DueReview.due_at)).all())
+    missing = sorted(expected.keys() - queued.keys())
+    extra = sorted(queued.keys() - expected.keys())
+    stale = sorted(i for i in expected.keys() & queued.keys() if expected[i] != queued[i])
+    return missing, extra, stale
+
+class DueQueueHorizon:
+    """Per-worker copy of the queue horizon; starts the rollover once it has passed."""
+
+    def __init__(self, recheck):
+        self.recheck = recheck
+        self.horizon = None
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def reset(self):
+        self.horizon, self.next_check = None, 0.0
+
+    def covers(self, now):
+        """True if the queue is current at `now`. Reads the DB at most every `recheck` seconds while stale."""
+        if self.horizon is not None and now < self.horizon: return True
+        tick = time.monotonic()
+        if tick >= self.next_check:
+            with self.lock:
+                if tick >= self.next_check:
+                    self.next_check = tick + self.recheck
+                    state = db.session.get(DueQueueState, 1)
+                    self.horizon = state.horizon if state else None
+                    if state and now >= state.horizon and not (self.thread and self.thread.is_alive()):
+                        self.thread = threading.Thread(target=self.rollover, args=(now,), name='due-queue-rollover', daemon=True)
+                        self.thread.start()
+        return self.horizon is not None and now < self.horizon
+
+    def rollover(self, now):
+        with app.app_context():
+            try:
+                rollover_due_queue(now)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Due-queue rollover failed: {e}")
+
+DUE_QUEUE = DueQueueHorizon(DUE_QUEUE_RECHECK_SECONDS)
+
+with app.app_context():
+    try:
+        if db.session.get(DueQueueState, 1) is None:
+            print(f"⚠️ Building the due-review queue: {backfill_due_queue()} reviews queued.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Due-queue backfill failed: {e}")
+    db.engine.dispose()
+
+# Dashboard reads, built once: constructing a statement costs more than
+# these index lookups.
+# From the queue, one statement: due-now rows sort first, and the window
+# count sees every queued row.
+QUEUED_REVIEWS = db.select(
+    DueReview.problem_id, DueReview.due_at, db.func.count().over().label('due_today')
+).where(DueReview.user_id == db.bindparam('user_id')).order_by(
+    db.case((DueReview.due_at > db.bindparam('now'), 1), else_=0),
+    DueReview.due_at.is_(None), DueReview.due_at, DueReview.solved_id
+).limit(db.bindparam('limit'))
+
+# The solved_problem fallback. Each part is a range scan on
+# ix_solved_problem_user_next_review, instead of one OR that neither SQLite
+# nor Postgres can walk in index order; due_today sums two such counts.
+def _count_reviews(*where):
+    return db.select(db.func.count()).where(SolvedProblem.user_id == db.bindparam('user_id'), *where).scalar_subquery()
+
+DUE_TODAY = _count_reviews(SolvedProblem.next_review_at < db.bindparam('midnight')) + _count_reviews(SolvedProblem.next_review_at.is_(None))
+DUE_TODAY_COUNT = db.select(DUE_TODAY)
+OVERDUE_REVIEWS = db.select(
+    SolvedProblem.problem_id, SolvedProblem.next_review_at.label('due_at'), DUE_TODAY.label('due_today')
+).where(
+    SolvedProblem.user_id == db.bindparam('user_id'), SolvedProblem.next_review_at <= db.bindparam('now')
+).order_by(SolvedProblem.next_review_at.asc()).limit(db.bindparam('limit'))
+UNSCHEDULED_REVIEWS = db.select(SolvedProblem.problem_id, SolvedProblem.next_review_at.label('due_at')).where(
+    SolvedProblem.user_id == db.bindparam('user_id'), SolvedProblem.next_review_at.is_(None)
+).order_by(SolvedProblem.id.asc()).limit(db.bindparam('limit'))
+
+def get_due_reviews(user_id, limit, now=None):
+    """
+    The `limit` most overdue reviews as (row, Problem) pairs (rows have
+    problem_id and due_at), plus the count of reviews due by the end of
+    today. Overdue rows come first (oldest due date first), then
+    never-scheduled (NULL) rows.
+    """
+    now = now or datetime.utcnow()
+    if DUE_QUEUE.covers(now):
+        rows = db.session.execute(QUEUED_REVIEWS, {'user_id': user_id, 'now': now, 'limit': limit}).all()
+        due_today = rows[0].due_today if rows else 0
+        tasks = [r for r in rows if r.due_at is None or r.due_at <= now]
+    else:
+        params = {'user_id': user_id, 'now': now, 'midnight': next_midnight(now), 'limit': limit}
+        tasks = db.session.execute(OVERDUE_REVIEWS, params).all()
+        due_today = tasks[0].due_today if tasks else db.session.execute(DUE_TODAY_COUNT, params).scalar()
+        if len(tasks) < limit:
+            tasks += db.session.execute(UNSCHEDULED_REVIEWS, {**params, 'limit': limit - len(tasks)}).all()
+    problems = get_catalog().index.get_many([t.problem_id for t in tasks])
+    return [(t, p) for t, p in zip(tasks, problems) if p], due_today
+
 def get_srs_missions(user_id):
-    now = datetime.utcnow()
-    # Fetch tasks where review date is passed OR null
-    tasks = SolvedProblem.query.filter(
-        SolvedProblem.user_id == user_id,
-        or_(SolvedProblem.next_review_at <= now, SolvedProblem.next_review_at == None)
-    ).order_by(SolvedProblem.next_review_at.asc()).limit(2).all()
-    
+    """(up to 2 missions for the dashboard, reviews due today)."""
     missions = []
-    for t in tasks:
-        p_details = get_problem_details(t.problem_id)
-        if p_details:
-            template = random.choice(SRS_STORIES)
-            missions.append({
-                "problem_id": t.problem_id,
-                "title": p_details['Title'],
-                "link": p_details['Link'],
-                "story": template.format(title=p_details['Title'].upper()),
-                "difficulty": p_details['Difficulty']
-            })
-    return missions
+    reviews, due_today = get_due_reviews(user_id, 2)
+    for t, p_details in reviews:
+        template = random.choice(SRS_STORIES)
+        missions.append({
+            "problem_id": t.problem_id,
+            "title": p_details.title,
+            "link": p_details.link,
+            "story": template.format(title=p_details.title.upper()),
+            "difficulty": p_details.difficulty
+        })
+    return missions, due_today
+
+# --- SRS REBALANCE ---
+# Nightly job (`flask srs-rebalance`): every future review is recomputed from
+# last_reviewed_at + srs_interval, then same-day clusters are spread across
+# each review's fuzz window (srs.spread_offsets). Overdue reviews and today's
+# stay put. Whole users are processed in batches of about `chunk` rows, so
+# memory stays bounded however large solved_problem gets.
+REBALANCE_CHUNK = 50000
+REBALANCE_HORIZON_DAYS = 60 # Days covered by the before/after daily-peak figures
+
+def rebalance_user_ranges(chunk):
+    """(first, last) user ID ranges holding about `chunk` solved rows each."""
+    counts = db.session.query(SolvedProblem.user_id, db.func.count()).group_by(SolvedProblem.user_id).order_by(SolvedProblem.user_id).all()
+    ranges, first, rows = [], None, 0
+    for uid, n in counts:
+        first = uid if first is None else first
+        rows += n
+        if rows >= chunk:
+            ranges.append((first, uid))
+            first, rows = None, 0
+    if first is not None: ranges.append((first, counts[-1][0]))
+    return ranges
+
+def rebalance_range(first, last, today, dry_run=False):
+    """Reschedules one user range; returns (rows, rows changed, {user: peak before}, {user: peak after})."""
+    t = SolvedProblem.__table__ # Core rows: no ORM identity map for millions of rows
+    rows = db.session.execute(db.select(
+        t.c.id, t.c.user_id, t.c.next_review_at, t.c.last_reviewed_at, t.c.srs_interval
+    ).where(t.c.user_id.between(first, last), t.c.next_review_at.is_not(None))).all()
+    if not rows: return 0, 0, {}, {}
+    ids, users, read_due, reviewed, interval = zip(*rows)
+    ids, users = np.array(ids, dtype=np.int64), np.array(users, dtype=np.int64)
+    # pandas converts datetime objects ~10x faster than np.array(..., 'datetime64')
+    due = pd.DatetimeIndex(read_due).to_numpy(dtype='datetime64[us]')
+    reviewed = pd.DatetimeIndex(reviewed).to_numpy(dtype='datetime64[us]')
+    interval = np.nan_to_num(np.array(interval, dtype=float), nan=1.0)
+
+    step = np.maximum(np.rint(interval), 1).astype('timedelta64[D]')
+    backfill = np.isnat(reviewed) # Rows from before last_reviewed_at: infer it from the schedule
+    reviewed = np.where(backfill, due - step, reviewed)
+    ideal = reviewed + step
+    midnight = np.datetime64(today, 'D')
+    day = (ideal.astype('datetime64[D]') - midnight).astype(np.int64)
+    movable = np.flatnonzero(day >= 1)
+    offsets = srs.spread_offsets(users[movable], day[movable], srs.spread_window(interval[movable]), ids[movable])
+    offsets = np.maximum(offsets, 1 - day[movable]) # Never pulled into today
+    new_due = due.copy()
+    new_due[movable] = ideal[movable] + offsets.astype('timedelta64[D]')
+
+    changed = np.flatnonzero((new_due != due) | backfill)
+    if len(changed) and not dry_run:
+        # Only rows still due when read: a review resolved since then keeps its new schedule
+        db.session.execute(t.update().where(
+            t.c.id == db.bindparam('row_id'), t.c.next_review_at == db.bindparam('read_due')
+        ).values(next_review_at=db.bindparam('due'), last_reviewed_at=db.bindparam('reviewed')), [
+            {'row_id': ids[k].item(), 'read_due': read_due[k], 'due': d, 'reviewed': r}
+            for k, d, r in zip(changed.tolist(), new_due[changed].tolist(), reviewed[changed].tolist())
+        ])
+        state = db.session.get(DueQueueState, 1)
+        if state is not None:
+            # Only reviews moved across the queue horizon (or within it) touch the queue
+            horizon = np.datetime64(state.horizon, 'us')
+            moved = changed[(new_due[changed] != due[changed]) & ((due[changed] < horizon) | (new_due[changed] < horizon))]
+            if len(moved): requeue_reviews(ids[moved].tolist())
+        db.session.commit()
+    before = srs.daily_peaks(users, (due.astype('datetime64[D]') - midnight).astype(np.int64), REBALANCE_HORIZON_DAYS)
+    after = srs.daily_peaks(users, (new_due.astype('datetime64[D]') - midnight).astype(np.int64), REBALANCE_HORIZON_DAYS)
+    return len(ids), len(changed), before, after
+
+def rebalance_reviews(chunk=REBALANCE_CHUNK, today=None, dry_run=False):
+    """Runs rebalance_range over every user; returns summary counts."""
+    today = today or datetime.utcnow().date()
+    summary = {'rows': 0, 'changed': 0, 'users': 0, 'peak_before': 0, 'peak_after': 0,
+               'max_before': 0, 'max_after': 0}
+    for first, last in rebalance_user_ranges(chunk):
+        rows, changed, before, after = rebalance_range(first, last, today, dry_run)
+        summary['rows'] += rows
+        summary['changed'] += changed
+        summary['users'] += len(before)
+        summary['peak_before'] += sum(before.values())
+        summary['peak_after'] += sum(after.values())
+        summary['max_before'] = max(summary['max_before'], max(before.values(), default=0))
+        summary['max_after'] = max(summary['max_after'], max(after.values(), default=0))
+        db.session.expunge_all()
+    return summary
+
+# --- NOTE STORAGE ---
+# A save writes its text once per distinct content (NoteBlob, refcounted)
+# and pushes the version it replaces onto the note's history as a reverse
+# delta. Saves within NOTE_REVISION_WINDOW of the newest revision fold into
+# it, so an editing session (Ctrl+S every few seconds) leaves one revision.
+# At most NOTE_REVISIONS_MAX are kept per note.
+app.config['NOTE_MAX_BYTES'] = int(os.environ.get('NOTE_MAX_BYTES', 256 * 1024))
+app.config['NOTE_REVISIONS_MAX'] = int(os.environ.get('NOTE_REVISIONS_MAX', 20))
+app.config['NOTE_REVISION_WINDOW'] = int(os.environ.get('NOTE_REVISION_WINDOW', 600)) # Seconds
+NOTE_SAVE_ATTEMPTS = 3 # A save that loses a race with another save of the same note starts over
+NOTE_MIGRATE_CHUNK = 1000
+
+class NoteConflict(Exception):
+    """Another save changed the note between our read and our write."""
+
+def note_text(user_id, problem_id):
+    """Current text of a note ('' if there is none)."""
+    row = db.session.execute(db.select(Note.content, NoteBlob.data).outerjoin(
+        NoteBlob, NoteBlob.digest == Note.content_hash
+    ).where(Note.user_id == user_id, Note.problem_id == problem_id)).first()
+    if row is None: return ''
+    return note_store.decompress(row.data) if row.data is not None else row.content or ''
+
+def acquire_blob(raw, key, refs=1):
+    """Adds `refs` references to the blob holding `raw`, creating it if needed."""
+    values = {'digest': key, 'data': note_store.compress(raw), 'size': len(raw), 'refs': refs}
+    stmt = upsert_statement(NoteBlob).values(values)
+    if hasattr(stmt, 'on_conflict_do_update'):
+        db.session.execute(stmt.on_conflict_do_update(index_elements=['digest'], set_={'refs': NoteBlob.refs + stmt.excluded.refs}))
+    elif not db.session.execute(db.update(NoteBlob).where(NoteBlob.digest == key).values(refs=NoteBlob.refs + refs),
+                                execution_options={'synchronize_session': False}).rowcount:
+        db.session.execute(db.insert(NoteBlob).values(values))
+
+def release_blob(key):
+    """Drops a reference to a blob, deleting it at zero; returns the blob's text."""
+    stmt = db.update(NoteBlob).where(NoteBlob.digest == key).values(refs=NoteBlob.refs - 1)
+    options = {'synchronize_session': False}
+    if db.engine.dialect.update_returning:
+        row = db.session.execute(stmt.returning(NoteBlob.data, NoteBlob.refs), execution_options=options).first()
+    else:
+        db.session.execute(stmt, execution_options=options)
+        row = db.session.execute(db.select(NoteBlob.data, NoteBlob.refs).where(NoteBlob.digest == key)).first()
+    if row is None: return ''
+    if row.refs <= 0:
+        # refs is re-checked under the row lock, in case another save just took a reference
+        db.session.execute(db.delete(NoteBlob).where(NoteBlob.digest == key, NoteBlob.refs <= 0), execution_options=options)
+    return note_store.decompress(row.data)
+
+def record_revision(note_id, new, old, old_saved_at, now):
+    """Pushes `old` (replaced by `new`) onto the note's history, or folds it into the newest revision."""
+    newest, total = db.session.execute(db.select(NoteRevision, db.func.count().over()).where(
+        NoteRevision.note_id == note_id).order_by(NoteRevision.id.desc()).limit(1)).first() or (None, 0)
+    if newest is not None and newest.created_at > now - timedelta(seconds=app.config['NOTE_REVISION_WINDOW']):
+        # Same editing session: the newest revision keeps the version from before it, now relative to `new`
+        newest.is_full, newest.data = note_store.make_revision(new, note_store.restore(old, newest.is_full, newest.data))
+        return
+    is_full, data = note_store.make_revision(new, old)
+    db.session.execute(db.insert(NoteRevision).values(
+        note_id=note_id, saved_at=old_saved_at, created_at=now, size=len(old.encode('utf-8')), is_full=is_full, data=data))
+    if total < app.config['NOTE_REVISIONS_MAX']: return
+    # Everything older than the newest NOTE_REVISIONS_MAX goes
+    cutoff = db.select(NoteRevision.id).where(NoteRevision.note_id == note_id).order_by(
+        NoteRevision.id.desc()).offset(app.config['NOTE_REVISIONS_MAX']).limit(1).scalar_subquery()
+    db.session.execute(db.delete(NoteRevision).where(NoteRevision.note_id == note_id, NoteRevision.id <= cutoff),
+                       execution_options={'synchronize_session': False})
+
+def store_note(user_id, problem_id, content, now=None):
+    """
+    Saves a note's text and commits; returns False if it was unchanged. The
+    note row is swapped only if its content hash is still the one read, so
+    two racing saves can't both release the old blob: the loser raises
+    NoteConflict (or IntegrityError, for two first saves) and should retry.
+    """
+    raw = content.encode('utf-8')
+    key = note_store.digest(raw)
+    note = db.session.execute(db.select(Note.id, Note.content, Note.content_hash, Note.updated_at).where(
+        Note.user_id == user_id, Note.problem_id == problem_id)).first()
+    if note is not None and note.content_hash == key: return False
+    now = now or datetime.utcnow()
+    if note is None:
+        note_id = db.session.execute(db.insert(Note).values(
+            user_id=user_id, problem_id=problem_id, content_hash=key, size=len(raw), updated_at=now)).inserted_primary_key[0]
+        acquire_blob(raw, key)
+        index_note(note_id, user_id, None, content)
+    else:
+        read_hash = Note.content_hash.is_(None) if note.content_hash is None else Note.content_hash == note.content_hash
+        swapped = db.session.execute(db.update(Note).where(Note.id == note.id, read_hash).values(
+            content=None, content_hash=key, size=len(raw), updated_at=now
+        ), execution_options={'synchronize_session': False}).rowcount
+        if not swapped: raise NoteConflict()
+        acquire_blob(raw, key)
+        old = release_blob(note.content_hash) if note.content_hash else note.content or ''
+        record_revision(note.id, content, old, note.updated_at, now)
+        index_note(note.id, user_id, old, content)
+    db.session.commit()
+    return True
+
+def note_revisions(user_id, problem_id):
+    """A note's revisions as (id, saved_at, size, is_full, data) rows, newest first."""
+    return db.session.execute(db.select(
+        NoteRevision.id, NoteRevision.saved_at, NoteRevision.size, NoteRevision.is_full, NoteRevision.data
+    ).join(Note, Note.id == NoteRevision.note_id).where(
+        Note.user_id == user_id, Note.problem_id == problem_id
+    ).order_by(NoteRevision.id.desc())).all()
+
+def migrate_legacy_notes(chunk=NOTE_MIGRATE_CHUNK, index=True):
+    """
+    Moves plain-text Note.content into blobs, `chunk` notes per transaction,
+    and adds them to the search index unless index=False. Returns how many moved.
+    """
+    moved = 0
+    while True:
+        rows = db.session.execute(db.select(Note.id, Note.user_id, Note.content).where(Note.content_hash.is_(None)).limit(chunk)).all()
+        if not rows: return moved
+        blobs, updates = {}, []
+        for note_id, _, content in rows:
+            raw = (content or '').encode('utf-8')
+            key = note_store.digest(raw)
+            blobs.setdefault(key, [raw, 0])[1] += 1
+            updates.append({'id': note_id, 'content': None, 'content_hash': key, 'size': len(raw)})
+        for key, (raw, refs) in blobs.items():
+            acquire_blob(raw, key, refs)
+        db.session.execute(db.update(Note), updates)
+        if index: index_notes([(note_id, user_id, content or '') for note_id, user_id, content in rows])
+        db.session.commit()
+        moved += len(rows)
+
+# --- NOTE SEARCH ---
+# /api/notes/search ranks a user's notes (see note_search.py). The index is
+# in the database and store_note updates it in the note's own transaction,
+# so every worker sees a save at once. NOTE_SEARCH_BACKEND:
+# - fts5 (SQLite): a contentless FTS5 table, rowid = note id, holding
+#   note_search.fts5_document(): owner-tagged terms, so each user has their
+#   own short postings. Contentless means no second copy of every note.
+#   Entries are removed by passing back the indexed document, which
+#   store_note rebuilds from the old text it has at hand.
+# - postgres: note_fts(note_id, user_id, body tsvector) with a GIN index,
+#   written as note_search.tsvector() literals so Postgres indexes the same
+#   terms as the other backends.
+# - table (any other database): note_term postings, ranked in Python.
+NOTE_SEARCH_MAX_RESULTS = 50
+
+def detect_note_search_backend():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql': return 'postgres'
+    if dialect == 'sqlite':
+        with db.engine.connect() as conn:
+            if conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar(): return 'fts5'
+    return 'table'
+
+with app.app_context():
+    app.config['NOTE_SEARCH_BACKEND'] = os.environ.get('NOTE_SEARCH_BACKEND') or detect_note_search_backend()
+
+def create_note_search_index():
+    backend = app.config['NOTE_SEARCH_BACKEND']
+    if backend == 'fts5':
+        db.session.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(body, content='', tokenize='ascii')"))
+    elif backend == 'postgres':
+        db.session.execute(text("CREATE TABLE IF NOT EXISTS note_fts (note_id INTEGER PRIMARY KEY REFERENCES note (id), "
+                                "user_id INTEGER NOT NULL, body TSVECTOR NOT NULL)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_note_fts_body ON note_fts USING GIN (body)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_note_fts_user ON note_fts (user_id)"))
+    db.session.commit()
+
+def note_index_built():
+    table = 'note_term' if app.config['NOTE_SEARCH_BACKEND'] == 'table' else 'note_fts'
+    return db.session.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first() is not None
+
+def index_notes(rows):
+    """Adds notes that aren't in the search index yet, as (note_id, user_id, text) rows. Caller commits."""
+    if not rows: return
+    backend = app.config['NOTE_SEARCH_BACKEND']
+    if backend == 'fts5':
+        db.session.execute(text("INSERT INTO note_fts (rowid, body) VALUES (:id, :body)"),
+                           [{'id': i, 'body': note_search.fts5_document(u, t)} for i, u, t in rows])
+    elif backend == 'postgres':
+        db.session.execute(text("INSERT INTO note_fts (note_id, user_id, body) VALUES (:id, :user_id, CAST(:body AS tsvector)) "
+                                "ON CONFLICT (note_id) DO UPDATE SET body = excluded.body"),
+                           [{'id': i, 'user_id': u, 'body': note_search.tsvector(t)} for i, u, t in rows])
+    else:
+        postings = [{'note_id': i, 'user_id': u, 'term': term, 'occurrences': n}
+                    for i, u, t in rows for term, n in note_search.term_counts(t).items()]
+        if postings: db.session.execute(NoteTerm.__table__.insert(), postings)  # Core executemany: no ORM bookkeeping per row
+
+def index_note(note_id, user_id, old, new):
+    """Moves a note's index entry from text `old` (None: not indexed yet) to `new`. Caller commits."""
+    backend = app.config['NOTE_SEARCH_BACKEND']
+    if backend == 'fts5' and old is not None:
+        db.session.execute(text("INSERT INTO note_fts (note_fts, rowid, body) VALUES ('delete', :id, :body)"),
+                           {'id': note_id, 'body': note_search.fts5_document(user_id, old)})
+    elif backend == 'table':
+        # Only postings that changed are rewritten
+        before, after = note_search.term_counts(old or ''), note_search.term_counts(new)
+        changed = {term: n for term, n in after.items() if before.get(term) != n}
+        stale = [term for term in before if term not in after] + [term for term in changed if term in before]
+        if stale:
+            db.session.execute(db.delete(NoteTerm).where(NoteTerm.note_id == note_id, NoteTerm.term.in_(stale)),
+                               execution_options={'synchronize_session': False})
+        if changed:
+            db.session.execute(NoteTerm.__table__.insert(), [{'note_id': note_id, 'user_id': user_id, 'term': term, 'occurrences': n}
+                                                     for term, n in changed.items()])
+        return
+    index_notes([(note_id, user_id, new)])
+
+def reindex_notes(chunk=NOTE_MIGRATE_CHUNK):
+    """Rebuilds the search index from the stored notes. Returns how many notes were indexed."""
+    backend = app.config['NOTE_SEARCH_BACKEND']
+    if backend == 'fts5': db.session.execute(text("INSERT INTO note_fts (note_fts) VALUES ('delete-all')"))
+    elif backend == 'postgres': db.session.execute(text("DELETE FROM note_fts"))
+    else: NoteTerm.query.delete(synchronize_session=False)
+    indexed, last = 0, 0
+    while True:
+        rows = db.session.execute(db.select(Note.id, Note.user_id, Note.content, NoteBlob.data).outerjoin(
+            NoteBlob, NoteBlob.digest == Note.content_hash
+        ).where(Note.id > last).order_by(Note.id).limit(chunk)).all()
+        if not rows: break
+        index_notes([(r.id, r.user_id, note_store.decompress(r.data) if r.data is not None else r.content or '') for r in rows])
+        db.session.commit()
+        indexed, last = indexed + len(rows), rows[-1].id
+    db.session.commit()
+    return indexed
+
+def rank_notes(user_id, terms, limit):
+    """The user's best `limit` notes matching every term (the last by prefix): ([(note_id, score)], total)."""
+    backend = app.config['NOTE_SEARCH_BACKEND']
+    if backend == 'fts5':
+        # bm25() can't sit next to a window function, hence the subquery; lower bm25 is better
+        rows = db.session.execute(text(
+            "SELECT rowid, score, count(*) OVER () FROM (SELECT rowid, bm25(note_fts) AS score "
+            "FROM note_fts WHERE note_fts MATCH :q) ORDER BY score LIMIT :limit"
+        ), {'q': note_search.fts5_query(user_id, terms), 'limit': limit}).all()
+        return [(r[0], -r[1]) for r in rows], rows[0][2] if rows else 0
+    if backend == 'postgres':
+        rows = db.session.execute(text(
+            "SELECT note_id, ts_rank_cd(body, q) AS score, count(*) OVER () FROM note_fts, CAST(:q AS tsquery) AS q "
+            "WHERE user_id = :user_id AND body @@ q ORDER BY score DESC LIMIT :limit"
+        ), {'q': note_search.tsquery(terms), 'user_id': user_id, 'limit': limit}).all()
+        return [(r[0], r[1]) for r in rows], rows[0][2] if rows else 0
+    exact, prefix = set(terms[:-1]), terms[-1]
+    postings = {term: {} for term in terms}
+    for term, note_id, n in db.session.execute(db.select(NoteTerm.term, NoteTerm.note_id, NoteTerm.occurrences).where(
+            NoteTerm.user_id == user_id, db.or_(NoteTerm.term.in_(exact), NoteTerm.term.startswith(prefix, autoescape=True)))):
+        if term in exact: postings[term][note_id] = n
+        if term.startswith(prefix): postings[prefix][note_id] = postings[prefix].get(note_id, 0) + n
+    if not all(postings.values()): return [], 0
+    sizes = dict(db.session.execute(db.select(Note.id, Note.size).where(Note.user_id == user_id)).all())
+    scores = note_search.bm25(postings, sizes, sum(s or 0 for s in sizes.values()))
+    return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:limit], len(scores)
+
+with app.app_context():
+    try:
+        create_note_search_index()
+        built = note_index_built()
+        if db.session.execute(db.select(Note.id).where(Note.content_hash.is_(None)).limit(1)).first():
+            print(f"⚠️ Migrating Database: moved {migrate_legacy_notes(index=built)} notes into compressed storage.")
+        if not built and db.session.execute(db.select(Note.id).limit(1)).first():
+            print(f"⚠️ Building the notes search index ({app.config['NOTE_SEARCH_BACKEND']}): {reindex_notes()} notes indexed.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Note storage/search setup failed: {e}")
+    db.engine.dispose()
 
 # --- AUTH ROUTES ---
 
+def upgrade_password_hash(user, password):
+    """Re-hashes at the configured cost after a successful login; skipped (retried next login) if busy."""
+    user_id = user.id
+    try:
+        user.password = hasher.hash(password)
+    except HasherBusy:
+        return
+    db.session.commit()
+    USER_CACHE.pop(user_id)
+
+@app.errorhandler(HasherBusy)
+def hasher_busy(e):
+    flash('Too many sign-ins right now, please try again in a moment.', 'error')
+    return render_template(f'{request.endpoint}.html'), 503, {'Retry-After': '2'}
+
 @app.route('/login', methods=['GET', 'POST'])
 @limiter.limit("5 per minute")
 def login():
@@ -384,7 +1534,9 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
         user = User.query.filter_by(username=username).first()
-        if user and bcrypt.check_password_hash(user.password, password):
+        if user and hasher.check(user.password, password):
+            if hasher.needs_rehash(user.password):
+                upgrade_password_hash(user, password)
             session.clear() 
             login_user(user, remember=False)
             return redirect(request.args.get('next') or url_for('index'))
@@ -408,7 +1560,7 @@ def signup():
         if User.query.filter_by(username=username).first():
             flash('Username taken.', 'error')
         else:
-            hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
+            hashed_pw = hasher.hash(password)
             user = User(username=username, password=hashed_pw)
             db.session.add(user)
             db.session.commit()
@@ -429,69 +1581,45 @@ def logout():
 @app.route('/')
 @login_required
 def index():
-    if DATA.empty: return "Data Error: Run helper.py", 500
-    
-    solved_entries = SolvedProblem.query.filter_by(user_id=current_user.id).order_by(SolvedProblem.solved_at.asc()).all()
-    solved_ids = {s.problem_id for s in solved_entries}
+    catalog = get_catalog()
+    if catalog.data.empty: return "Data Error: Run helper.py", 500
     
-    # Heatmap & Streak Calculation
-    activity_map = {}
-    distinct_dates = set()
-    for s in solved_entries:
-        d_str = s.solved_at.strftime('%Y-%m-%d')
-        activity_map[d_str] = activity_map.get(d_str, 0) + 1
-        distinct_dates.add(s.solved_at.date())
-        
-    sorted_dates = sorted(list(distinct_dates))
-    current_streak = 0
-    longest_streak = 0
-    if sorted_dates:
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
-        if sorted_dates[-1] == today or sorted_dates[-1] == yesterday:
-            current_streak = 1
-            for i in range(len(sorted_dates)-1, 0, -1):
-                if (sorted_dates[i] - sorted_dates[i-1]).days == 1: current_streak += 1
-                else: break
-        
-        # Longest Streak logic
-        temp_streak = 1
-        for i in range(1, len(sorted_dates)):
-            if (sorted_dates[i] - sorted_dates[i-1]).days == 1: temp_streak += 1
-            else:
-                longest_streak = max(longest_streak, temp_streak)
-                temp_streak = 1
-        longest_streak = max(longest_streak, temp_streak)
-
-    # Pre-calculate topic maps for Radar
-    topic_problems_map = {slug: [p['ID'] for p in get_curated_problems_for_topic(slug)] for slug in SLUG_TO_NAME_MAP.keys()}
+    stats = get_user_stats(current_user.id)
+
+    # Heatmap: only the window the dashboard grid shows
+    today = datetime.utcnow().date()
+    recent_days = db.session.execute(db.select(UserDailyActivity.day, UserDailyActivity.solved_count).where(
+        UserDailyActivity.user_id == current_user.id,
+        UserDailyActivity.day >= today - timedelta(days=HEATMAP_DAYS)
+    ).order_by(UserDailyActivity.day)).all()
+    activity_map = activity.from_daily([d for d, _ in recent_days], [n for _, n in recent_days]).heatmap(HEATMAP_DAYS, today)
+
+    # Pre-calculate topic maps for Radar (catalog-level, shared by all users)
+    topic_problems_map = catalog.roadmaps.topic_ids()
+    topic_solved = {tp.topic_slug: tp.solved_count for tp in UserTopicProgress.query.filter_by(user_id=current_user.id).all()}
     
     # Radar Data Generation
     radar_labels = []
     radar_data = []
     for group_name, slug_list in RADAR_GROUPS.items():
-        total_in_group = 0
-        solved_in_group = 0
-        for slug in slug_list:
-            if slug in topic_problems_map:
-                p_ids = topic_problems_map[slug]
-                total_in_group += len(p_ids)
-                solved_in_group += sum(1 for pid in p_ids if pid in solved_ids)
+        total_in_group = sum(len(topic_problems_map.get(slug, [])) for slug in slug_list)
+        solved_in_group = sum(topic_solved.get(slug, 0) for slug in slug_list)
         pct = (solved_in_group / total_in_group * 100) if total_in_group > 0 else 0
         radar_labels.append(group_name)
         radar_data.append(round(pct, 1))
 
-    active_missions = get_srs_missions(current_user.id)
+    active_missions, reviews_due_today = get_srs_missions(current_user.id)
 
     return render_template('index.html', 
                          topic_problems_map=json.dumps(topic_problems_map),
                          activity_map=json.dumps(activity_map),
-                         current_streak=current_streak,
-                         longest_streak=longest_streak,
-                         total_solved=len(solved_entries),
+                         current_streak=current_streak_for(stats),
+                         longest_streak=stats.longest_streak,
+                         total_solved=stats.total_solved,
                          radar_labels=json.dumps(radar_labels),
                          radar_data=json.dumps(radar_data),
-                         active_missions=active_missions)
+                         active_missions=active_missions,
+                         reviews_due_today=reviews_due_today)
 
 @app.route('/topic/<topic_slug>')
 @login_required
@@ -499,78 +1627,455 @@ def topic_page(topic_slug):
     problems = get_curated_problems_for_topic(topic_slug)
     return render_template('topic.html', topic_name=SLUG_TO_NAME_MAP.get(topic_slug, "Topic"), problems=problems, topic_slug=topic_slug)
 
+MAX_BATCH_OPS = 500
+
+# Each user's {problem_id: solved_at}, cached per worker under the progress
+# version it was read at. Any change (through any worker) bumps the version, so
+# a hit is only used while it still matches UserStats.progress_version.
+SOLVED_CACHE = TTLCache(maxsize=2048, ttl=float(os.environ.get('SOLVED_CACHE_TTL', 60)))
+
+def get_solved_map(user_id, version):
+    """Committed solved map at `version`; memoized for the request, then SOLVED_CACHE, then one query."""
+    memo = g.setdefault('solved_maps', {})
+    solved = memo.get((user_id, version))
+    if solved is not None: return solved
+    cached = SOLVED_CACHE.get(user_id)
+    if cached is not None and cached[0] == version:
+        solved = cached[1]
+    else:
+        solved = dict(SolvedProblem.query.with_entities(SolvedProblem.problem_id, SolvedProblem.solved_at).filter_by(user_id=user_id).all())
+        SOLVED_CACHE.set(user_id, (version, solved))
+    memo[(user_id, version)] = solved
+    return solved
+
+def invalidate_solved(user_id):
+    SOLVED_CACHE.pop(user_id)
+    RECOMMEND_CACHE.pop(user_id)
+    g.pop('solved_maps', None)
+
+# Each user's ranked "next up" list (top RECOMMEND_MAX), keyed like SOLVED_CACHE
+# by progress version, plus the catalog version it was scored against.
+RECOMMEND_CACHE = TTLCache(maxsize=2048, ttl=float(os.environ.get('RECOMMEND_CACHE_TTL', 600)))
+RECOMMEND_MAX = 50
+
+def get_recommendations(user_id, version, limit):
+    catalog = get_catalog()
+    key = (catalog.version, version)
+    cached = RECOMMEND_CACHE.get(user_id)
+    if cached is None or cached[0] != key:
+        solved = get_solved_map(user_id, version)
+        latest = sorted(solved, key=solved.get, reverse=True)[:RECENT_SEEDS]
+        solved_pos, recent_pos = catalog.index.positions(list(solved)), catalog.index.positions(latest)
+        recs = catalog.recommender.recommend(solved_pos[solved_pos >= 0], recent_pos[recent_pos >= 0], RECOMMEND_MAX)
+        cached = (key, recs)
+        RECOMMEND_CACHE.set(user_id, cached)
+    return cached[1][:limit]
+
+def solved_state(user_id, version):
+    """The {problem_id: {'solved_at': ...}} map served by /api/progress."""
+    return {str(pid): {'solved_at': solved_at.isoformat()} for pid, solved_at in get_solved_map(user_id, version).items()}
+
 @app.route('/api/progress', methods=['GET'])
 @login_required
 def get_progress():
-    solved = SolvedProblem.query.filter_by(user_id=current_user.id).all()
-    return jsonify({str(p.problem_id): {'solved_at': p.solved_at.isoformat()} for p in solved})
+    """
+    Full solved map, revalidated with ETag/Last-Modified (304 when unchanged).
+    With ?since=<version>, returns only changes after that version
+    ({problem_id: {'solved_at': ...} | null}), or the full state with
+    full=true if that version has been trimmed from the change log.
+    """
+    stats = get_user_stats(current_user.id)
+    version = stats.progress_version
+    etag = f"p{current_user.id}-{version}"
+    if not is_resource_modified(request.environ, etag=etag, last_modified=stats.progress_updated_at):
+        response = app.response_class(status=304)
+    else:
+        since = request.args.get('since', type=int)
+        if since is None:
+            response = jsonify(solved_state(current_user.id, version))
+        elif stats.progress_floor <= since <= version:
+            changes = {}
+            for c in ProgressChange.query.filter(
+                ProgressChange.user_id == current_user.id, ProgressChange.version > since
+            ).order_by(ProgressChange.version.asc(), ProgressChange.id.asc()).all():
+                changes[str(c.problem_id)] = {'solved_at': c.solved_at.isoformat()} if c.solved_at else None
+            response = jsonify({'version': version, 'full': False, 'changes': changes})
+        else:
+            response = jsonify({'version': version, 'full': True, 'progress': solved_state(current_user.id, version)})
+    response.set_etag(etag)
+    if stats.progress_updated_at:
+        response.last_modified = stats.progress_updated_at
+    response.headers['X-Progress-Version'] = str(version)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/api/progress/toggle', methods=['POST'])
 @login_required
 def toggle_progress():
     data = request.get_json()
-    pid = data.get('problem_id')
-    entry = SolvedProblem.query.filter_by(user_id=current_user.id, problem_id=int(pid)).first()
+    pid = int(data.get('problem_id'))
+    user_id = current_user.id # Read once: the user row expires on commit
+    stats = get_user_stats(user_id)
+    solved = get_solved_map(user_id, stats.progress_version)
     
-    if data.get('solved') and not entry:
+    if data.get('solved') and pid not in solved:
         # First solve: Set review for tomorrow
-        next_rev = datetime.utcnow() + timedelta(days=1)
+        now = datetime.utcnow()
+        apply_progress_delta(user_id, pid, now, +1)
         db.session.add(SolvedProblem(
-            user_id=current_user.id, 
-            problem_id=int(pid),
-            next_review_at=next_rev,
+            user_id=user_id, 
+            problem_id=pid,
+            solved_at=now,
+            last_reviewed_at=now,
+            next_review_at=now + timedelta(days=1),
             srs_interval=1.0
         ))
-    elif not data.get('solved') and entry:
-        db.session.delete(entry)
+    elif not data.get('solved') and pid in solved:
+        # Only a row this request deleted counts: another tab may have unsolved it already
+        for solved_at in delete_solved_rows(user_id, [pid], datetime.utcnow()).values():
+            apply_progress_delta(user_id, pid, solved_at, -1)
+    else:
+        return jsonify({'status': 'success'}) # Already in the requested state
     db.session.commit()
+    invalidate_solved(user_id)
     return jsonify({'status': 'success'})
 
+@app.route('/api/progress/batch', methods=['POST'])
+@login_required
+def batch_progress():
+    """
+    Applies a list of {problem_id, solved} operations in one transaction and
+    returns the merged solved state. Later ops for the same problem win.
+    """
+    data = request.get_json(silent=True) or {}
+    ops = data.get('ops')
+    if not isinstance(ops, list) or len(ops) > MAX_BATCH_OPS:
+        return jsonify({'status': 'error', 'message': f'ops must be a list of at most {MAX_BATCH_OPS} items'}), 400
+    try:
+        wanted = {int(op['problem_id']): bool(op.get('solved')) for op in ops}
+    except (AttributeError, TypeError, KeyError, ValueError):
+        return jsonify({'status': 'error', 'message': 'each op needs an integer problem_id'}), 400
+
+    user_id = current_user.id # Read once: the user row expires on commit
+    stats = get_user_stats(user_id) # Backfill aggregates (if needed) before rows change
+    existing = get_solved_map(user_id, stats.progress_version)
+    to_add = [pid for pid, solved in wanted.items() if solved and pid not in existing]
+    to_remove = [pid for pid, solved in wanted.items() if not solved and pid in existing]
+
+    now = datetime.utcnow()
+    added = []
+    if to_add:
+        rows = [{'user_id': user_id, 'problem_id': pid, 'solved_at': now, 'last_reviewed_at': now,
+                 'next_review_at': now + timedelta(days=1), 'srs_interval': 1.0,
+                 'srs_ease': srs.DEFAULT_EASE, 'srs_reps': 1} for pid in to_add]
+        stmt = upsert_statement(SolvedProblem)
+        if hasattr(stmt, 'on_conflict_do_nothing'):
+            # Another tab may have inserted the same row since the map was read; only
+            # rows actually inserted count towards the aggregates.
+            stmt = stmt.on_conflict_do_nothing(index_elements=['user_id', 'problem_id']).returning(SolvedProblem.problem_id)
+            added = db.session.execute(stmt, rows).scalars().all()
+        else:
+            db.session.execute(stmt, rows)
+            added = to_add
+    removed = delete_solved_rows(user_id, to_remove, now) if to_remove else {}
+
+    changes = [(pid, now, +1) for pid in added] + [(pid, solved_at, -1) for pid, solved_at in removed.items()]
+    apply_progress_deltas(user_id, changes)
+    version = stats.progress_version
+    db.session.commit()
+    if changes: invalidate_solved(user_id)
+
+    return jsonify({'status': 'success', 'added': len(added), 'removed': len(removed),
+                    'progress': solved_state(user_id, version)})
+
 @app.route('/api/srs/resolve', methods=['POST'])
 @login_required
 def resolve_srs_mission():
     data = request.get_json()
     pid = data.get('problem_id')
+    try:
+        grade = srs.parse_grade(data.get('grade')) # Optional: again/hard/good/easy or 0-5
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     entry = SolvedProblem.query.filter_by(user_id=current_user.id, problem_id=int(pid)).first()
     
     if entry:
-        # SRS Algorithm: x2.5 interval growth
-        current_interval = float(entry.srs_interval or 1.0)
-        new_interval = current_interval * 2.5
+        # SM-2 step (see srs.py): interval grows by the ease, which the grade adjusts
+        interval, ease, reps = srs.review(entry.srs_interval or 1.0, entry.srs_ease or srs.DEFAULT_EASE,
+                                          1 if entry.srs_reps is None else entry.srs_reps, grade)
         
-        # Add slight fuzz to prevent bunching
-        fuzz = random.uniform(0.9, 1.1)
-        actual_interval = math.ceil(new_interval * fuzz)
+        # Add slight fuzz to prevent bunching (the nightly rebalance evens it out properly)
+        window = int(srs.spread_window(interval))
+        actual_interval = max(1, round(float(interval)) + random.randint(-window, window))
         
-        entry.srs_interval = new_interval
-        entry.next_review_at = datetime.utcnow() + timedelta(days=actual_interval)
+        now = datetime.utcnow()
+        if entry.next_review_at is None or entry.next_review_at < next_midnight(now):
+            DueReview.query.filter_by(solved_id=entry.id).delete(synchronize_session=False) # Now due past the horizon
+        entry.srs_interval, entry.srs_ease, entry.srs_reps = float(interval), float(ease), int(reps)
+        entry.last_reviewed_at = now
+        entry.next_review_at = now + timedelta(days=actual_interval)
         
         db.session.commit()
-        return jsonify({'status': 'success', 'new_interval': actual_interval})
+        return jsonify({'status': 'success', 'new_interval': actual_interval, 'ease': round(float(ease), 2)})
     return jsonify({'status': 'error'}), 404
 
+@app.route('/api/srs/due', methods=['GET'])
+@login_required
+def get_due_queue():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    now = datetime.utcnow()
+    queue = []
+    reviews, due_today = get_due_reviews(current_user.id, limit, now=now)
+    for t, p in reviews:
+        queue.append({
+            'problem_id': t.problem_id,
+            'title': p.title,
+            'link': p.link,
+            'difficulty': p.difficulty,
+            'topic': p.assigned_topic,
+            'next_review_at': t.due_at.isoformat() if t.due_at else None,
+            'overdue_days': (now - t.due_at).days if t.due_at else None,
+        })
+    return jsonify(queue), 200, {'X-Reviews-Due-Today': str(due_today)}
+
+@app.route('/api/problems/<int:problem_id>/similar', methods=['GET'])
+@login_required
+def get_similar_problems(problem_id):
+    """
+    Neighbours of a problem from the catalog's precomputed graph.
+    ?kind=similar (LeetCode's similar questions, ?hops=1-3), topic (shared
+    tags) or all; filters: ?difficulty=Easy,Medium ?topic=<roadmap slug>,...
+    ?unsolved=1; ?limit=1-100 (default 10).
+    """
+    catalog = get_catalog()
+    pos = int(catalog.index.positions([problem_id])[0])
+    if pos < 0:
+        return jsonify({'status': 'error', 'message': 'unknown problem'}), 404
+    kind = request.args.get('kind', 'similar')
+    if kind not in NEIGHBOUR_KINDS:
+        return jsonify({'status': 'error', 'message': f"kind must be one of {', '.join(NEIGHBOUR_KINDS)}"}), 400
+    hops = min(max(request.args.get('hops', 1, type=int), 1), MAX_HOPS)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    difficulties = [d for d in request.args.get('difficulty', '').split(',') if d]
+    topics = [t for t in request.args.get('topic', '').split(',') if t]
+    solved = None
+    if request.args.get('unsolved') in ('1', 'true'):
+        user_id = current_user.id
+        solved = get_solved_map(user_id, get_user_stats(user_id).progress_version)
+
+    positions, distances, shared = catalog.graph.neighbours(
+        pos, kind, hops, difficulties=difficulties, topics=topics, exclude_ids=solved, limit=limit)
+    results = []
+    for p, d, n in zip(catalog.index.get_many(catalog.graph.ids[positions].tolist()), distances.tolist(), shared.tolist()):
+        item = {'id': p.id, 'title': p.title, 'difficulty': p.difficulty, 'link': p.link, 'topic': p.assigned_topic}
+        if d:
+            item.update(via='similar', hops=d)
+        else:
+            item.update(via='topic', shared_topics=n)
+        results.append(item)
+    return jsonify({'id': problem_id, 'kind': kind, 'hops': hops, 'results': results})
+
+@app.route('/api/recommendations', methods=['GET'])
+@login_required
+def get_next_up():
+    """
+    Personalized "next up" list (?limit=1-50, default 10): unsolved problems
+    ranked by signal score, radar-group weakness and similarity to recent
+    solves, each with the reason that weighed most.
+    """
+    limit = min(max(request.args.get('limit', 10, type=int), 1), RECOMMEND_MAX)
+    user_id = current_user.id
+    return jsonify(get_recommendations(user_id, get_user_stats(user_id).progress_version, limit))
+
+@app.route('/api/search', methods=['GET'])
+@login_required
+def search_problems():
+    """
+    Catalog search. ?q= words match title words, tags or IDs by prefix (all
+    must match); filters: ?difficulty=Easy,Medium ?topic=<roadmap slug>,...
+    ?solved=true|false; paging: ?limit=1-100 (default 20) ?offset=.
+    Returns one page, the total and facet counts over all matches.
+    """
+    catalog = get_catalog()
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    difficulties = [d for d in request.args.get('difficulty', '').split(',') if d]
+    topics = [t for t in request.args.get('topic', '').split(',') if t]
+    solved = {'true': True, '1': True, 'false': False, '0': False}.get(request.args.get('solved', ''))
+
+    user_id = current_user.id
+    solved_map = get_solved_map(user_id, get_user_stats(user_id).progress_version)
+    solved_positions = catalog.index.positions(list(solved_map))
+    page, total, facets = catalog.search.search(
+        query, difficulties, topics, solved, solved_positions[solved_positions >= 0], limit, offset)
+
+    results = [{'id': p.id, 'title': p.title, 'difficulty': p.difficulty, 'link': p.link,
+                'topic': p.assigned_topic, 'solved': p.id in solved_map}
+               for p in catalog.index.get_many(catalog.data['ID'].to_numpy()[page].tolist())]
+    return jsonify({'query': query, 'total': total, 'offset': offset, 'results': results, 'facets': facets})
+
 # --- NOTE ROUTES ---
 
 @app.route('/api/notes/<int:problem_id>', methods=['GET'])
 @login_required
 def get_note(problem_id):
-    note = Note.query.filter_by(user_id=current_user.id, problem_id=problem_id).first()
-    return jsonify({'content': note.content if note else ''})
+    return jsonify({'content': note_text(current_user.id, problem_id)})
 
 @app.route('/api/notes/save', methods=['POST'])
 @login_required
 def save_note():
-    data = request.get_json()
-    problem_id = data.get('problem_id')
-    content = data.get('content')
-    note = Note.query.filter_by(user_id=current_user.id, problem_id=problem_id).first()
-    if note:
-        note.content = content
-    else:
-        new_note = Note(user_id=current_user.id, problem_id=problem_id, content=content)
-        db.session.add(new_note)
+    data = request.get_json(silent=True) or {}
+    content = data.get('content') or ''
+    try:
+        problem_id = int(data.get('problem_id'))
+    except (TypeError, ValueError):
+        return jsonify({'status': 'error', 'message': 'problem_id must be an integer'}), 400
+    if not isinstance(content, str):
+        return jsonify({'status': 'error', 'message': 'content must be a string'}), 400
+    if len(content.encode('utf-8')) > app.config['NOTE_MAX_BYTES']:
+        return jsonify({'status': 'error', 'message': f"notes are limited to {app.config['NOTE_MAX_BYTES'] // 1024} KiB"}), 413
+    user_id = current_user.id # Read once: the user row expires on commit
+    for _ in range(NOTE_SAVE_ATTEMPTS):
+        try:
+            changed = store_note(user_id, problem_id, content)
+            return jsonify({'status': 'success', 'changed': changed})
+        except (NoteConflict, IntegrityError):
+            db.session.rollback()
+    return jsonify({'status': 'error', 'message': 'the note was saved elsewhere at the same time, try again'}), 409
+
+@app.route('/api/notes/search', methods=['GET'])
+@login_required
+def search_notes():
+    """
+    Full-text search over the user's notes. ?q= words must all match (the
+    last by prefix); ?limit=1-50 (default 10). Results are ranked, with an
+    HTML-escaped snippet whose matches are wrapped in <mark>.
+    """
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), NOTE_SEARCH_MAX_RESULTS)
+    terms = note_search.parse_query(query)
+    if not terms: return jsonify({'query': query, 'total': 0, 'results': []})
+    user_id = current_user.id
+    ranked, total = rank_notes(user_id, terms, limit)
+    notes = {r.id: r for r in db.session.execute(db.select(
+        Note.id, Note.problem_id, Note.updated_at, Note.content, NoteBlob.data
+    ).outerjoin(NoteBlob, NoteBlob.digest == Note.content_hash).where(
+        Note.user_id == user_id, Note.id.in_([note_id for note_id, _ in ranked])))}
+    found = [(notes[note_id], score) for note_id, score in ranked if note_id in notes]
+    problems = get_catalog().index.get_many([n.problem_id for n, _ in found])
+    results = []
+    for (n, score), p in zip(found, problems):
+        body = note_store.decompress(n.data) if n.data is not None else n.content or ''
+        results.append({'problem_id': n.problem_id, 'title': p.title if p else None, 'score': float(score),
+                        'updated_at': n.updated_at.isoformat(), 'snippet': note_search.snippet(body, terms)})
+    return jsonify({'query': query, 'total': total, 'results': results})
+
+@app.route('/api/notes/<int:problem_id>/revisions', methods=['GET'])
+@login_required
+def get_note_revisions(problem_id):
+    revisions = note_revisions(current_user.id, problem_id)
+    return jsonify([{'id': r.id, 'saved_at': r.saved_at.isoformat(), 'size': r.size} for r in revisions])
+
+@app.route('/api/notes/<int:problem_id>/revisions/<int:revision_id>', methods=['GET'])
+@login_required
+def get_note_revision(problem_id, revision_id):
+    """One earlier version: the current text with each newer revision undone in turn."""
+    revisions = note_revisions(current_user.id, problem_id)
+    if not any(r.id == revision_id for r in revisions): abort(404)
+    content = note_text(current_user.id, problem_id)
+    for r in revisions:
+        content = note_store.restore(content, r.is_full, r.data)
+        if r.id == revision_id:
+            return jsonify({'id': r.id, 'saved_at': r.saved_at.isoformat(), 'content': content})
+
+# --- METRICS ROUTES ---
+def check_metrics_access():
+    token = app.config['METRICS_TOKEN']
+    if not app.config['METRICS_ENABLED']: abort(404)
+    if token and request.headers.get('Authorization') != f'Bearer {token}': abort(401)
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def get_metrics():
+    check_metrics_access()
+    return METRICS.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/metrics/profile', methods=['GET'])
+@limiter.exempt
+def get_profile():
+    """Folded stacks from sampled requests (flamegraph.pl / speedscope); ?reset=1 starts over."""
+    check_metrics_access()
+    stacks = PROFILER.folded()
+    if request.args.get('reset') == '1': PROFILER.reset()
+    return stacks, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+# --- CLI COMMANDS ---
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute every user's progress aggregates from their solve history."""
+    user_ids = [uid for (uid,) in db.session.query(User.id).all()]
+    for uid in user_ids:
+        rebuild_user_stats(uid)
     db.session.commit()
-    return jsonify({'status': 'success'})
+    print(f"✅ Rebuilt progress aggregates for {len(user_ids)} users.")
+
+@app.cli.command('srs-rebalance')
+@click.option('--chunk', default=REBALANCE_CHUNK, show_default=True, help='Solved rows per batch (whole users per batch).')
+@click.option('--dry-run', is_flag=True, help='Report the effect without writing anything.')
+def srs_rebalance_command(chunk, dry_run):
+    """Recompute future reviews and spread same-day clusters (run nightly)."""
+    start = time.perf_counter()
+    summary = rebalance_reviews(chunk, dry_run=dry_run)
+    users = max(summary['users'], 1)
+    print(f"{'🔎 Would reschedule' if dry_run else '✅ Rescheduled'} {summary['changed']} of {summary['rows']} reviews "
+          f"in {time.perf_counter() - start:.1f}s.")
+    print(f"   Busiest day in the next {REBALANCE_HORIZON_DAYS} days, mean per user: "
+          f"{summary['peak_before'] / users:.1f} -> {summary['peak_after'] / users:.1f} "
+          f"(worst user {summary['max_before']} -> {summary['max_after']}).")
+
+@app.cli.command('rollover-due-queue')
+def rollover_due_queue_command():
+    """Queue the reviews due in the new day (workers also do this on the first request after midnight)."""
+    count = rollover_due_queue()
+    print(f"✅ Queued {count} reviews; horizon {db.session.get(DueQueueState, 1).horizon}.")
+
+@app.cli.command('backfill-due-queue')
+def backfill_due_queue_command():
+    """Rebuild the due-review queue from solved_problem."""
+    print(f"✅ Queued {backfill_due_queue()} due reviews.")
+
+@app.cli.command('check-due-queue')
+@click.option('--fix', is_flag=True, help='Rebuild the queue if it is out of sync.')
+def check_due_queue_command(fix):
+    """Compare the due-review queue with solved_problem."""
+    result = check_due_queue()
+    if result is None: raise click.ClickException("The due-review queue has not been built: run `flask backfill-due-queue`.")
+    missing, extra, stale = result
+    if not (missing or extra or stale):
+        print("✅ Due-review queue is in sync.")
+        return
+    print(f"⚠️ Due-review queue out of sync: {len(missing)} missing, {len(extra)} extra, {len(stale)} stale "
+          f"(e.g. solved IDs {(missing + extra + stale)[:10]}).")
+    if not fix: raise click.ClickException("Run with --fix to rebuild it.")
+    print(f"✅ Rebuilt: queued {backfill_due_queue()} due reviews.")
+
+@app.cli.command('reindex-notes')
+def reindex_notes_command():
+    """Rebuild the notes full-text search index from the stored notes."""
+    create_note_search_index()
+    print(f"✅ Indexed {reindex_notes()} notes ({app.config['NOTE_SEARCH_BACKEND']}).")
+
+@app.cli.command('repair-note-blobs')
+def repair_note_blobs_command():
+    """Recount note blob references from the notes and drop unreferenced blobs."""
+    refs = db.select(db.func.count(Note.id)).where(Note.content_hash == NoteBlob.digest).scalar_subquery()
+    db.session.execute(db.update(NoteBlob).values(refs=refs), execution_options={'synchronize_session': False})
+    dropped = db.session.execute(db.delete(NoteBlob).where(NoteBlob.refs <= 0), execution_options={'synchronize_session': False}).rowcount
+    db.session.commit()
+    print(f"✅ Recounted note blob references; dropped {dropped} unreferenced blobs.")
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
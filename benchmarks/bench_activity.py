@@ -0,0 +1,101 @@
+"""
+Activity analytics benchmark: legacy per-row heatmap/streak loop vs activity.summarize.
+
+Synthetic history: a user solving ~50k problems over 10 years, with gaps.
+
+Usage (from the repo root):
+    python benchmarks/bench_activity.py [--solves 50000] [--years 10]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import activity  # noqa: E402
+
+
+def synthetic_history(solves, years, seed=11):
+    rng = np.random.default_rng(seed)
+    end = datetime(2026, 10, 18, 12, 0)
+    span_days = years * 365
+    # Active on ~70% of days so there are plenty of streak breaks
+    active = np.flatnonzero(rng.random(span_days) < 0.7)
+    picks = np.sort(rng.choice(active, size=solves))
+    seconds = rng.integers(0, 86400, size=solves)
+    start = end - timedelta(days=span_days)
+    return [start + timedelta(days=int(d), seconds=int(s)) for d, s in zip(picks, seconds)], end.date()
+
+def legacy(solved_at, today):
+    """The loop index() used before the aggregates/activity module."""
+    activity_map = {}
+    distinct_dates = set()
+    for s in solved_at:
+        d_str = s.strftime('%Y-%m-%d')
+        activity_map[d_str] = activity_map.get(d_str, 0) + 1
+        distinct_dates.add(s.date())
+    sorted_dates = sorted(list(distinct_dates))
+    current_streak = 0
+    longest_streak = 0
+    if sorted_dates:
+        yesterday = today - timedelta(days=1)
+        if sorted_dates[-1] == today or sorted_dates[-1] == yesterday:
+            current_streak = 1
+            for i in range(len(sorted_dates)-1, 0, -1):
+                if (sorted_dates[i] - sorted_dates[i-1]).days == 1: current_streak += 1
+                else: break
+        temp_streak = 1
+        for i in range(1, len(sorted_dates)):
+            if (sorted_dates[i] - sorted_dates[i-1]).days == 1: temp_streak += 1
+            else:
+                longest_streak = max(longest_streak, temp_streak)
+                temp_streak = 1
+        longest_streak = max(longest_streak, temp_streak)
+    return activity_map, current_streak, longest_streak
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--solves', type=int, default=50000)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    solved_at, today = synthetic_history(args.solves, args.years)
+    stamps = np.array(solved_at, dtype='datetime64[s]')
+
+    t_legacy, (heat, current, longest) = best_of(lambda: legacy(solved_at, today))
+    t_list, summary = best_of(lambda: activity.summarize(solved_at, today=today))
+    t_array, _ = best_of(lambda: activity.summarize(stamps, today=today))
+    rows = sorted(heat.items()) # What UserDailyActivity holds
+    row_days, row_counts = [datetime.strptime(d, '%Y-%m-%d').date() for d, _ in rows], [n for _, n in rows]
+    t_daily, daily = best_of(lambda: activity.from_daily(row_days, row_counts, today=today))
+    t_weekly, weekly = best_of(lambda: summary.weekly_counts(52, today=today))
+
+    assert summary.heatmap() == heat
+    assert (summary.current_streak, summary.longest_streak) == (current, longest)
+    assert daily.heatmap() == heat and (daily.current_streak, daily.longest_streak) == (current, longest)
+    assert weekly.sum() == sum(n for d, n in heat.items() if d > str(today - timedelta(days=364)))
+    assert (daily.weekly_counts(52, today=today) == weekly).all()
+
+    print(f"history: {args.solves} solves over {args.years} years, {len(summary.days)} active days, "
+          f"longest streak {longest}, current {current}")
+    print(f"{'legacy loop':<34}{t_legacy * 1000:>10.2f} ms")
+    print(f"{'activity.summarize (datetimes)':<34}{t_list * 1000:>10.2f} ms")
+    print(f"{'activity.summarize (datetime64)':<34}{t_array * 1000:>10.2f} ms  ({t_legacy / t_array:.0f}x)")
+    print(f"{'activity.from_daily (day rows)':<34}{t_daily * 1000:>10.2f} ms")
+    print(f"{'weekly_counts(52)':<34}{t_weekly * 1000:>10.3f} ms")
+
+if __name__ == '__main__':
+    main()
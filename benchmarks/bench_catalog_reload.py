@@ -0,0 +1,126 @@
+"""
+Catalog hot-reload benchmark: what a swap costs and what requests see meanwhile.
+
+Works on a temp copy of the CSV with two versions (full / last 300 problems
+dropped). Reports a full catalog build (hash, frame, index, eager roadmaps)
+from the CSV vs from the snapshot `flask publish-catalog` writes, then serves
+/topic/<slug> from several threads while a background thread keeps swapping
+versions, asserting every response matches one complete catalog version.
+
+Usage (from the repo root):
+    python benchmarks/bench_catalog_reload.py [--requests 2000] [--threads 4]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+WORKDIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(WORKDIR, 'bench.db'))
+os.environ['CATALOG_SNAPSHOT'] = os.path.join(WORKDIR, 'catalog.snapshot')
+os.environ['CATALOG_POLL_SECONDS'] = '0'  # Swaps are driven explicitly below
+
+import pandas as pd  # noqa: E402
+
+import app  # noqa: E402
+
+TOPIC = 'arrays-hashing'
+ROADMAP_JSON = re.compile(rb'const allProblems = (.*);\n')
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def logged_in_client():
+    client = app.app.test_client()
+    client.post('/login', data={'username': 'bench_reload', 'password': 'benchmark-pass'})
+    return client
+
+def serve(threads, requests, expected):
+    """Latencies for `requests` topic-page loads across `threads` clients; checks each page."""
+    latencies, lock = [], threading.Lock()
+
+    def worker(count):
+        client = logged_in_client()
+        for _ in range(count):
+            start = time.perf_counter()
+            res = client.get(f'/topic/{TOPIC}')
+            elapsed = time.perf_counter() - start
+            ids = tuple(p['ID'] for p in json.loads(ROADMAP_JSON.search(res.data).group(1)))
+            assert res.status_code == 200 and ids in expected, "page mixes catalog versions"
+            with lock:
+                latencies.append(elapsed)
+
+    pool = [threading.Thread(target=worker, args=(requests // threads,)) for _ in range(threads)]
+    for t in pool: t.start()
+    for t in pool: t.join()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    full = os.path.join(WORKDIR, 'full.csv')
+    trimmed = os.path.join(WORKDIR, 'trimmed.csv')
+    shutil.copyfile(app.CATALOG_CSV, full)
+    pd.read_csv(full).iloc[:-300].to_csv(trimmed, index=False)
+    app.CATALOG_CSV = os.path.join(WORKDIR, 'live.csv')
+
+    expected = set()
+    versions = []
+    print(f"{'catalog':<14}{'problems':>9}{'from CSV (ms)':>15}{'from snapshot (ms)':>20}")
+    for path in (trimmed, full):
+        shutil.copyfile(path, app.CATALOG_CSV)
+        t_csv = best_of(app.build_catalog) # No snapshot for this version yet
+        app.write_catalog_snapshot(app.build_catalog_frame(path), app.hash_file(path)) # = flask publish-catalog
+        t_snapshot = best_of(app.build_catalog)
+        assert app.CATALOG_RELOADER.reload()
+        versions.append(app.CATALOG)
+        expected.add(tuple(p['ID'] for p in app.CATALOG.roadmaps.get(TOPIC)))
+        print(f"{os.path.basename(path):<14}{len(app.CATALOG.data):>9}{t_csv * 1000:>15.1f}{t_snapshot * 1000:>20.1f}")
+
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    app.app.test_client().post('/signup', data={'username': 'bench_reload', 'password': 'benchmark-pass'})
+
+    idle = serve(args.threads, args.requests, expected)
+
+    stop = threading.Event()
+    swaps = 0
+
+    def swapper():
+        nonlocal swaps
+        while not stop.is_set():
+            app.CATALOG = versions[swaps % 2]
+            swaps += 1
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=swapper)
+    thread.start()
+    busy = serve(args.threads, args.requests, expected)
+    stop.set()
+    thread.join()
+
+    print(f"{'/topic/' + TOPIC:<28}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    print(f"{'no swaps':<28}{idle[0] * 1000:>10.2f}{idle[1] * 1000:>10.2f}")
+    print(f"{f'{swaps} swaps during run':<28}{busy[0] * 1000:>10.2f}{busy[1] * 1000:>10.2f}")
+
+if __name__ == '__main__':
+    main()
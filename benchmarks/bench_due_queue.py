@@ -0,0 +1,186 @@
+"""
+Due-review queue: consistency under random traffic, and dashboard latency against the solved_problem scan.
+
+1. Consistency: seeded users with overdue, unscheduled and future reviews
+   run random toggles, batches, unsolves and resolves (with random grades)
+   through the Flask test client, then the SRS rebalance, then the daily
+   rollover in a worker (DUE_QUEUE.covers() after the horizon passes) and
+   from the CLI entry point. After every phase check_due_queue() must
+   report no missing, extra or stale entries.
+2. Latency: --rows solved_problem rows for --users users. Times the
+   dashboard read (get_due_reviews(uid, 2): missions + due-today count)
+   from the queue and from solved_problem, plus a full backfill and a
+   rollover.
+
+Usage (from the repo root):
+    python benchmarks/bench_due_queue.py [--rows 1000000] [--users 5000] [--ops 3000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_due_queue.db')
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import app  # noqa: E402
+from app import db  # noqa: E402
+
+CLIENTS = 20
+SEED_CHUNK = 50000
+
+
+def assert_consistent(phase):
+    missing, extra, stale = app.check_due_queue()
+    queued = app.DueReview.query.count()
+    print(f"{phase:<44} {queued:>7} queued  missing {len(missing)}, extra {len(extra)}, stale {len(stale)}")
+    assert not (missing or extra or stale), f"queue out of sync after {phase}"
+
+def random_traffic(ops, rng):
+    """Random solve/unsolve/batch/resolve requests from CLIENTS users, some of them with due reviews."""
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    ids = app.CATALOG.data['ID'].tolist()
+    clients = []
+    for i in range(CLIENTS):
+        client = app.app.test_client()
+        client.post('/signup', data={'username': f'queue{i}', 'password': 'benchmark-pass'})
+        clients.append(client)
+        pool = rng.sample(ids, 40)
+        client.post('/api/progress/batch', json={'ops': [{'problem_id': pid, 'solved': True} for pid in pool]})
+    with app.app.app_context():
+        # Backdate some reviews so there is something due today, overdue and unscheduled
+        now = datetime.utcnow()
+        rows = app.SolvedProblem.query.all()
+        for row in rows:
+            roll = rng.random()
+            if roll < 0.3: row.next_review_at = now - timedelta(days=rng.uniform(0, 10))
+            elif roll < 0.4: row.next_review_at = now + timedelta(hours=rng.uniform(0, 1))
+            elif roll < 0.45: row.next_review_at = None
+        db.session.commit()
+        for user_id in {row.user_id for row in rows}:
+            app.refresh_due_queue(user_id)
+        db.session.commit()
+        assert_consistent('seeded (refresh_due_queue)')
+
+    for _ in range(ops):
+        client = rng.choice(clients)
+        pid = rng.choice(ids[:300])
+        kind = rng.random()
+        if kind < 0.35:
+            res = client.post('/api/progress/toggle', json={'problem_id': pid, 'solved': rng.random() < 0.5})
+        elif kind < 0.5:
+            batch = [{'problem_id': rng.choice(ids[:300]), 'solved': rng.random() < 0.5} for _ in range(rng.randint(1, 8))]
+            res = client.post('/api/progress/batch', json={'ops': batch})
+        elif kind < 0.8:
+            due = client.get('/api/srs/due?limit=5').get_json()
+            target = due[0]['problem_id'] if due and rng.random() < 0.8 else pid
+            res = client.post('/api/srs/resolve', json={'problem_id': target, 'grade': rng.choice(['again', 'hard', 'good', 'easy'])})
+        else:
+            res = client.get('/')
+        assert res.status_code in (200, 404), res.status_code
+    with app.app.app_context():
+        assert_consistent(f'{ops} random requests')
+
+def consistency(ops, rng):
+    random_traffic(ops, rng)
+    with app.app.app_context():
+        app.rebalance_reviews()
+        assert_consistent('srs rebalance')
+
+        # The next day: the first request after the horizon starts the rollover in the background
+        tomorrow = db.session.get(app.DueQueueState, 1).horizon + timedelta(hours=1)
+        app.DUE_QUEUE.reset()
+        assert not app.DUE_QUEUE.covers(tomorrow), 'stale horizon reported as current'
+        app.DUE_QUEUE.thread.join()
+        assert app.DUE_QUEUE.covers(tomorrow), 'rollover did not move the horizon'
+        db.session.expire_all()
+        assert_consistent('rollover (worker thread)')
+        app.rollover_due_queue(tomorrow + timedelta(days=1))
+        assert_consistent('rollover (CLI, a day later)')
+        app.backfill_due_queue()  # Back to today for the latency phase
+
+def seed(rows, users, now, rng):
+    ids = app.CATALOG.data['ID'].tolist()
+    per_user = min(rows // users, len(ids))
+    with db.engine.begin() as conn:
+        first = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM user").scalar() + 1
+        conn.exec_driver_sql("INSERT INTO user (id, username, password) VALUES " + ",".join(f"({u}, 'u{u}', 'x')" for u in range(first, first + users)))
+        batch = []
+        for u in range(first, first + users):
+            for pid in rng.sample(ids, per_user):
+                due = None if rng.random() < 0.02 else now + timedelta(days=rng.uniform(-3, 60))
+                batch.append((pid, now - timedelta(days=90), u, due, 1.0))
+            if len(batch) >= SEED_CHUNK:
+                conn.exec_driver_sql("INSERT INTO solved_problem (problem_id, solved_at, user_id, next_review_at, srs_interval) VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql("INSERT INTO solved_problem (problem_id, solved_at, user_id, next_review_at, srs_interval) VALUES (?, ?, ?, ?, ?)", batch)
+        conn.exec_driver_sql("ANALYZE")
+    return list(range(first, first + users))
+
+def latency(fn, user_ids):
+    samples = []
+    for uid in user_ids:
+        start = time.perf_counter()
+        fn(uid)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--ops', type=int, default=3000, help='Random requests in the consistency phase')
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    consistency(args.ops, rng)
+
+    now = datetime.utcnow()
+    with app.app.app_context():
+        start = time.perf_counter()
+        user_ids = seed(args.rows, args.users, now, rng)
+        print(f"\nseeded {args.rows:,} rows for {args.users:,} users in {time.perf_counter() - start:.1f} s")
+        start = time.perf_counter()
+        queued = app.backfill_due_queue(now)
+        print(f"backfill: {queued:,} reviews queued in {time.perf_counter() - start:.2f} s")
+        assert_consistent('backfill')
+
+        sample = [rng.choice(user_ids) for _ in range(args.queries)]
+        for uid in sample[:3]:  # The queue and the scan have to agree
+            app.DUE_QUEUE.reset()
+            from_queue = app.get_due_reviews(uid, 2, now=now)
+            app.DUE_QUEUE.horizon, app.DUE_QUEUE.next_check = None, float('inf')
+            from_scan = app.get_due_reviews(uid, 2, now=now)
+            assert [(t.problem_id, t.due_at) for t, _ in from_queue[0]] == [(t.problem_id, t.due_at) for t, _ in from_scan[0]]
+            assert from_queue[1] == from_scan[1], (from_queue[1], from_scan[1])
+        app.DUE_QUEUE.reset()
+        queue = latency(lambda uid: app.get_due_reviews(uid, 2, now=now), sample)
+        app.DUE_QUEUE.horizon, app.DUE_QUEUE.next_check = None, float('inf')  # Force the solved_problem path
+        scan = latency(lambda uid: app.get_due_reviews(uid, 2, now=now), sample)
+        app.DUE_QUEUE.reset()
+
+        start = time.perf_counter()
+        rolled = app.rollover_due_queue(now + timedelta(days=1))
+        print(f"rollover: {rolled:,} reviews queued in {time.perf_counter() - start:.2f} s")
+        assert_consistent('rollover')
+
+    print(f"\n{'dashboard read (missions + due today)':<40}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for name, (p50, p99) in (('solved_problem scan', scan), ('due-review queue', queue)):
+        print(f"{name:<40}{p50 * 1000:>10.3f}{p99 * 1000:>10.3f}")
+    print(f"speedup at p50: {scan[0] / queue[0]:.1f}x")
+
+if __name__ == '__main__':
+    main()
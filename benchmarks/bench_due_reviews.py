@@ -0,0 +1,121 @@
+"""
+Due-review query benchmark on SQLite with a large solved_problem table.
+
+Seeds --rows SolvedProblem rows, asserts via EXPLAIN QUERY PLAN that the
+due-review queries use ix_solved_problem_user_next_review (no temp B-tree
+sort), then compares latency of the legacy OR query without the index
+against get_due_reviews() with it. The due-review queue is switched off
+here, so get_due_reviews() reads solved_problem; bench_due_queue.py
+compares the two.
+
+Usage (from the repo root):
+    python benchmarks/bench_due_reviews.py [--rows 1000000] [--users 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_due.db')
+
+import app  # noqa: E402
+from app import SolvedProblem, db  # noqa: E402
+from sqlalchemy import or_, text  # noqa: E402
+
+INDEX_NAME = 'ix_solved_problem_user_next_review'
+
+
+def seed(rows, users, now):
+    ids = app.CATALOG.data['ID'].tolist()
+    per_user = rows // users
+    rng = random.Random(5)
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO user (id, username, password) VALUES " + ",".join(f"({u}, 'u{u}', 'x')" for u in range(1, users + 1)))
+        batch = []
+        for u in range(1, users + 1):
+            for pid in rng.sample(ids, min(per_user, len(ids))):
+                due = None if rng.random() < 0.1 else now + timedelta(days=rng.uniform(-60, 60))
+                batch.append((pid, now - timedelta(days=90), u, due, 1.0))
+            if len(batch) >= 50000:
+                conn.exec_driver_sql("INSERT INTO solved_problem (problem_id, solved_at, user_id, next_review_at, srs_interval) VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql("INSERT INTO solved_problem (problem_id, solved_at, user_id, next_review_at, srs_interval) VALUES (?, ?, ?, ?, ?)", batch)
+        conn.exec_driver_sql("ANALYZE")
+
+def query_plan(query):
+    compiled = query.statement.compile(db.engine)
+    params = tuple(str(compiled.params[k]) for k in compiled.positiontup)
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params)]
+
+def legacy_query(user_id, now):
+    return SolvedProblem.query.filter(
+        SolvedProblem.user_id == user_id,
+        or_(SolvedProblem.next_review_at <= now, SolvedProblem.next_review_at == None)  # noqa: E711
+    ).order_by(SolvedProblem.next_review_at.asc()).limit(2)
+
+def latency(fn, user_ids):
+    samples = []
+    for uid in user_ids:
+        start = time.perf_counter()
+        fn(uid)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    with app.app.app_context():
+        start = time.perf_counter()
+        seed(args.rows, args.users, now)
+        total = SolvedProblem.query.count()
+        print(f"seeded {total} rows for {args.users} users in {time.perf_counter() - start:.1f}s")
+        app.DueQueueState.query.delete()  # No queue: get_due_reviews() falls back to solved_problem
+        db.session.commit()
+        app.DUE_QUEUE.reset()
+
+        overdue = SolvedProblem.query.filter(SolvedProblem.user_id == 1, SolvedProblem.next_review_at <= now).order_by(SolvedProblem.next_review_at.asc()).limit(10)
+        unscheduled = SolvedProblem.query.filter(SolvedProblem.user_id == 1, SolvedProblem.next_review_at.is_(None)).order_by(SolvedProblem.id.asc()).limit(10)
+        for name, q in (('overdue', overdue), ('unscheduled', unscheduled)):
+            plan = query_plan(q)
+            print(f"plan[{name}]: {plan}")
+            assert any(INDEX_NAME in step for step in plan), f"{name} query does not use {INDEX_NAME}"
+        assert not any('TEMP B-TREE' in step for step in query_plan(overdue)), "overdue query needs a sort"
+        due_today = SolvedProblem.query.filter(SolvedProblem.user_id == 1, SolvedProblem.next_review_at < app.next_midnight(now))
+        assert any(INDEX_NAME in step for step in query_plan(due_today)), f"due-today count does not use {INDEX_NAME}"
+        for uid in range(1, 4):  # The split count has to match the OR it replaces
+            want = SolvedProblem.query.filter(SolvedProblem.user_id == uid, or_(
+                SolvedProblem.next_review_at == None, SolvedProblem.next_review_at < app.next_midnight(now))).count()  # noqa: E711
+            assert app.get_due_reviews(uid, 2, now=now)[1] == want, uid
+
+        user_ids = [random.randint(1, args.users) for _ in range(args.queries)]
+        with_index = latency(lambda uid: app.get_due_reviews(uid, 2, now=now), user_ids)
+        legacy_with_index = latency(lambda uid: legacy_query(uid, now).all(), user_ids)
+
+        db.session.execute(text(f"DROP INDEX {INDEX_NAME}"))
+        db.session.commit()
+        legacy_no_index = latency(lambda uid: legacy_query(uid, now).all(), user_ids)
+        print(f"plan[legacy, no index]: {query_plan(legacy_query(1, now))}")
+
+    print(f"{'query':<38}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for name, (p50, p99) in (('legacy OR, unique-constraint index only', legacy_no_index),
+                             ('legacy OR, composite index', legacy_with_index),
+                             ('get_due_reviews, composite index', with_index)):
+        print(f"{name:<38}{p50 * 1000:>10.3f}{p99 * 1000:>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Fast-state load test: main-DB round trips and latency per authenticated request
+for each FAST_STATE_URL backend.
+
+Each backend runs in its own subprocess (the backend is chosen at import):
+sign up, log in, then --requests GETs over a mix of API routes and the
+dashboard with the rate limiter on, one client IP per 200 requests. Counts
+statements sent to the main database (SQLAlchemy cursor events) and calls
+into the SQLite fast-state store.
+
+Usage (from the repo root):
+    python benchmarks/bench_fast_state.py [--requests 2000] [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ROUTES = ['/api/progress', '/api/srs/due?limit=5', '/api/notes/{pid}', '/']
+
+
+def probe(requests):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app
+    import fast_state
+    from sqlalchemy import event
+
+    counts = {'db': 0, 'state': 0}
+
+    def count_state(fn):
+        def wrapper(*args, **kwargs):
+            counts['state'] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+
+    for name in ('get', 'set', 'delete', 'incr', 'count', 'counter_expiry'):
+        setattr(fast_state.SQLiteStateStore, name, count_state(getattr(fast_state.SQLiteStateStore, name)))
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    with app.app.app_context():
+        event.listen(app.db.engine, 'before_cursor_execute', lambda *a: counts.__setitem__('db', counts['db'] + 1))
+
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_state', 'password': 'benchmark-pass'})
+    client.post('/login', data={'username': 'bench_state', 'password': 'benchmark-pass'})
+    pid = int(app.CATALOG.data['ID'].iloc[0])
+    client.post('/api/progress/toggle', json={'problem_id': pid})
+
+    per_route = {route: {'db': 0, 'state': 0, 'latency': []} for route in ROUTES}
+    for i in range(requests):
+        route = ROUTES[i % len(ROUTES)]
+        before = dict(counts)
+        start = time.perf_counter()
+        res = client.get(route.format(pid=pid), environ_base={'REMOTE_ADDR': f'10.0.{i // 200 // 250}.{i // 200 % 250}'})
+        elapsed = time.perf_counter() - start
+        assert res.status_code == 200, (route, res.status_code)
+        stats = per_route[route]
+        stats['db'] += counts['db'] - before['db']
+        stats['state'] += counts['state'] - before['state']
+        stats['latency'].append(elapsed)
+    print(json.dumps(per_route))
+
+def run_backend(url, requests):
+    env = dict(os.environ, FAST_STATE_URL=url, CATALOG_POLL_SECONDS='0',
+               DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    out = subprocess.run([sys.executable, __file__, '--probe', '--requests', str(requests)],
+                         cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise SystemExit(f"{url} probe failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--redis-url', help='Also measure a Redis backend (needs the redis package)')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.probe:
+        return probe(args.requests)
+
+    backends = [('sqlalchemy (old)', 'sqlalchemy://'),
+                ('sqlite WAL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'fast_state.sqlite3')),
+                ('memory', 'memory://')]
+    if args.redis_url:
+        backends.append(('redis', args.redis_url))
+
+    print(f"{'backend':<18}{'route':<22}{'DB stmts/req':>13}{'state ops/req':>15}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for label, url in backends:
+        results = run_backend(url, args.requests)
+        total_db = total_n = 0
+        for route, stats in results.items():
+            n = len(stats['latency'])
+            lat = sorted(stats['latency'])
+            total_db += stats['db']
+            total_n += n
+            print(f"{label:<18}{route:<22}{stats['db'] / n:>13.2f}{stats['state'] / n:>15.2f}"
+                  f"{statistics.median(lat) * 1000:>10.2f}{lat[int(n * 0.95) - 1] * 1000:>10.2f}")
+        print(f"{label:<18}{'(all)':<22}{total_db / total_n:>13.2f}")
+
+if __name__ == '__main__':
+    main()
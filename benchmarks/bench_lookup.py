@@ -0,0 +1,63 @@
+"""
+Problem lookup microbenchmark: DataFrame boolean scan vs the prebuilt ProblemIndex.
+
+Usage (from the repo root):
+    python benchmarks/bench_lookup.py [--lookups 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import app  # noqa: E402
+from problem_index import ProblemIndex  # noqa: E402
+
+
+def legacy_scan(pid):
+    row = app.CATALOG.data[app.CATALOG.data['ID'] == int(pid)]
+    if row.empty: return None
+    return row.iloc[0].to_dict()
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    ids = app.CATALOG.data['ID'].tolist()
+    sample = [random.choice(ids) for _ in range(args.lookups)]
+    index = app.CATALOG.index
+
+    # Parity: the index must expose the same values the scan returned
+    for pid in sample[:200]:
+        row, rec = legacy_scan(pid), index.get(pid)
+        assert (rec.title, rec.link, rec.difficulty, rec.signal_score) == (row['Title'], row['Link'], row['Difficulty'], row['signal_score'])
+
+    t_build = timed(lambda: ProblemIndex(app.CATALOG.data))
+    t_scan = timed(lambda: [legacy_scan(pid) for pid in sample])
+    t_get = timed(lambda: [index.get(pid) for pid in sample])
+    t_many = timed(lambda: index.get_many(sample))
+    t_pos = timed(lambda: index.positions(sample))
+
+    n = args.lookups
+    print(f"catalog: {len(index)} problems, index build {t_build * 1000:.2f} ms")
+    print(f"{'method':<28}{'per lookup (us)':>18}")
+    print(f"{'DataFrame scan + to_dict':<28}{t_scan / n * 1e6:>18.2f}")
+    print(f"{'ProblemIndex.get':<28}{t_get / n * 1e6:>18.3f}")
+    print(f"{'ProblemIndex.get_many':<28}{t_many / n * 1e6:>18.3f}")
+    print(f"{'ProblemIndex.positions':<28}{t_pos / n * 1e6:>18.3f}")
+    print(f"speedup (scan / get): {t_scan / t_get:,.0f}x")
+
+if __name__ == '__main__':
+    main()
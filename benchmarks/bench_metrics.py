@@ -0,0 +1,98 @@
+"""
+Instrumentation overhead: the same request mix with metrics off, on, and on with the profiler.
+
+A seeded user (150 solves, 20 notes) requests the dashboard, a topic page,
+/api/progress, a note and a search through the Flask test client. Rounds
+alternate between the configurations, so drift hits them all alike. The
+median round time of each is compared with metrics off. The budget for
+METRICS_ENABLED is 2%. The profiler at PROFILE_SAMPLE_RATE=1 is shown for
+reference; in production it samples a small fraction of requests. Also
+times one /metrics render.
+
+Usage (from the repo root):
+    python benchmarks/bench_metrics.py [--rounds 30] [--requests 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import app  # noqa: E402
+
+BUDGET = 0.02
+CONFIGS = {  # name: (METRICS_ENABLED, PROFILE_SAMPLE_RATE)
+    'metrics off': (False, 0.0),
+    'metrics on': (True, 0.0),
+    'metrics + profiler (every request)': (True, 1.0),
+}
+
+
+def seed_user(rng):
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_metrics', 'password': 'benchmark-pass'})
+    ids = app.CATALOG.data['ID'].tolist()
+    for pid in rng.sample(ids, 150):
+        client.post('/api/progress/toggle', json={'problem_id': pid, 'solved': True})
+    noted = rng.sample(ids, 20)
+    for pid in noted:
+        client.post('/api/notes/save', json={'problem_id': pid, 'content': 'two pointers; watch the edge case ' * 20})
+    return client, noted
+
+def run_round(client, urls):
+    start = time.perf_counter()
+    for url in urls:
+        res = client.get(url)
+        assert res.status_code == 200, (url, res.status_code)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per round')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    client, noted = seed_user(rng)
+    topics = list(app.SLUG_TO_NAME_MAP)
+    mix = [lambda: '/', lambda: f'/topic/{rng.choice(topics)}', lambda: '/api/progress',
+           lambda: f'/api/notes/{rng.choice(noted)}', lambda: f'/api/search?q={rng.choice(["tw", "tree", "sub"])}']
+    urls = [mix[i % len(mix)]() for i in range(args.requests)]
+
+    timings = {name: [] for name in CONFIGS}
+    for _ in range(3):
+        run_round(client, urls)  # Warm up caches and the template cache
+    for _ in range(args.rounds):
+        for name, (enabled, rate) in CONFIGS.items():
+            app.app.config['METRICS_ENABLED'] = enabled
+            app.app.config['PROFILE_SAMPLE_RATE'] = rate
+            timings[name].append(run_round(client, urls))
+    app.app.config['METRICS_ENABLED'] = True
+    app.app.config['PROFILE_SAMPLE_RATE'] = 0.0
+
+    base = statistics.median(timings['metrics off'])
+    print(f"{'configuration':<36}{'per request (us)':>18}{'overhead':>10}")
+    for name, ts in timings.items():
+        median = statistics.median(ts)
+        print(f"{name:<36}{median / args.requests * 1e6:>18.0f}{(median / base - 1) * 100:>+9.1f}%")
+
+    start = time.perf_counter()
+    body = client.get('/metrics').get_data()
+    print(f"/metrics render: {(time.perf_counter() - start) * 1000:.2f} ms, {len(body) / 1024:.1f} KiB")
+    overhead = statistics.median(timings['metrics on']) / base - 1
+    print(f"metrics overhead {overhead * 100:+.1f}% (budget {BUDGET * 100:.0f}%): {'OK' if overhead < BUDGET else 'OVER BUDGET'}")
+
+if __name__ == '__main__':
+    main()
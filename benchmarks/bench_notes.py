@@ -0,0 +1,195 @@
+"""
+Note storage benchmark: bytes stored and save latency for large markdown notes.
+
+Seeds --users synthetic users with --notes notes each, on problems drawn
+from the first --popular of the catalog (roadmaps steer everyone to the
+same ones). Every note starts as the boilerplate topic.html prefills; a
+--boilerplate fraction is saved
+unedited, the rest grow into large markdown notes (headings, lists, code
+blocks, ~--size-kb KiB on average) over a few editing sessions a day apart,
+with several saves per session. All saves go through store_note(). Then:
+1. Storage: what the old plain-text Note.content would hold, and what
+   blobs (compressed, deduplicated) plus revision history take. Each
+   stored revision is checked against the version it should rebuild.
+2. Save latency, p50/p99 over --samples saves of large notes: unchanged,
+   an edit folded into the session's revision, an edit that pushes a new
+   revision, and the old `note.content = ...; commit` path.
+
+Usage (from the repo root):
+    python benchmarks/bench_notes.py [--users 300] [--notes 20] [--size-kb 24] [--boilerplate 0.3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_notes.db')
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import app  # noqa: E402
+import note_store  # noqa: E402
+from app import Note, NoteBlob, NoteRevision, db  # noqa: E402
+
+SESSIONS = (2, 6)  # Editing sessions per edited note
+SAVES_PER_SESSION = (1, 8)
+WORDS = ("two pointers hash map sliding window monotonic stack heap dfs bfs dynamic programming memo "
+         "greedy sort binary search edge case off by one invariant amortized prefix sum").split()
+
+
+def boilerplate(title):
+    """The template topic.html prefills into an empty note."""
+    return (f"# {title}\n\n## 💡 Intuition\n<!-- Initial thoughts -->\n\n## 🧠 Approach\n1. \n2. \n\n"
+            "## ⏱️ Complexity\n- **Time:** O(n)\n- **Space:** O(1)\n\n## 💻 Code\n```python\n"
+            "class Solution:\n    def solve(self):\n        pass\n```")
+
+def markdown_block(rng):
+    kind = rng.random()
+    sentence = lambda: ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+    if kind < 0.15:
+        return f"## {sentence()[:40]}\n"
+    if kind < 0.4:
+        return ''.join(f"- {sentence()}\n" for _ in range(rng.randint(2, 6)))
+    if kind < 0.6:
+        body = ''.join(f"        {rng.choice(WORDS)}_{i} = {rng.choice(WORDS)}(nums[{i}:])\n" for i in range(rng.randint(4, 15)))
+        return f"```python\ndef solve(nums):\n{body}    return best\n```\n"
+    return ' '.join(sentence() for _ in range(rng.randint(2, 6))) + "\n"
+
+def edit(text, rng, target):
+    """A session's worth of typing: grow towards `target` bytes, touch up a line or two."""
+    lines = text.split('\n')
+    for _ in range(rng.randint(1, 3)):
+        lines[rng.randrange(len(lines))] += ' ' + rng.choice(WORDS)
+    grown = '\n'.join(lines)
+    while len(grown) < target:
+        at = grown.rfind('\n', 0, rng.randint(0, len(grown))) + 1
+        grown = grown[:at] + markdown_block(rng) + '\n' + grown[at:]
+        if rng.random() < 0.5: break  # Not every save adds a block
+    return grown
+
+def seed(users, notes, popular, size_kb, boilerplate_share, rng):
+    """Writes every note's history through store_note(); returns (expected history per note, saves, legacy bytes)."""
+    titles = app.CATALOG.data['Title'].tolist()
+    ids = app.CATALOG.data['ID'].tolist()
+    db.session.execute(db.insert(app.User), [{'username': f'notes{u}', 'password': 'x'} for u in range(users)])
+    db.session.commit()
+    user_ids = [uid for (uid,) in db.session.query(app.User.id).filter(app.User.username.like('notes%'))]
+    history, saves, legacy = {}, 0, 0
+    start = datetime.utcnow() - timedelta(days=60)
+    for uid in user_ids:
+        for pos in rng.sample(range(min(popular, len(ids))), notes):
+            now = start + timedelta(minutes=rng.randint(0, 600))
+            text = boilerplate(titles[pos])
+            app.store_note(uid, ids[pos], text, now=now)
+            saves += 1
+            versions = [text]
+            if rng.random() >= boilerplate_share:
+                target = int(rng.lognormvariate(0, 0.6) * size_kb * 1024)
+                for _ in range(rng.randint(*SESSIONS)):
+                    now += timedelta(days=rng.uniform(1, 5))
+                    for _ in range(rng.randint(*SAVES_PER_SESSION)):
+                        now += timedelta(seconds=rng.randint(10, 90))
+                        text = edit(text, rng, min(target, app.app.config['NOTE_MAX_BYTES']))
+                        app.store_note(uid, ids[pos], text, now=now)
+                        saves += 1
+                    versions.append(text)  # Only the last save of a session outlives the fold
+            history[(uid, ids[pos])] = versions
+            legacy += len(text.encode('utf-8'))
+    return history, saves, legacy
+
+def check_history(history):
+    """Every kept revision rebuilds the version it should; returns how many were checked."""
+    checked = 0
+    for (uid, pid), versions in history.items():
+        text = app.note_text(uid, pid)
+        assert text == versions[-1], (uid, pid)
+        revisions = app.note_revisions(uid, pid)
+        assert len(revisions) == min(len(versions) - 1, app.app.config['NOTE_REVISIONS_MAX']), (uid, pid)
+        for r, want in zip(revisions, versions[-2::-1]):
+            text = note_store.restore(text, r.is_full, r.data)
+            assert text == want, (uid, pid, r.id)
+            checked += 1
+    return checked
+
+def legacy_save(user_id, problem_id, content):
+    """save_note before blobs: the full text into Note.content on every save."""
+    note = Note.query.filter_by(user_id=user_id, problem_id=problem_id).first()
+    note.content = content
+    db.session.commit()
+
+def percentiles(fn, args):
+    samples = []
+    for a in args:
+        start = time.perf_counter()
+        fn(*a)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--notes', type=int, default=20, help='Notes per user')
+    parser.add_argument('--popular', type=int, default=300, help='Problems users take notes on')
+    parser.add_argument('--size-kb', type=float, default=24, help='Mean size of an edited note')
+    parser.add_argument('--boilerplate', type=float, default=0.3, help='Share of notes saved as the unedited template')
+    parser.add_argument('--samples', type=int, default=300)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    with app.app.app_context():
+        start = time.perf_counter()
+        history, saves, legacy = seed(args.users, args.notes, args.popular, args.size_kb, args.boilerplate, rng)
+        elapsed = time.perf_counter() - start
+        print(f"seeded {len(history):,} notes with {saves:,} saves in {elapsed:.0f} s ({elapsed / saves * 1000:.2f} ms/save)")
+        checked = check_history(history)
+        print(f"history: {checked:,} revisions rebuild their versions exactly")
+
+        blobs, blob_bytes, shared = db.session.query(
+            db.func.count(), db.func.sum(db.func.length(NoteBlob.data)), db.func.sum(NoteBlob.refs - 1)).one()
+        revisions, revision_bytes, revision_raw, full = db.session.query(
+            db.func.count(), db.func.sum(db.func.length(NoteRevision.data)), db.func.sum(NoteRevision.size),
+            db.func.sum(db.case((NoteRevision.is_full, 1), else_=0))).one()
+        raw = db.session.query(db.func.sum(Note.size)).scalar()
+        mib = lambda n: f"{(n or 0) / 2**20:8.1f} MiB"
+        print(f"\n{'current text, plain (old Note.content)':<44}{mib(legacy)}")
+        print(f"{'current text, blobs':<44}{mib(blob_bytes)}  ({blobs:,} blobs for {len(history):,} notes, "
+              f"{shared:,} shared references; {raw / blob_bytes:.1f}x smaller)")
+        print(f"{'history, as plain copies':<44}{mib(revision_raw)}  ({revisions:,} revisions)")
+        print(f"{'history, reverse deltas':<44}{mib(revision_bytes)}  ({(revision_bytes or 0) / max(revisions, 1):,.0f} B/revision, "
+              f"{full:,} stored whole)")
+        print(f"{'total stored vs plain current text':<44}{mib((blob_bytes or 0) + (revision_bytes or 0))}  "
+              f"(with {app.app.config['NOTE_REVISIONS_MAX']} revisions/note kept)")
+
+        # Latency on the largest notes
+        big = sorted(history.items(), key=lambda kv: -len(kv[1][-1]))[:args.samples]
+        now = datetime.utcnow()
+        unchanged = percentiles(app.store_note, [(uid, pid, v[-1], now) for (uid, pid), v in big])
+        session = now + timedelta(days=30)
+        for (uid, pid), v in big:  # Open a fresh session on each note, so the timed edit folds into it
+            v.append(v[-1] + '\nfirst save of the session\n')
+            app.store_note(uid, pid, v[-1], session)
+        folded = percentiles(app.store_note, [(uid, pid, v[-1] + ' (typo fixed)', session + timedelta(seconds=30))
+                                              for (uid, pid), v in big])
+        later = session + timedelta(days=2)
+        pushed = percentiles(app.store_note, [(uid, pid, v[-1] + ' (revisited)', later) for (uid, pid), v in big])
+        for (uid, pid), v in big:  # Same notes as legacy rows
+            db.session.execute(db.insert(Note).values(user_id=uid, problem_id=-pid, content=v[-1], updated_at=now))
+        db.session.commit()
+        old = percentiles(legacy_save, [(uid, -pid, v[-1] + ' (revisited)') for (uid, pid), v in big])
+        size = statistics.mean(len(v[-1].encode('utf-8')) for _, v in big) / 1024
+
+    print(f"\nsave latency, {len(big)} notes of {size:.0f} KiB on average   p50 (ms)  p99 (ms)")
+    for name, (p50, p99) in (('unchanged (hash match, no write)', unchanged), ('edit, folded into the session revision', folded),
+                             ('edit, new revision', pushed), ('old full-text save', old)):
+        print(f"{name:<46}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Notes full-text search: index build, query latency and agreement across backends.
+
+Seeds --users users with --notes notes each (100k notes by default):
+markdown-ish text drawn from a Zipf-distributed vocabulary of common
+algorithm words and made-up identifiers, stored through the compressed
+blob path. Then, for the FTS5 index and the portable note_term table:
+1. Build: time for reindex_notes() over every note.
+2. Queries: p50/p99 of rank_notes() for --queries random 1-3 word
+   queries (the last word often cut to a prefix, as typed), against the
+   naive alternative of decompressing and scanning all of the user's notes.
+   Every backend must match the scan's hit count on every query.
+3. Sync: --edits notes are rewritten through store_note() and the changed
+   words must be findable (and the removed ones gone) with no reindex.
+
+Usage (from the repo root):
+    python benchmarks/bench_notes_search.py [--users 2000] [--notes 50] [--queries 1000]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_notes_search.db')
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import app  # noqa: E402
+import note_search  # noqa: E402
+import note_store  # noqa: E402
+from app import Note, NoteBlob, db  # noqa: E402
+
+COMMON = ("two pointers hash map sliding window monotonic stack queue heap dfs bfs dynamic programming memo "
+          "greedy sort binary search edge case off by one invariant amortized prefix sum graph tree trie union "
+          "find interval bitmask recursion backtracking topological dijkstra segment fenwick complexity").split()
+SYLLABLES = "ka ro mi te su lo an ex qu pi ve dra nol stri fen bu".split()
+SEED_CHUNK = 20000
+
+
+def vocabulary(rng, size):
+    """COMMON words first, then made-up identifiers; cumulative Zipf weights by rank."""
+    words = list(COMMON)
+    seen = set(words)
+    while len(words) < size:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+
+def note_body(rng, words, weights):
+    lines = [f"# {' '.join(rng.choices(words, cum_weights=weights, k=3)).title()}", '']
+    for _ in range(rng.randint(3, 12)):
+        text = ' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(6, 30)))
+        lines.append(rng.choice(('- ', '', '    ', '## ')) + text.capitalize() + rng.choice(('.', ':', '', '!')))
+    return '\n'.join(lines)
+
+def seed(users, notes, rng, words, weights):
+    """Bulk-inserts legacy plain-text notes and moves them into blobs; returns the user ids."""
+    ids = app.CATALOG.data['ID'].tolist()
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        first = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM user").scalar() + 1
+        conn.exec_driver_sql("INSERT INTO user (id, username, password) VALUES " + ",".join(f"({u}, 's{u}', 'x')" for u in range(first, first + users)))
+        batch = []
+        for u in range(first, first + users):
+            for pid in rng.sample(ids, min(notes, len(ids))):
+                batch.append((u, pid, note_body(rng, words, weights), now))
+            if len(batch) >= SEED_CHUNK:
+                conn.exec_driver_sql("INSERT INTO note (user_id, problem_id, content, updated_at) VALUES (?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.exec_driver_sql("INSERT INTO note (user_id, problem_id, content, updated_at) VALUES (?, ?, ?, ?)", batch)
+    app.migrate_legacy_notes(index=False)
+    db.session.execute(app.text("ANALYZE"))
+    return list(range(first, first + users))
+
+def random_query(rng, words, weights):
+    terms = rng.choices(words, cum_weights=weights, k=rng.randint(1, 3))
+    last = terms[-1]
+    if len(last) > 3 and rng.random() < 0.6:
+        terms[-1] = last[:rng.randint(3, len(last) - 1)]  # Still typing
+    return ' '.join(terms)
+
+def user_texts(user_id):
+    rows = db.session.execute(db.select(Note.id, Note.content, NoteBlob.data).outerjoin(
+        NoteBlob, NoteBlob.digest == Note.content_hash).where(Note.user_id == user_id)).all()
+    return [(r.id, note_store.decompress(r.data) if r.data is not None else r.content or '') for r in rows]
+
+def scan(user_id, terms):
+    """The naive search: decompress every note of the user and check each one."""
+    hits, exact, prefix = [], set(terms[:-1]), terms[-1]
+    for note_id, text in user_texts(user_id):
+        tokens = set(note_search.tokenize(text))
+        if exact <= tokens and any(t.startswith(prefix) for t in tokens):
+            hits.append(note_id)
+    return hits
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def timed(fn, args):
+    samples, results = [], []
+    for a in args:
+        start = time.perf_counter()
+        results.append(fn(*a))
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples), results
+
+def check_sync(backend, user_ids, edits, rng, words, weights):
+    """Rewrites notes through store_note(): a new word is findable straight away, and gone once removed."""
+    for i in range(edits):
+        uid = rng.choice(user_ids)
+        note_id, problem_id = db.session.execute(db.select(Note.id, Note.problem_id).where(
+            Note.user_id == uid).order_by(db.func.random()).limit(1)).one()
+        marker = f'zz{backend}edit{i}'
+        app.store_note(uid, problem_id, note_body(rng, words, weights) + f'\n{marker} marker')
+        found, total = app.rank_notes(uid, [marker], 10)
+        assert total == 1 and found[0][0] == note_id, (backend, marker, found)
+        app.store_note(uid, problem_id, note_body(rng, words, weights))
+        assert app.rank_notes(uid, [marker], 10)[1] == 0, (backend, marker)
+    return edits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--notes', type=int, default=50, help='Notes per user')
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--edits', type=int, default=200, help='store_note() rewrites in the sync check')
+    args = parser.parse_args()
+    rng = random.Random(11)
+    words, weights = vocabulary(rng, args.vocabulary)
+
+    with app.app.app_context():
+        start = time.perf_counter()
+        user_ids = seed(args.users, args.notes, rng, words, weights)
+        total_notes = db.session.query(db.func.count(Note.id)).scalar()
+        print(f"seeded {total_notes:,} notes for {args.users:,} users in {time.perf_counter() - start:.1f} s")
+
+        queries = [(rng.choice(user_ids), note_search.parse_query(random_query(rng, words, weights))) for _ in range(args.queries)]
+        scan_time, hits = timed(scan, queries)
+        print(f"queries: {sum(1 for h in hits if h):,} of {len(queries):,} have hits, "
+              f"{statistics.mean(len(h) for h in hits):.1f} hits on average")
+
+        backends = ['fts5', 'table'] if app.app.config['NOTE_SEARCH_BACKEND'] == 'fts5' else [app.app.config['NOTE_SEARCH_BACKEND']]
+        results = []
+        for backend in backends:
+            app.app.config['NOTE_SEARCH_BACKEND'] = backend
+            start = time.perf_counter()
+            app.reindex_notes()
+            build = time.perf_counter() - start
+            expected = [len(scan(uid, terms)) for uid, terms in queries]  # Again: the last sync check edited notes
+            times, found = timed(app.rank_notes, [(uid, terms, 10) for uid, terms in queries])
+            mismatched = [(q, n, t) for q, n, (_, t) in zip(queries, expected, found) if n != t]
+            assert not mismatched, f"{backend}: {len(mismatched)} queries disagree with the scan, e.g. {mismatched[:3]}"
+            synced = check_sync(backend, user_ids, args.edits, rng, words, weights)
+            print(f"{backend}: built in {build:.1f} s, all {len(queries):,} hit counts match the scan, "
+                  f"{synced} edits searchable without a reindex")
+            results.append((f'{backend} index', times))
+
+    print(f"\nsearch one user's {args.notes} notes, top 10     p50 (ms)  p99 (ms)")
+    for name, (p50, p99) in results + [('decompress and scan', scan_time)]:
+        print(f"{name:<40}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Mixed login + dashboard load against a real gunicorn worker, per hashing setup.
+
+Each configuration starts one gunicorn worker (gunicorn.conf.py, with the
+worker class, threads and PASSWORD_HASH_* overridden) on a fresh database.
+It then runs --login-clients threads posting valid logins back to back
+alongside --dashboard-clients threads loading the dashboard. The run reports
+dashboard latency, login throughput and how many logins were turned away
+with 503 (queue-depth backpressure; clients then wait out Retry-After).
+The rate limiter and CSRF are off, so every login reaches bcrypt.
+
+Usage (from the repo root):
+    python benchmarks/bench_password_hashing.py [--seconds 15] [--login-clients 8] [--dashboard-clients 4]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (label, gunicorn worker class, threads, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+CONFIGS = [
+    ('sync, inline (old)', 'sync', 1, 0, 0),
+    ('gthread x8, inline', 'gthread', 8, 0, 0),
+    ('gthread x8, pool 1/4', 'gthread', 8, 1, 4),
+]
+
+
+def make_app():
+    """gunicorn app factory: the real app with rate limiting and CSRF off."""
+    import app
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    return app.app
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(kind, threads, hash_workers, hash_queue):
+    workdir = tempfile.mkdtemp()
+    port = free_port()
+    env = dict(os.environ, CATALOG_POLL_SECONDS='0',
+               DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'),
+               FAST_STATE_URL='sqlite:///' + os.path.join(workdir, 'fast_state.sqlite3'),
+               PASSWORD_HASH_WORKERS=str(hash_workers), PASSWORD_HASH_QUEUE=str(hash_queue))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--pythonpath', f'{ROOT},{HERE}', '-b', f'127.0.0.1:{port}', '-w', '1',
+         '-k', kind, '--threads', str(threads), '--log-level', 'warning',
+         'bench_password_hashing:make_app()'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(300):
+        try:
+            requests.get(url + '/login', timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            if proc.poll() is not None:
+                raise SystemExit(f"gunicorn exited:\n{proc.stderr.read().decode()[-2000:]}")
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("gunicorn did not start")
+
+def signup(url, username):
+    client = requests.Session()
+    res = client.post(url + '/signup', data={'username': username, 'password': 'benchmark-pass'},
+                      allow_redirects=False)
+    assert res.status_code == 302, (username, res.status_code)
+    client.get(url + '/')  # First visit backfills aggregates; keep it out of the measurements
+    return client
+
+def run_load(url, seconds, login_clients, dashboard_clients):
+    signup(url, 'bench_login')
+    clients = [signup(url, f'bench_dash{i}') for i in range(dashboard_clients)]
+    results = {'dashboard': [], 'login': [], 'rejected': 0, 'failed': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def dashboard(client):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            res = client.get(url + '/')
+            elapsed = time.perf_counter() - start
+            assert res.status_code == 200, res.status_code
+            with lock:
+                results['dashboard'].append(elapsed)
+
+    def login():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            res = requests.post(url + '/login', data={'username': 'bench_login', 'password': 'benchmark-pass'},
+                                allow_redirects=False)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if res.status_code == 302:
+                    results['login'].append(elapsed)
+                elif res.status_code == 503:
+                    results['rejected'] += 1
+                else:
+                    results['failed'] += 1
+            if res.status_code == 503:
+                time.sleep(float(res.headers.get('Retry-After', 1)))  # Backs off like a browser user would
+
+    pool = [threading.Thread(target=dashboard, args=(c,)) for c in clients]
+    pool += [threading.Thread(target=login) for _ in range(login_clients)]
+    for t in pool: t.start()
+    for t in pool: t.join()
+    return results
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(0, int(len(values) * q) - 1)] * 1000 if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--login-clients', type=int, default=8)
+    parser.add_argument('--dashboard-clients', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'config':<22}{'dash req/s':>11}{'dash p50':>10}{'dash p95':>10}{'dash p99':>10}"
+          f"{'logins/s':>10}{'login p95':>11}{'503s':>7}")
+    for label, kind, threads, hash_workers, hash_queue in CONFIGS:
+        proc, url = start_server(kind, threads, hash_workers, hash_queue)
+        try:
+            r = run_load(url, args.seconds, args.login_clients, args.dashboard_clients)
+        finally:
+            proc.terminate()
+            proc.wait()
+        assert not r['failed'], f"{label}: {r['failed']} logins failed"
+        dash = r['dashboard']
+        print(f"{label:<22}{len(dash) / args.seconds:>11.1f}{statistics.median(dash) * 1000:>10.0f}"
+              f"{percentile(dash, 0.95):>10.0f}{percentile(dash, 0.99):>10.0f}"
+              f"{len(r['login']) / args.seconds:>10.2f}{percentile(r['login'], 0.95):>11.0f}{r['rejected']:>7}")
+    print("(latencies in ms)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+SQL statement budget per endpoint, read from the X-SQL-Statements header.
+
+Replays a typical session (dashboard, progress sync, toggles, a batch) and
+fails if any step runs more statements than its budget. Budgets are for a
+warm worker (user row and solved map cached); the first dashboard visit
+also backfills aggregates and is reported but not checked.
+
+Usage (from the repo root):
+    python benchmarks/bench_query_counts.py
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['SQL_COUNT_HEADER'] = '1'
+os.environ['FAST_STATE_URL'] = 'memory://'
+
+import app  # noqa: E402
+
+# (label, method, url, json body, budget or None)
+def session_steps(pid):
+    return [
+        ('first dashboard visit (backfill)', 'get', '/', None, None),
+        ('dashboard', 'get', '/', None, 4),
+        ('progress, full (map not cached yet)', 'get', '/api/progress', None, 2),
+        ('due queue', 'get', '/api/srs/due?limit=5', None, 1),
+        ('note', 'get', f'/api/notes/{pid}', None, 1),
+        ('note: first save', 'post', '/api/notes/save', {'problem_id': pid, 'content': '# Notes\n\ntwo pointers\n'}, 4),
+        ('note: save unchanged', 'post', '/api/notes/save', {'problem_id': pid, 'content': '# Notes\n\ntwo pointers\n'}, 1),
+        ('note: edit', 'post', '/api/notes/save', {'problem_id': pid, 'content': '# Notes\n\ntwo pointers, sorted\n'}, 9),
+        ('note search', 'get', '/api/notes/search?q=two+sort', None, 2),
+        ('toggle: solve', 'post', '/api/progress/toggle', {'problem_id': pid, 'solved': True}, 7),
+        ('toggle: solve again (no-op)', 'post', '/api/progress/toggle', {'problem_id': pid, 'solved': True}, 2),
+        ('progress after change', 'get', '/api/progress', None, 1),
+        ('progress, unchanged', 'get', '/api/progress', None, 1),
+        ('progress, revalidate (304)', 'get', '/api/progress', 'etag', 1),
+        ('batch: 3 solves', 'post', '/api/progress/batch', {'ops': [{'problem_id': pid + i, 'solved': True} for i in (1, 2, 3)]}, 9),
+        ('toggle: unsolve', 'post', '/api/progress/toggle', {'problem_id': pid, 'solved': False}, 6),
+        ('srs resolve', 'post', '/api/srs/resolve', {'problem_id': pid + 1}, 2),
+    ]
+
+def main():
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_queries', 'password': 'benchmark-pass'})
+    client.post('/login', data={'username': 'bench_queries', 'password': 'benchmark-pass'})
+    pid = int(app.CATALOG.data['ID'].iloc[0])
+
+    failures = []
+    etag = None
+    print(f"{'step':<36}{'statements':>11}{'budget':>8}")
+    for label, method, url, body, budget in session_steps(pid):
+        if body == 'etag':
+            res = client.get(url, headers={'If-None-Match': etag})
+        elif method == 'get':
+            res = client.get(url)
+        else:
+            res = client.post(url, json=body)
+        assert res.status_code in (200, 304), (label, res.status_code)
+        etag = res.headers.get('ETag', etag)
+        count = int(res.headers['X-SQL-Statements'])
+        print(f"{label:<36}{count:>11}{budget if budget is not None else '-':>8}")
+        if budget is not None and count > budget:
+            failures.append(f"{label}: {count} statements > budget {budget}")
+
+    print(f"user cache {app.USER_CACHE.hits} hits / {app.USER_CACHE.misses} misses, "
+          f"solved cache {app.SOLVED_CACHE.hits} hits / {app.SOLVED_CACHE.misses} misses")
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Recommender benchmark: vectorized scoring vs a per-row Python loop, and the per-user cache.
+
+For users with 0..2000 random solves, checks that Recommender.recommend
+returns the same top 50 as a straightforward per-problem Python
+implementation of the same formula, then times both. Finally it measures
+GET /api/recommendations cold (right after a progress change) and warm
+(cached), with SQL statements per request.
+
+Usage (from the repo root):
+    python benchmarks/bench_recommender.py [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+os.environ['SQL_COUNT_HEADER'] = '1'
+
+import app  # noqa: E402
+from recommender import PROXIMITY_CAP, WEIGHTS  # noqa: E402
+
+
+def per_row(catalog, solved_ids, recent_ids, limit):
+    """The same formula, one problem at a time."""
+    rec = catalog.recommender
+    topic_of = catalog.roadmaps.topic_of
+    group_size, group_solved = {}, {}
+    for slug, ids in catalog.roadmaps.topic_ids().items():
+        group = rec.group_of_slug.get(slug)
+        group_size[group] = group_size.get(group, 0) + len(ids)
+    for pid in solved_ids:
+        group = rec.group_of_slug.get(topic_of(pid))
+        if group is not None: group_solved[group] = group_solved.get(group, 0) + 1
+    links = {}
+    for seed in recent_ids:
+        pos = int(catalog.index.positions([seed])[0])
+        for j in catalog.graph.similar_idx[catalog.graph.similar_ptr[pos]:catalog.graph.similar_ptr[pos + 1]].tolist():
+            links[j] = links.get(j, 0) + 1
+    n = len(catalog.index)
+    ranked = sorted(catalog.index, key=lambda p: -p.signal_score)
+    quality = {p.id: 1 - i / (n - 1) for i, p in enumerate(ranked)}
+    scored = []
+    for pos, p in enumerate(catalog.index):
+        if p.id in solved_ids: continue
+        group = rec.group_of_slug.get(p.assigned_topic)
+        weakness = 1 - group_solved.get(group, 0) / group_size[group] if group_size.get(group) else 0.0
+        score = (WEIGHTS['quality'] * quality[p.id] + WEIGHTS['weakness'] * weakness
+                 + WEIGHTS['proximity'] * min(links.get(pos, 0), PROXIMITY_CAP) / PROXIMITY_CAP)
+        scored.append((-score, -quality[p.id], p.id))
+    scored.sort()
+    return [pid for _, _, pid in scored[:limit]]
+
+def vectorized(catalog, solved_ids, recent_ids, limit):
+    solved = catalog.index.positions(list(solved_ids))
+    recent = catalog.index.positions(recent_ids)
+    return catalog.recommender.recommend(solved, recent, limit)
+
+def best_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = app.CATALOG
+    ids = catalog.data['ID'].tolist()
+    rng = random.Random(0)
+    print(f"{'solved':>7}{'per-row Python (ms)':>21}{'vectorized (ms)':>17}{'speedup':>9}")
+    for size in (0, 50, 500, 2000):
+        solved = rng.sample(ids, size)
+        solved_ids, recent_ids = set(solved), solved[:30]
+        got = [r['id'] for r in vectorized(catalog, solved_ids, recent_ids, 50)]
+        want = per_row(catalog, solved_ids, recent_ids, 50)
+        assert got == want, (size, got[:10], want[:10])
+        t_slow = best_ms(lambda: per_row(catalog, solved_ids, recent_ids, 50), max(3, args.repeat // 5))
+        t_fast = best_ms(lambda: vectorized(catalog, solved_ids, recent_ids, 50), args.repeat)
+        print(f"{size:>7}{t_slow:>21.2f}{t_fast:>17.2f}{t_slow / t_fast:>8.0f}x")
+
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_recs', 'password': 'benchmark-pass'})
+    client.get('/')
+    cold, warm, cold_sql, warm_sql = [], [], [], []
+    for pid in rng.sample(ids, args.repeat):
+        client.post('/api/progress/toggle', json={'problem_id': pid, 'solved': True})
+        for latencies, statements in ((cold, cold_sql), (warm, warm_sql)):
+            start = time.perf_counter()
+            res = client.get('/api/recommendations')
+            latencies.append(time.perf_counter() - start)
+            assert res.status_code == 200
+            statements.append(int(res.headers['X-SQL-Statements']))
+    print(f"GET /api/recommendations after a progress change: p50 {statistics.median(cold) * 1000:.2f} ms, "
+          f"{statistics.mean(cold_sql):.1f} SQL statements")
+    print(f"GET /api/recommendations cached:                  p50 {statistics.median(warm) * 1000:.2f} ms, "
+          f"{statistics.mean(warm_sql):.1f} SQL statements")
+    print(f"recommendation cache: {app.RECOMMEND_CACHE.hits} hits / {app.RECOMMEND_CACHE.misses} misses")
+
+if __name__ == '__main__':
+    main()
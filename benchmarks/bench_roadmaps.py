@@ -0,0 +1,73 @@
+"""
+Roadmap engine benchmark: load-time cost vs first-request latency for each mode,
+plus a single-flight check (concurrent lazy requests must build a topic once).
+
+Usage (from the repo root):
+    python benchmarks/bench_roadmaps.py [--threads 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import app  # noqa: E402
+from roadmap import RoadmapEngine  # noqa: E402
+
+
+def logged_in_client():
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_roadmap', 'password': 'benchmark-pass'})
+    client.post('/login', data={'username': 'bench_roadmap', 'password': 'benchmark-pass'})
+    return client
+
+def timed_get(client, url):
+    start = time.perf_counter()
+    res = client.get(url)
+    assert res.status_code == 200, res.status_code
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    client = logged_in_client()
+    print(f"{'mode':<8}{'load (ms)':>12}{'1st / (ms)':>14}{'2nd / (ms)':>14}")
+    for mode in ('lazy', 'eager'):
+        start = time.perf_counter()
+        app.CATALOG = app.CATALOG._replace(roadmaps=RoadmapEngine(app.CATALOG.data, app.SLUG_TO_NAME_MAP, mode=mode))
+        t_load = time.perf_counter() - start
+        t_first = timed_get(client, '/')
+        t_second = timed_get(client, '/')
+        print(f"{mode:<8}{t_load * 1000:>12.2f}{t_first * 1000:>14.2f}{t_second * 1000:>14.2f}")
+
+    # Single-flight: N threads race on one cold topic
+    engine = RoadmapEngine(app.CATALOG.data, app.SLUG_TO_NAME_MAP, mode='lazy')
+    barrier = threading.Barrier(args.threads)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(engine.get('arrays-hashing'))
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert engine.misses == 1, f"expected one build, got {engine.misses}"
+    assert all(r is results[0] for r in results)
+    print(f"single-flight: {args.threads} concurrent requests -> {engine.misses} build")
+
+    slowest = max(engine.build_seconds.items(), key=lambda kv: kv[1])
+    print(f"slowest topic build: {slowest[0]} {slowest[1] * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Scoring engine benchmark: vectorized load_data() vs the legacy row-wise apply.
+
+Also acts as the parity check for the columnar engine -- it recomputes the old
+per-row like ratio / signal score and fails loudly if the two ever disagree.
+
+Usage (from the repo root):
+    python benchmarks/bench_scoring.py [--repeat 5]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+import app  # noqa: E402
+
+
+# --- LEGACY ROW-WISE REFERENCE (pre-vectorization) ---
+def legacy_parse_subs(x):
+    s = str(x).upper().strip()
+    if 'M' in s: return int(float(s.replace('M', '')) * 1000000)
+    if 'K' in s: return int(float(s.replace('K', '')) * 1000)
+    try: return int(float(s))
+    except: return 0
+
+def legacy_like_ratio(r):
+    total = r['Likes'] + r['Dislikes']
+    return (r['Likes'] / total) * min(total / 1000, 1) * 100 if total > 0 else 0
+
+def legacy_signal_score(row):
+    sub_score = math.log1p(row.get('TotalSubmissions', 0)) * 2
+    like_score = row.get('adjusted_like_ratio', 0) * 0.5
+    rate = row.get('AcceptanceRate', 0)
+    diff = row.get('Difficulty', 'Medium')
+    optimal = app.ACCEPTANCE_TARGETS.get(diff, 52.5)
+    spread = app.ACCEPTANCE_SPREADS.get(diff, 17.5)
+    deviation = abs(rate - optimal) / spread
+    acc_bonus = max(0, 20 * math.exp(-deviation**2))
+    multiplier = 2.5 if row['ID'] in app.CLASSIC_PROBLEM_IDS else 1.0
+    return (sub_score + like_score + acc_bonus) * multiplier
+
+def read_frame():
+    df = pd.read_csv('leetcode_with_submissions.csv')
+    df.rename(columns={'Acceptance Rate (%)': 'AcceptanceRate', 'Premium Only': 'PremiumOnly', 'Total Submissions': 'TotalSubmissions'}, inplace=True)
+    return df[(df['Category'] == 'Algorithms') & (df['PremiumOnly'] == False)].copy()
+
+def score_legacy(df):
+    df['TotalSubmissions'] = df['TotalSubmissions'].fillna(0).apply(legacy_parse_subs)
+    df['adjusted_like_ratio'] = df.apply(legacy_like_ratio, axis=1)
+    df['signal_score'] = df.apply(legacy_signal_score, axis=1)
+    return df
+
+def score_vectorized(df):
+    df['TotalSubmissions'] = app.parse_submissions(df['TotalSubmissions'])
+    df['adjusted_like_ratio'] = app.calculate_like_ratios(df['Likes'], df['Dislikes'])
+    df['signal_score'] = app.calculate_signal_scores(df)
+    return df
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    base = read_frame()
+
+    # Parity: every scored column must match the row-wise reference
+    legacy = score_legacy(base.copy())
+    vector = score_vectorized(base.copy())
+    assert (legacy['TotalSubmissions'].to_numpy() == vector['TotalSubmissions'].to_numpy()).all(), "TotalSubmissions mismatch"
+    for col in ('adjusted_like_ratio', 'signal_score'):
+        assert np.allclose(legacy[col].to_numpy(dtype=float), vector[col].to_numpy(dtype=float), rtol=1e-12, atol=1e-9), f"{col} mismatch"
+    print(f"✅ Parity OK over {len(base)} problems")
+
+    t_legacy = best_of(lambda: score_legacy(base.copy()), args.repeat)
+    t_vector = best_of(lambda: score_vectorized(base.copy()), args.repeat)
+    t_load = best_of(app.load_data, args.repeat)
+
+    print(f"Scoring (row-wise apply): {t_legacy * 1000:8.2f} ms")
+    print(f"Scoring (vectorized):     {t_vector * 1000:8.2f} ms  ({t_legacy / t_vector:.1f}x)")
+    print(f"Full load_data():         {t_load * 1000:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
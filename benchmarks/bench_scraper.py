@@ -0,0 +1,89 @@
+"""
+Scraper throughput benchmark against the local LeetCode stub.
+
+Serves a synthetic catalog of --problems questions (the real CSV, cloned with
+suffixed slugs) with --latency-ms per GraphQL call, then runs helper.py in a
+subprocess for each configuration and reports problems/sec, request count and
+the child's peak RSS (from wait4). Every run's CSV is checked against the
+batch-size-1 output.
+
+Usage (from the repo root):
+    python benchmarks/bench_scraper.py [--problems 10000] [--latency-ms 40]
+"""
+import argparse
+import copy
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from leetcode_stub import recordings_from_csv, start_stub  # noqa: E402
+
+CONFIGS = [
+    # (label, batch size, window)
+    ('one slug per request', 1, 1000),
+    ('aliased batches of 20', 20, 1000),
+    ('aliased batches of 50', 50, 1000),
+    ('batches of 20, window 200', 20, 200),
+]
+
+
+def scaled_recordings(problems):
+    base = recordings_from_csv(os.path.join(ROOT, 'leetcode_with_submissions.csv'))
+    pairs, questions = [], {}
+    copy_no = 0
+    while len(pairs) < problems:
+        for item in base['all']['stat_status_pairs']:
+            if len(pairs) == problems: break
+            item = copy.deepcopy(item)
+            stat = item['stat']
+            slug = stat['question__title_slug'] + (f'-{copy_no}' if copy_no else '')
+            questions[slug] = base['questions'][stat['question__title_slug']]
+            stat['question__title_slug'] = slug
+            stat['frontend_question_id'] += copy_no * 10000
+            pairs.append(item)
+        copy_no += 1
+    return {'all': {'stat_status_pairs': pairs}, 'questions': questions}
+
+def run_helper(base_url, out, batch_size, window, concurrency):
+    cmd = [sys.executable, os.path.join(ROOT, 'helper.py'), '--base-url', base_url, '--out', out, '--fresh',
+           '--rate', '0', '--concurrency', str(concurrency), '--batch-size', str(batch_size), '--window', str(window)]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    stderr = proc.stderr.read().decode()
+    proc.stderr.close()
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise SystemExit(f"helper.py failed:\n{stderr}")
+    return elapsed, usage.ru_maxrss / 1024  # ru_maxrss is KiB on Linux
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--problems', type=int, default=10000)
+    parser.add_argument('--latency-ms', type=float, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = start_stub(scaled_recordings(args.problems), latency_ms=args.latency_ms)
+    workdir = tempfile.mkdtemp()
+    reference = None
+    print(f"{args.problems} problems, {args.latency_ms:.0f} ms per request, concurrency {args.concurrency}")
+    print(f"{'config':<28}{'seconds':>9}{'problems/s':>12}{'requests':>10}{'peak RSS (MB)':>15}")
+    for label, batch_size, window in CONFIGS:
+        out = os.path.join(workdir, f'b{batch_size}-w{window}.csv')
+        before = server.requests
+        elapsed, rss = run_helper(base_url, out, batch_size, window, args.concurrency)
+        requests = server.requests - before
+        if reference is None: reference = out
+        assert filecmp.cmp(reference, out, shallow=False), f"{label}: CSV differs from {reference}"
+        print(f"{label:<28}{elapsed:>9.2f}{args.problems / elapsed:>12.0f}{requests:>10}{rss:>15.1f}")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Catalog search benchmark on a synthetic catalog (default 100k problems).
+
+Titles are 2-6 words drawn from the real catalog's title vocabulary with
+its word frequencies; tags, difficulty and roadmap topic are copied from
+random real rows. Reports the SearchIndex build time and size, then
+latency percentiles per query class (typeahead prefixes, multi-word
+queries, facet-only browsing, text + facets + solved filter) next to a
+pandas str.contains scan. Result sets are checked against a brute-force
+prefix match first.
+
+Usage (from the repo root):
+    python benchmarks/bench_search.py [--problems 100000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import app  # noqa: E402
+from search_index import SearchIndex, tokenize  # noqa: E402
+
+
+def synthetic_catalog(real, size, rng):
+    counts = Counter(w for title in real['Title'] for w in title.split())
+    words, weights = zip(*counts.items())
+    rows = real.iloc[rng.integers(0, len(real), size)].reset_index(drop=True)
+    lengths = rng.integers(2, 7, size)
+    picks = iter(random.Random(0).choices(words, weights=weights, k=int(lengths.sum())))
+    return pd.DataFrame({
+        'ID': np.arange(1, size + 1),
+        'Title': [' '.join(next(picks) for _ in range(k)) for k in lengths],
+        'Topics': rows['Topics'],
+        'Difficulty': rows['Difficulty'],
+        'AssignedTopic': rows['AssignedTopic'],
+        'signal_score': rng.random(size) * 100,
+    })
+
+def query_mix(df, count, rng):
+    """(class, kwargs for SearchIndex.search) pairs."""
+    titles = df['Title'].tolist()
+    topics = sorted(df['AssignedTopic'].unique())
+    queries = []
+    for i in range(count):
+        words = titles[rng.integers(len(titles))].lower().split()
+        kind = i % 4
+        if kind == 0:
+            word = words[0]
+            queries.append(('typeahead', {'query': word[:rng.integers(1, min(len(word), 5) + 1)]}))
+        elif kind == 1:
+            phrase = words[:rng.integers(2, 4)]
+            phrase[-1] = phrase[-1][:max(2, len(phrase[-1]) - 2)]  # Still typing the last word
+            queries.append(('multi-word', {'query': ' '.join(phrase)}))
+        elif kind == 2:
+            queries.append(('facets only', {'difficulties': ['Medium'], 'topics': [topics[rng.integers(len(topics))]]}))
+        else:
+            queries.append(('text + facets + solved', {'query': words[0][:3], 'difficulties': ['Easy', 'Hard'], 'solved': False}))
+    return queries
+
+def brute_force(df, query='', difficulties=(), topics=(), solved=None, solved_set=frozenset()):
+    terms = list(dict.fromkeys(tokenize(query)))
+    hits = set()
+    for i, (pid, title, tags, diff, topic) in enumerate(zip(df['ID'], df['Title'], df['Topics'], df['Difficulty'], df['AssignedTopic'])):
+        words = set(tokenize(title)) | {str(pid)} | set(tokenize(' '.join(tags)))
+        if not all(any(w.startswith(t) for w in words) for t in terms): continue
+        if difficulties and diff not in difficulties: continue
+        if topics and topic not in topics: continue
+        if solved is not None and (i in solved_set) != solved: continue
+        hits.add(i)
+    return hits
+
+def pandas_scan(df, query='', difficulties=(), topics=(), solved=None, solved_mask=None):
+    mask = pd.Series(True, index=df.index)
+    for term in tokenize(query):
+        mask &= df['Title'].str.contains(term, case=False, regex=False)
+    if difficulties: mask &= df['Difficulty'].isin(difficulties)
+    if topics: mask &= df['AssignedTopic'].isin(topics)
+    if solved is not None: mask &= solved_mask if solved else ~solved_mask
+    return df[mask].sort_values('signal_score', ascending=False).head(20)
+
+def percentiles(timings):
+    timings = np.sort(np.array(timings) * 1000)
+    return [timings[max(0, int(len(timings) * q) - 1)] for q in (0.5, 0.95, 0.99)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--problems', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = synthetic_catalog(app.CATALOG.data, args.problems, rng)
+    start = time.perf_counter()
+    index = SearchIndex(df)
+    t_build = time.perf_counter() - start
+    print(f"catalog: {len(df):,} problems, {len(index.vocab):,} tokens; "
+          f"build {t_build * 1000:.0f} ms, {index.nbytes / 2**20:.1f} MiB of arrays")
+
+    solved_positions = rng.choice(len(df), 1000, replace=False)
+    solved_set = frozenset(solved_positions.tolist())
+    solved_mask = pd.Series(False, index=df.index)
+    solved_mask.iloc[solved_positions] = True
+    queries = query_mix(df, args.queries, rng)
+
+    for _, kwargs in queries[:20]:
+        page, total, _ = index.search(**kwargs, solved_positions=solved_positions, limit=10**9)
+        assert set(page.tolist()) == brute_force(df, **kwargs, solved_set=solved_set), kwargs
+        assert total == len(page)
+
+    timings = {}
+    for cls, kwargs in queries:
+        start = time.perf_counter()
+        index.search(**kwargs, solved_positions=solved_positions)
+        timings.setdefault(cls, []).append(time.perf_counter() - start)
+    scan_timings = {}
+    for cls, kwargs in queries[:80]:  # The scan is slow; a slice is enough
+        start = time.perf_counter()
+        pandas_scan(df, **kwargs, solved_mask=solved_mask)
+        scan_timings.setdefault(cls, []).append(time.perf_counter() - start)
+
+    print(f"{'query class':<24}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'pandas scan p50':>17}")
+    for cls, ts in timings.items():
+        p50, p95, p99 = percentiles(ts)
+        print(f"{cls:<24}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{percentiles(scan_timings[cls])[0]:>17.2f}")
+    p50, p95, p99 = percentiles([t for ts in timings.values() for t in ts])
+    print(f"{'(all)':<24}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}")
+
+if __name__ == '__main__':
+    main()
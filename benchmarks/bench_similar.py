@@ -0,0 +1,124 @@
+"""
+Similar-problems microbenchmark: resolving neighbours per request vs the prebuilt ProblemGraph.
+
+The per-request baseline is what the endpoint would do without the graph:
+json.loads each problem's "Similar Questions" and map slugs to IDs (with a
+prebuilt slug dict, which flatters it), BFS for k hops in Python, and scan
+every record for shared tags. Parity is checked against the graph first.
+
+Usage (from the repo root):
+    python benchmarks/bench_similar.py [--queries 500]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import app  # noqa: E402
+from problem_graph import ProblemGraph, slug_from_link  # noqa: E402
+
+
+def per_request_similar(index, id_by_slug, pid, hops):
+    """{id: hops}, resolving similar questions from the raw JSON on every call (both directions, like the graph)."""
+    reverse = {}
+    for p in index:  # Reverse links need a full pass: that's the point of precomputing
+        if len(p.similar_questions) > 2:
+            for entry in json.loads(p.similar_questions):
+                j = id_by_slug.get(entry['titleSlug'])
+                if j is not None: reverse.setdefault(j, set()).add(p.id)
+    dist, frontier = {pid: 0}, [pid]
+    for d in range(1, hops + 1):
+        nxt = []
+        for q in frontier:
+            raw = index.get(q).similar_questions
+            out = {id_by_slug.get(e['titleSlug']) for e in json.loads(raw)} if len(raw) > 2 else set()
+            for j in (out | reverse.get(q, set())) - {None}:
+                if j not in dist:
+                    dist[j] = d
+                    nxt.append(j)
+        frontier = nxt
+    del dist[pid]
+    return dist
+
+def per_request_topic(index, pid, idf, limit):
+    tags = set(index.get(pid).topics)
+    scored = []
+    for p in index:
+        shared = tags.intersection(p.topics)
+        if shared and p.id != pid:
+            scored.append((-round(sum(idf[t] for t in shared), 6), -p.signal_score, p.id))
+    scored.sort()
+    return [s[2] for s in scored[:limit]]
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for q in queries: fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    catalog = app.CATALOG
+    index = catalog.index
+    start = time.perf_counter()
+    graph = ProblemGraph(catalog.data)
+    t_build = time.perf_counter() - start
+    id_by_slug = {slug_from_link(p.link): p.id for p in index}
+    idf = dict(zip(graph.tag_names, graph.tag_idf))
+    ids = [p.id for p in index]
+    sample = [random.choice(ids) for _ in range(args.queries)]
+    pos_of = dict(zip(ids, index.positions(ids).tolist()))
+
+    # Parity on a slice of the sample
+    for pid in sample[:50]:
+        for hops in (1, 2):
+            found, dist = graph.similar(pos_of[pid], hops)
+            assert dict(zip(graph.ids[found].tolist(), dist.tolist())) == per_request_similar(index, id_by_slug, pid, hops)
+        found, _, _ = graph.neighbours(pos_of[pid], 'topic', limit=10)
+        assert graph.ids[found].tolist() == per_request_topic(index, pid, idf, 10)
+
+    print(f"catalog: {len(graph)} problems, {len(graph.similar_idx) // 2} similar-question links, "
+          f"{len(graph.tag_names)} tags; build {t_build * 1000:.1f} ms, {graph.nbytes / 1024:.0f} KiB of arrays")
+    print(f"{'query':<24}{'per request (us)':>18}{'graph (us)':>12}{'speedup':>10}")
+    slow_sample = sample[:max(10, args.queries // 20)]  # The baseline is slow; a slice is enough
+    rows = [
+        ('similar, 1 hop', lambda q: per_request_similar(index, id_by_slug, q, 1), lambda q: graph.neighbours(pos_of[q], 'similar', 1)),
+        ('similar, 3 hops', lambda q: per_request_similar(index, id_by_slug, q, 3), lambda q: graph.neighbours(pos_of[q], 'similar', 3)),
+        ('shared topics, top 10', lambda q: per_request_topic(index, q, idf, 10), lambda q: graph.neighbours(pos_of[q], 'topic')),
+    ]
+    for label, slow, fast in rows:
+        t_slow = per_query_us(slow, slow_sample)
+        t_fast = per_query_us(fast, sample)
+        print(f"{label:<24}{t_slow:>18.1f}{t_fast:>12.1f}{t_slow / t_fast:>9,.0f}x")
+    t_all = per_query_us(lambda q: graph.neighbours(pos_of[q], 'all', 2, difficulties=['Medium'], limit=20), sample)
+    print(f"{'all, 2 hops, filtered':<24}{'':>18}{t_all:>12.1f}")
+
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    client = app.app.test_client()
+    client.post('/signup', data={'username': 'bench_similar', 'password': 'benchmark-pass'})
+    latencies = []
+    for pid in sample[:200]:
+        start = time.perf_counter()
+        res = client.get(f'/api/problems/{pid}/similar?kind=all&hops=2')
+        latencies.append(time.perf_counter() - start)
+        assert res.status_code == 200
+    latencies.sort()
+    print(f"GET /api/problems/<id>/similar?kind=all&hops=2: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[math.ceil(len(latencies) * 0.99) - 1] * 1000:.2f} ms (whole request)")
+
+if __name__ == '__main__':
+    main()
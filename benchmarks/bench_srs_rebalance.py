@@ -0,0 +1,152 @@
+"""
+SRS rebalance benchmark: the nightly `flask srs-rebalance` job over a large solved_problem table.
+
+Seeds --rows SolvedProblem rows (default 10M) into SQLite for --users users.
+Each user reviews in a few sessions, so due dates cluster the way real
+ones do. The benchmark then:
+1. Runs rebalance_reviews() end to end: rows/s, peak RSS (bounded by --chunk,
+   not by the table), and the per-user busiest-day figures. A
+   second run has to change nothing.
+2. Times the SM-2 step and spread_offsets on all rows in memory, next to
+   a per-row Python SM-2 loop, after checking on a sample that both give
+   the same result.
+
+Usage (from the repo root):
+    python benchmarks/bench_srs_rebalance.py [--rows 10000000] [--users 50000] [--chunk 50000]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_srs.db')
+os.environ.setdefault('FAST_STATE_URL', 'memory://')
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+import numpy as np  # noqa: E402
+
+import app  # noqa: E402
+import srs  # noqa: E402
+from app import db  # noqa: E402
+
+SEED_CHUNK = 200000
+SESSIONS = 4  # Review sessions per user in the last two months
+
+
+def synthetic_rows(start, count, per_user, today, rng):
+    """(problem_id, solved_at, user_id, next_review_at, srs_interval, srs_ease, srs_reps, last_reviewed_at) tuples."""
+    idx = np.arange(start, start + count)
+    users = idx // per_user + 1
+    reps = rng.integers(1, 6, count)
+    ease = np.round(rng.uniform(1.8, 2.8, count), 2)
+    interval = np.where(reps == 1, 1.0, np.where(reps == 2, 6.0, 6.0 * ease ** (reps - 2)))
+    # Each user reviews on a few session days; everything from one session comes due together
+    session_day = (users * 7919 + rng.integers(0, SESSIONS, count) * 13) % 60
+    reviewed = np.datetime64(today, 'D') - session_day.astype('timedelta64[D]') + np.timedelta64(20, 'h')
+    due = reviewed + np.rint(interval).astype('timedelta64[D]')
+    to_text = lambda a: np.char.replace(np.datetime_as_string(a.astype('datetime64[us]'), unit='us'), 'T', ' ').tolist()
+    return list(zip((idx % per_user + 1).tolist(), to_text(reviewed - np.timedelta64(90, 'D')), users.tolist(),
+                    to_text(due), interval.tolist(), ease.tolist(), reps.tolist(), to_text(reviewed)))
+
+def seed(rows, users, today):
+    rng = np.random.default_rng(0)
+    per_user = -(-rows // users)
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO user (id, username, password) VALUES " + ",".join(f"({u}, 'u{u}', 'x')" for u in range(1, users + 1)))
+        for start in range(0, rows, SEED_CHUNK):
+            conn.exec_driver_sql(
+                "INSERT INTO solved_problem (problem_id, solved_at, user_id, next_review_at, srs_interval, srs_ease, srs_reps, last_reviewed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", synthetic_rows(start, min(SEED_CHUNK, rows - start), per_user, today, rng))
+        conn.exec_driver_sql("ANALYZE")
+
+def per_row_review(interval, ease, reps, grade):
+    """SM-2 as a plain per-row loop, for parity and speed comparison."""
+    out = []
+    for i, e, r, q in zip(interval, ease, reps, grade):
+        e = max(srs.MIN_EASE, e + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+        if q < srs.PASSING_GRADE:
+            out.append((1.0, e, 0))
+        else:
+            out.append((1.0 if r <= 0 else 6.0 if r == 1 else i * e, e, r + 1))
+    return out
+
+def rss_mib():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+def peak_rss_during(fn, *args, **kwargs):
+    """(fn's result, RSS before in MiB, peak RSS while it ran), sampling every 10 ms."""
+    base, done = rss_mib(), threading.Event()
+    peak = [base]
+    def sample():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], rss_mib())
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        return fn(*args, **kwargs), base, peak[0]
+    finally:
+        done.set()
+        sampler.join()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--chunk', type=int, default=app.REBALANCE_CHUNK)
+    args = parser.parse_args()
+    today = datetime.utcnow().date()
+
+    with app.app.app_context():
+        start = time.perf_counter()
+        seed(args.rows, args.users, today)
+        print(f"seeded {args.rows:,} rows for {args.users:,} users in {time.perf_counter() - start:.0f} s")
+
+        start = time.perf_counter()
+        summary, rss_before, rss_peak = peak_rss_during(app.rebalance_reviews, args.chunk, today=today)
+        elapsed = time.perf_counter() - start
+        users = max(summary['users'], 1)
+        print(f"rebalance: {summary['rows']:,} rows in {elapsed:.1f} s ({summary['rows'] / elapsed:,.0f} rows/s), "
+              f"{summary['changed']:,} rescheduled; RSS {rss_before:.0f} -> peak {rss_peak:.0f} MiB (chunk {args.chunk:,})")
+        print(f"busiest day in the next {app.REBALANCE_HORIZON_DAYS} days, mean per user: "
+              f"{summary['peak_before'] / users:.1f} -> {summary['peak_after'] / users:.1f} "
+              f"(worst user {summary['max_before']} -> {summary['max_after']})")
+        start = time.perf_counter()
+        again = app.rebalance_reviews(args.chunk, today=today)
+        assert again['changed'] == 0, again
+        print(f"second run: 0 rescheduled in {time.perf_counter() - start:.1f} s")
+
+    rng = np.random.default_rng(1)
+    n = args.rows
+    interval = rng.choice([1.0, 6.0, 15.0, 37.5, 93.75], n)
+    ease = rng.uniform(1.3, 3.0, n)
+    reps = rng.integers(0, 6, n)
+    grade = rng.integers(0, 6, n)
+    sample = slice(0, 200000)
+    want = per_row_review(interval[sample].tolist(), ease[sample].tolist(), reps[sample].tolist(), grade[sample].tolist())
+    got = srs.review(interval[sample], ease[sample], reps[sample], grade[sample])
+    assert np.allclose(np.array(want, dtype=float), np.column_stack(got)), 'vectorized SM-2 differs from the per-row loop'
+
+    start = time.perf_counter()
+    per_row_review(interval[sample].tolist(), ease[sample].tolist(), reps[sample].tolist(), grade[sample].tolist())
+    t_loop = (time.perf_counter() - start) * n / 200000
+    start = time.perf_counter()
+    srs.review(interval, ease, reps, grade)
+    t_review = time.perf_counter() - start
+    users = rng.integers(0, args.users, n)
+    days = rng.integers(1, 120, n)
+    start = time.perf_counter()
+    srs.spread_offsets(users, days, srs.spread_window(interval), np.arange(n))
+    t_spread = time.perf_counter() - start
+    print(f"in memory, {n:,} rows: SM-2 step {t_review:.2f} s (per-row Python ~{t_loop:.1f} s, "
+          f"{t_loop / t_review:.0f}x), spread_offsets {t_spread:.2f} s")
+
+if __name__ == '__main__':
+    main()
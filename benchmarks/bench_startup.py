@@ -0,0 +1,60 @@
+"""
+Worker boot benchmark: cold `import app` parsing the CSV vs loading the snapshot.
+
+Each sample is a fresh interpreter (what a gunicorn worker / `flask db upgrade`
+pays), so numbers include Flask + pandas import overhead.
+
+Usage (from the repo root):
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = (
+    "import time; t = time.perf_counter(); import app; "
+    "t_import = time.perf_counter() - t; "
+    "t = time.perf_counter(); app.load_data(); "
+    "print(t_import, time.perf_counter() - t)"
+)
+
+def sample(env, runs):
+    imports, loads = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        wall = time.perf_counter() - start
+        _, t_load = map(float, out.stdout.strip().splitlines()[-1].split())
+        imports.append(wall)
+        loads.append(t_load)
+    return statistics.median(imports), statistics.median(loads)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.db'))
+    snapshot = os.path.join(tmp, 'catalog.snapshot')
+
+    csv_env = dict(env, CATALOG_SNAPSHOT=os.path.join(tmp, 'missing.snapshot'))
+    snap_env = dict(env, CATALOG_SNAPSHOT=snapshot, FLASK_APP='app.py')
+    subprocess.run([sys.executable, '-m', 'flask', 'build-catalog'], cwd=ROOT, env=snap_env, capture_output=True, check=True)
+
+    boot_csv, load_csv = sample(csv_env, args.runs)
+    boot_snap, load_snap = sample(snap_env, args.runs)
+
+    print(f"{'source':<10}{'worker boot (ms)':>20}{'load_data (ms)':>18}")
+    print(f"{'CSV':<10}{boot_csv * 1000:>20.1f}{load_csv * 1000:>18.2f}")
+    print(f"{'snapshot':<10}{boot_snap * 1000:>20.1f}{load_snap * 1000:>18.2f}")
+    print(f"load_data speedup: {load_csv / load_snap:.1f}x")
+
+if __name__ == '__main__':
+    main()
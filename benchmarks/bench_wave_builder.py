@@ -0,0 +1,59 @@
+"""
+Wave builder scaling benchmark over a synthetic catalog.
+
+Builds every topic roadmap for catalogs of increasing size, both with the
+default 60-item cap and uncapped (every problem placed), and reports the cost
+per problem -- a flat ns/problem column means the builder is linear.
+
+Usage (from the repo root):
+    python benchmarks/bench_wave_builder.py [--sizes 10000 50000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from roadmap import DEFAULT_ROADMAP_CONFIG, build_roadmap  # noqa: E402
+
+TOPICS = 18
+
+
+def synthetic_catalog(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ID': np.arange(1, n + 1),
+        'Title': [f"Problem {i}" for i in range(1, n + 1)],
+        'Difficulty': rng.choice(['Easy', 'Medium', 'Hard'], size=n, p=[0.3, 0.5, 0.2]),
+        'AssignedTopic': rng.integers(0, TOPICS, size=n),
+        'signal_score': rng.gamma(2.0, 10.0, size=n),
+    })
+
+def build_all(df, config):
+    placed = 0
+    start = time.perf_counter()
+    for _, df_topic in df.groupby('AssignedTopic', sort=False):
+        placed += len(build_roadmap(df_topic, config))
+    return time.perf_counter() - start, placed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    uncapped = {**DEFAULT_ROADMAP_CONFIG, 'max_items': float('inf')}
+    print(f"{'problems':>10}{'capped (ms)':>14}{'uncapped (ms)':>16}{'placed':>10}{'ns/problem':>12}")
+    for n in args.sizes:
+        df = synthetic_catalog(n)
+        t_capped, _ = build_all(df, DEFAULT_ROADMAP_CONFIG)
+        t_full, placed = build_all(df, uncapped)
+        assert placed == n
+        print(f"{n:>10}{t_capped * 1000:>14.1f}{t_full * 1000:>16.1f}{placed:>10}{t_full / n * 1e9:>12.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Local stand-in for the LeetCode endpoints helper.py talks to, for offline runs.
+
+Serves GET /api/problems/all/ and POST /graphql from recorded responses: either
+a file written by `helper.py --record`, or responses synthesized from an
+existing catalog CSV. Can inject latency, failures and stat drift to exercise
+retries and --incremental.
+
+Usage (from the repo root):
+    python benchmarks/leetcode_stub.py --from-csv leetcode_with_submissions.csv --port 8765
+    python helper.py --base-url http://127.0.0.1:8765 --out /tmp/catalog.csv
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LEVELS = {"Easy": 1, "Medium": 2, "Hard": 3}
+
+
+def parse_count(value):
+    s = str(value).upper().strip()
+    scale = 1000000 if "M" in s else 1000 if "K" in s else 1
+    try:
+        return int(float(s.replace("M", "").replace("K", "")) * scale)
+    except ValueError:
+        return 0
+
+def recordings_from_csv(path):
+    """Builds REST + GraphQL responses that round-trip to the rows of `path`."""
+    pairs, questions = [], {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            slug = row["Link"].rstrip("/").rsplit("/", 1)[-1]
+            submitted = max(parse_count(row.get("Total Submissions", 0)), 1)
+            rate = float(row.get("Acceptance Rate (%)") or 0)
+            pairs.append({
+                "stat": {
+                    "frontend_question_id": int(row["ID"]), "question__title": row["Title"],
+                    "question__title_slug": slug, "total_submitted": submitted,
+                    "total_acs": int(round(submitted * rate / 100)),
+                },
+                "difficulty": {"level": LEVELS.get(row["Difficulty"], 0)},
+                "paid_only": row["Premium Only"] == "True",
+            })
+            questions[slug] = {
+                "topicTags": [{"name": t.strip()} for t in row["Topics"].split(",") if t.strip()],
+                "categoryTitle": row["Category"],
+                "likes": int(row["Likes"] or 0), "dislikes": int(row["Dislikes"] or 0),
+                "stats": json.dumps({"totalSubmission": row.get("Total Submissions", ""), "totalAccepted": row.get("Total Accepted", "")}),
+                "similarQuestions": row["Similar Questions"],
+            }
+    return {"all": {"stat_status_pairs": pairs}, "questions": questions}
+
+def bump_stats(recordings, fraction, seed=0):
+    """Grow submissions for a random `fraction` of problems (simulates a day of traffic)."""
+    rng = random.Random(seed)
+    bumped = []
+    for item in recordings["all"]["stat_status_pairs"]:
+        if rng.random() < fraction:
+            item["stat"]["total_submitted"] = int(item["stat"]["total_submitted"] * 1.05) + 100
+            bumped.append(item["stat"]["question__title_slug"])
+    return bumped
+
+
+ALIAS_RE = re.compile(r'(\w+)\s*:\s*question\(titleSlug:\s*"([^"]+)"\)')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def maybe_fail(self):
+        server = self.server
+        if server.latency: time.sleep(server.latency)
+        if server.fail_rate and server.rng.random() < server.fail_rate:
+            status = server.rng.choice([429, 503])
+            self.send_json(status, {"error": "injected"}, {"Retry-After": "0"} if status == 429 else None)
+            return True
+        return False
+
+    def do_GET(self):
+        if not self.path.startswith("/api/problems/all"):
+            return self.send_json(404, {"error": "not found"})
+        self.send_json(200, self.server.recordings["all"])
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.rstrip("/") != "/graphql":
+            return self.send_json(404, {"error": "not found"})
+        with self.server.lock:
+            self.server.requests += 1
+        if self.maybe_fail(): return
+        questions = self.server.recordings["questions"]
+        slug = (body.get("variables") or {}).get("titleSlug")
+        if slug is not None:
+            return self.send_json(200, {"data": {"question": questions.get(slug)}})
+        # Aliased multi-question query: q0: question(titleSlug: "two-sum") { ... }
+        data = {alias: questions.get(s) for alias, s in ALIAS_RE.findall(body.get("query", ""))}
+        self.send_json(200, {"data": data})
+
+
+def start_stub(recordings, port=0, fail_rate=0.0, latency_ms=0, seed=0):
+    """Starts the stub on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.recordings = recordings
+    server.fail_rate = fail_rate
+    server.latency = latency_ms / 1000
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--recordings", help="JSON written by `helper.py --record`")
+    source.add_argument("--from-csv", help="Synthesize responses from a catalog CSV")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of GraphQL calls answered with 429/503")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bump-fraction", type=float, default=0.0, help="Fraction of problems whose stats grow (for --incremental)")
+    args = parser.parse_args()
+
+    if args.recordings:
+        with open(args.recordings, encoding="utf-8") as f:
+            recordings = json.load(f)
+    else:
+        recordings = recordings_from_csv(args.from_csv)
+    if args.bump_fraction:
+        print(f"bumped stats for {len(bump_stats(recordings, args.bump_fraction))} problems")
+
+    server, url = start_stub(recordings, args.port, args.fail_rate, args.latency_ms)
+    print(f"LeetCode stub serving {len(recordings['questions'])} questions on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Load test: seeds a database with synthetic users at scale, drives every
+route concurrently, and reports latency percentiles, throughput and SQL
+statements per request. Results can be saved as a JSON baseline or
+compared against one.
+
+Seeding follows seed_alerts.py in bulk: rows are written straight through
+the models, then rebuild_user_stats runs for each user, the due-review
+queue is rebuilt and the notes are moved into compressed storage. DATABASE_URL picks
+the database (default: a fresh SQLite file; any URL the app accepts works,
+e.g. Postgres). An existing load-test seed in that database is reused.
+
+Requests go through one of two servers:
+- --server testclient (default): the Flask test client, one thread per
+  virtual user.
+- --server gunicorn: a local gunicorn started from gunicorn.conf.py.
+The rate limiter and CSRF are off, and bcrypt runs at cost 4 so logins
+don't dominate.
+
+Usage (from the repo root):
+    python benchmarks/loadtest.py [--users 200] [--solves 150] [--notes 20] [--clients 8] [--duration 20]
+    python benchmarks/loadtest.py --save testclient       # writes benchmarks/baselines/testclient.json
+    python benchmarks/loadtest.py --compare testclient    # deltas against it; exits 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(HERE, 'baselines')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+WORKDIR = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(WORKDIR, 'loadtest.db'))
+os.environ.setdefault('FAST_STATE_URL', 'sqlite:///' + os.path.join(WORKDIR, 'fast_state.sqlite3'))
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+os.environ['SQL_COUNT_HEADER'] = '1'
+os.environ['CATALOG_POLL_SECONDS'] = '0'
+
+PASSWORD = 'loadtest-pass'
+USERNAME = 'load{}'
+INSERT_CHUNK = 5000
+
+
+def make_app():
+    """gunicorn app factory: the real app with rate limiting and CSRF off."""
+    import app
+    app.app.config['WTF_CSRF_ENABLED'] = False
+    app.limiter.enabled = False
+    return app.app
+
+# --- SEEDING ---
+
+def seed(users, solves, notes, due_fraction, rng):
+    """Bulk-inserts `users` with solves over the last 120 days (`due_fraction` overdue) and notes."""
+    import app
+    from app import db, User, SolvedProblem, Note
+    ids = app.CATALOG.data['ID'].tolist()
+    now = datetime.utcnow()
+    with app.app.app_context():
+        if User.query.filter_by(username=USERNAME.format(0)).first():
+            print("Reusing the existing load-test seed in this database.")
+            return
+        start = time.perf_counter()
+        password = app.hasher.hash(PASSWORD)
+        db.session.execute(db.insert(User), [{'username': USERNAME.format(i), 'password': password} for i in range(users)])
+        user_ids = [uid for (uid,) in db.session.query(User.id).filter(User.username.like('load%')).all()]
+        solved_rows, note_rows = [], []
+        for uid in user_ids:
+            for pid in rng.sample(ids, min(solves, len(ids))):
+                overdue = rng.random() < due_fraction
+                solved_rows.append({
+                    'user_id': uid, 'problem_id': pid, 'solved_at': now - timedelta(days=rng.uniform(0, 120)),
+                    'next_review_at': now + timedelta(days=-rng.uniform(0, 10) if overdue else rng.uniform(1, 30)),
+                    'srs_interval': rng.choice([1.0, 2.5, 6.25, 15.6]),
+                })
+            for pid in rng.sample(ids, min(notes, len(ids))):
+                note_rows.append({'user_id': uid, 'problem_id': pid, 'content': synthetic_note(rng), 'updated_at': now})
+        for model, rows in ((SolvedProblem, solved_rows), (Note, note_rows)):
+            for i in range(0, len(rows), INSERT_CHUNK):
+                db.session.execute(db.insert(model), rows[i:i + INSERT_CHUNK])
+        db.session.commit()
+        for uid in user_ids:
+            app.rebuild_user_stats(uid)
+        db.session.commit()
+        app.backfill_due_queue()
+        app.migrate_legacy_notes()  # Notes went in as plain text
+        print(f"Seeded {len(user_ids)} users, {len(solved_rows)} solves, {len(note_rows)} notes "
+              f"in {time.perf_counter() - start:.1f} s")
+
+NOTE_WORDS = "two pointers hash map sliding window stack heap dfs bfs dp memo greedy sort binary search edge case off by one".split()
+
+def synthetic_note(rng):
+    return ' '.join(rng.choice(NOTE_WORDS) for _ in range(rng.randint(20, 300)))
+
+def user_state(username):
+    """(solved problem IDs, noted problem IDs) for a seeded user."""
+    import app
+    with app.app.app_context():
+        uid = app.User.query.filter_by(username=username).first().id
+        solved = [pid for (pid,) in app.SolvedProblem.query.with_entities(app.SolvedProblem.problem_id).filter_by(user_id=uid)]
+        noted = [pid for (pid,) in app.Note.query.with_entities(app.Note.problem_id).filter_by(user_id=uid)]
+    return solved, noted
+
+# --- SERVERS ---
+
+class TestClientServer:
+    def __init__(self, args):
+        self.app = make_app()
+
+    def login(self, username):
+        client = self.app.test_client()
+        res = client.post('/login', data={'username': username, 'password': PASSWORD})
+        assert res.status_code == 302, (username, res.status_code)
+        return client
+
+    def request(self, client, method, url, body):
+        res = client.open(url, method=method, json=body)
+        return res.status_code, res.headers.get('X-SQL-Statements')
+
+    def close(self):
+        pass
+
+class GunicornServer:
+    def __init__(self, args):
+        import requests
+        self.requests = requests
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+             '--pythonpath', f'{ROOT},{HERE}', '-b', f'127.0.0.1:{port}', '-w', str(args.workers),
+             '--log-level', 'warning', 'loadtest:make_app()'],
+            cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for _ in range(300):
+            try:
+                requests.get(self.url + '/login', timeout=1)
+                return
+            except requests.ConnectionError:
+                if self.proc.poll() is not None:
+                    raise SystemExit(f"gunicorn exited:\n{self.proc.stderr.read().decode()[-2000:]}")
+                time.sleep(0.1)
+        self.close()
+        raise SystemExit("gunicorn did not start")
+
+    def login(self, username):
+        client = self.requests.Session()
+        res = client.post(self.url + '/login', data={'username': username, 'password': PASSWORD}, allow_redirects=False)
+        assert res.status_code == 302, (username, res.status_code)
+        return client
+
+    def request(self, client, method, url, body):
+        res = client.request(method, self.url + url, json=body, allow_redirects=False)
+        return res.status_code, res.headers.get('X-SQL-Statements')
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+SERVERS = {'testclient': TestClientServer, 'gunicorn': GunicornServer}
+
+# --- WORKLOAD ---
+
+class VirtualUser:
+    """One logged-in user picking routes by weight; tracks its own solves so SRS/notes calls hit real rows."""
+
+    def __init__(self, username, solved, noted, ids, topics, seed):
+        self.rng = random.Random(seed)
+        self.solved, self.noted = list(solved), list(noted)
+        self.solved_set = set(solved)
+        self.ids, self.topics = ids, topics
+
+    def dashboard(self): return 'GET', '/', None
+    def topic(self): return 'GET', f'/topic/{self.rng.choice(self.topics)}', None
+    def progress(self): return 'GET', '/api/progress', None
+    def srs_due(self): return 'GET', '/api/srs/due?limit=5', None
+    def recommendations(self): return 'GET', '/api/recommendations', None
+    def similar(self): return 'GET', f'/api/problems/{self.rng.choice(self.ids)}/similar?kind=all&hops=2', None
+    def search(self): return 'GET', f'/api/search?q={self.rng.choice(["two", "bin", "tree", "sub", "lin", "max"])}', None
+
+    def toggle(self):
+        pid = self.rng.choice(self.ids)
+        solved = pid not in self.solved_set
+        if solved:
+            self.solved_set.add(pid)
+            self.solved.append(pid)
+        else:
+            self.solved_set.discard(pid)
+            self.solved.remove(pid)
+        return 'POST', '/api/progress/toggle', {'problem_id': pid, 'solved': solved}
+
+    def srs_resolve(self):
+        if not self.solved: return self.toggle()
+        return 'POST', '/api/srs/resolve', {'problem_id': self.rng.choice(self.solved)}
+
+    def note_get(self):
+        return 'GET', f'/api/notes/{self.rng.choice(self.noted or self.ids)}', None
+
+    def note_save(self):
+        pid = self.rng.choice(self.noted) if self.noted and self.rng.random() < 0.7 else self.rng.choice(self.ids)
+        if pid not in self.noted: self.noted.append(pid)
+        return 'POST', '/api/notes/save', {'problem_id': pid, 'content': synthetic_note(self.rng)}
+
+# route name -> weight (relative share of requests)
+ROUTE_WEIGHTS = {
+    'dashboard': 12, 'topic': 12, 'progress': 15, 'toggle': 12, 'srs_resolve': 6, 'srs_due': 6,
+    'note_get': 12, 'note_save': 8, 'search': 6, 'similar': 5, 'recommendations': 6,
+}
+
+def run(server, users, duration, routes):
+    names = list(routes)
+    weights = [routes[name] for name in names]
+    samples = {name: {'latency': [], 'sql': [], 'errors': 0} for name in names}
+    lock = threading.Lock()
+    clients = [server.login(USERNAME.format(i)) for i in range(len(users))]
+    deadline = time.perf_counter() + duration
+
+    def loop(vu, client):
+        while time.perf_counter() < deadline:
+            name = vu.rng.choices(names, weights)[0]
+            method, url, body = getattr(vu, name)()
+            start = time.perf_counter()
+            status, statements = server.request(client, method, url, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                stats = samples[name]
+                stats['latency'].append(elapsed)
+                if statements is not None: stats['sql'].append(int(statements))
+                if status >= 400: stats['errors'] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(vu, client)) for vu, client in zip(users, clients)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return samples, time.perf_counter() - start
+
+# --- REPORTING ---
+
+def percentile(sorted_values, q):
+    return sorted_values[max(0, int(len(sorted_values) * q + 0.5) - 1)] if sorted_values else 0.0
+
+def summarize(latencies, sql, errors, wall):
+    lat = sorted(latencies)
+    return {
+        'requests': len(lat), 'errors': errors, 'rps': round(len(lat) / wall, 2),
+        'p50_ms': round(percentile(lat, 0.50) * 1000, 3), 'p95_ms': round(percentile(lat, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(lat, 0.99) * 1000, 3),
+        'sql_per_request': round(sum(sql) / len(sql), 2) if sql else None,
+    }
+
+def report(samples, wall, config):
+    routes = {name: summarize(s['latency'], s['sql'], s['errors'], wall) for name, s in samples.items() if s['latency']}
+    every = [s for s in samples.values()]
+    total = summarize([x for s in every for x in s['latency']], [x for s in every for x in s['sql']],
+                      sum(s['errors'] for s in every), wall)
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = None
+    return {'config': config, 'environment': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'git': rev,
+                                               'created': datetime.utcnow().isoformat(timespec='seconds')},
+            'routes': routes, 'total': total}
+
+def print_result(result):
+    print(f"{'route':<17}{'reqs':>7}{'errs':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'SQL/req':>9}")
+    for name, r in list(result['routes'].items()) + [('(all)', result['total'])]:
+        sql = f"{r['sql_per_request']:.2f}" if r['sql_per_request'] is not None else '-'
+        print(f"{name:<17}{r['requests']:>7}{r['errors']:>6}{r['rps']:>8.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{sql:>9}")
+
+def compare(result, baseline, threshold):
+    """Prints per-route deltas; returns the regressions (p95 beyond `threshold`, or more SQL per request)."""
+    print(f"\nvs baseline ({baseline['environment'].get('git')}, {baseline['environment'].get('created')}):")
+    print(f"{'route':<17}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'SQL/req':>10}")
+    regressions = []
+    pairs = [(name, r, baseline['routes'].get(name)) for name, r in result['routes'].items()]
+    for name, new, old in pairs + [('(all)', result['total'], baseline['total'])]:
+        if not old: continue
+        delta = {k: (new[k] - old[k]) / old[k] * 100 if old[k] else 0.0 for k in ('p50_ms', 'p95_ms', 'p99_ms', 'rps')}
+        sql_delta = (new['sql_per_request'] or 0) - (old['sql_per_request'] or 0)
+        print(f"{name:<17}{delta['p50_ms']:>+8.0f}%{delta['p95_ms']:>+8.0f}%{delta['p99_ms']:>+8.0f}%"
+              f"{delta['rps']:>+8.0f}%{sql_delta:>+10.2f}")
+        if delta['p95_ms'] > threshold * 100: regressions.append(f"{name}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        if sql_delta > 0.5: regressions.append(f"{name}: SQL/request {old['sql_per_request']} -> {new['sql_per_request']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200, help='Synthetic users to seed')
+    parser.add_argument('--solves', type=int, default=150, help='Solved problems per user')
+    parser.add_argument('--notes', type=int, default=20, help='Notes per user')
+    parser.add_argument('--due-fraction', type=float, default=0.1, help='Share of solves with an overdue review')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load')
+    parser.add_argument('--server', choices=SERVERS, default='testclient')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers (--server gunicorn)')
+    parser.add_argument('--routes', help=f"Comma-separated subset of: {', '.join(ROUTE_WEIGHTS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='NAME', help='Write the result to benchmarks/baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='Compare with benchmarks/baselines/NAME.json')
+    parser.add_argument('--threshold', type=float, default=0.25, help='p95 slowdown counted as a regression')
+    args = parser.parse_args()
+    if args.clients > args.users:
+        parser.error('--clients cannot exceed --users')
+    routes = ROUTE_WEIGHTS
+    if args.routes:
+        unknown = set(args.routes.split(',')) - set(ROUTE_WEIGHTS)
+        if unknown: parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+        routes = {name: ROUTE_WEIGHTS[name] for name in args.routes.split(',')}
+
+    rng = random.Random(args.seed)
+    seed(args.users, args.solves, args.notes, args.due_fraction, rng)
+    import app
+    ids = app.CATALOG.data['ID'].tolist()
+    topics = list(app.SLUG_TO_NAME_MAP)
+    users = [VirtualUser(USERNAME.format(i), *user_state(USERNAME.format(i)), ids, topics, args.seed + i)
+             for i in range(args.clients)]
+
+    server = SERVERS[args.server](args)
+    try:
+        samples, wall = run(server, users, args.duration, routes)
+    finally:
+        server.close()
+
+    config = {key: getattr(args, key) for key in ('users', 'solves', 'notes', 'due_fraction', 'clients',
+                                                  'duration', 'server', 'workers', 'seed')}
+    config['database'] = os.environ['DATABASE_URL'].split(':', 1)[0]
+    config['routes'] = routes
+    result = report(samples, wall, config)
+    print_result(result)
+
+    if args.save:
+        os.makedirs(BASELINES, exist_ok=True)
+        path = os.path.join(BASELINES, f'{args.save}.json')
+        with open(path, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline written to {os.path.relpath(path, ROOT)}")
+    if args.compare:
+        with open(os.path.join(BASELINES, f'{args.compare}.json')) as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+
+if __name__ == '__main__':
+    main()
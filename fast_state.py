@@ -0,0 +1,199 @@
+"""
+Shared fast state: server-side sessions and rate-limit counters, kept out of
+the main database and out of per-worker memory.
+
+FAST_STATE_URL selects the backend for both:
+    sqlite:///path/state.sqlite3   One WAL-mode SQLite file shared by every worker on the host
+    redis://host:6379/0            Redis (or a protocol-compatible server), for multi-host setups
+    memory://                      Per-process dicts: tests and one-off scripts only
+    sqlalchemy://                  The old setup: sessions in the main DB, limiter in memory
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+
+from flask_session import Session
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+from flask_session.defaults import Defaults
+from limits.storage import Storage
+
+PURGE_EVERY = 1000  # Writes between sweeps of expired rows (on average)
+
+
+def sqlite_path(url):
+    """sqlite:///relative/path or sqlite:////absolute/path (SQLAlchemy's convention)."""
+    return url[len('sqlite:///'):]
+
+
+class SQLiteStateStore:
+    """
+    Key/value blobs and integer counters with expiry, in one SQLite file in
+    WAL mode so workers on the host read concurrently and serialize only
+    their (single-statement, autocommit) writes. One connection per thread
+    per process, so it is safe across gunicorn's fork.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self.conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID")
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID")
+
+    @property
+    def conn(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            local.conn.execute("PRAGMA synchronous=NORMAL")  # Durable across app crashes; fine for sessions/counters
+            local.pid = os.getpid()
+        return local.conn
+
+    def maybe_purge(self):
+        if random.randrange(PURGE_EVERY) == 0:
+            self.purge_expired()
+
+    def purge_expired(self):
+        now = time.time()
+        self.conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+        self.conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+
+    # Key/value
+
+    def get(self, key):
+        row = self.conn.execute("SELECT value FROM kv WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        self.conn.execute(
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, time.time() + ttl))
+        self.maybe_purge()
+
+    def delete(self, key):
+        self.conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    # Counters
+
+    def incr(self, key, ttl, amount=1):
+        """Atomically adds `amount`; an expired counter restarts at `amount` with a fresh TTL."""
+        now = time.time()
+        (count,) = self.conn.execute(
+            "INSERT INTO counters (key, count, expires_at) VALUES (:key, :amount, :expires) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "count = CASE WHEN expires_at > :now THEN count + :amount ELSE :amount END, "
+            "expires_at = CASE WHEN expires_at > :now THEN expires_at ELSE :expires END "
+            "RETURNING count",
+            {'key': key, 'amount': amount, 'expires': now + ttl, 'now': now}).fetchone()
+        self.maybe_purge()
+        return count
+
+    def count(self, key):
+        row = self.conn.execute("SELECT count FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def counter_expiry(self, key):
+        row = self.conn.execute("SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else time.time()
+
+    def clear_counter(self, key):
+        self.conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def reset_counters(self):
+        return self.conn.execute("DELETE FROM counters").rowcount
+
+
+class SQLiteSessionInterface(ServerSideSessionInterface):
+    """Flask-Session backend on SQLiteStateStore (same serializer as the built-in backends)."""
+
+    session_class = ServerSideSession
+    ttl = True
+
+    def __init__(self, app, store, key_prefix=Defaults.SESSION_KEY_PREFIX, use_signer=Defaults.SESSION_USE_SIGNER,
+                 permanent=Defaults.SESSION_PERMANENT, sid_length=Defaults.SESSION_ID_LENGTH,
+                 serialization_format=Defaults.SESSION_SERIALIZATION_FORMAT):
+        self.store = store
+        super().__init__(app, key_prefix, use_signer, permanent, sid_length, serialization_format)
+
+    def _retrieve_session_data(self, store_id):
+        data = self.store.get(store_id)
+        return self.serializer.decode(data) if data is not None else None
+
+    def _delete_session(self, store_id):
+        self.store.delete(store_id)
+
+    def _upsert_session(self, session_lifetime: timedelta, session, store_id):
+        self.store.set(store_id, self.serializer.encode(session), session_lifetime.total_seconds())
+
+
+class SQLiteLimiterStorage(Storage):
+    """limits storage for `sqlite:///path` URIs (fixed-window strategy, Flask-Limiter's default)."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.store = SQLiteStateStore(sqlite_path(uri))
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        return self.store.incr(key, expiry, amount)
+
+    def get(self, key):
+        return self.store.count(key)
+
+    def get_expiry(self, key):
+        return self.store.counter_expiry(key)
+
+    def check(self):
+        try:
+            self.store.conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.store.reset_counters()
+
+    def clear(self, key):
+        self.store.clear_counter(key)
+
+
+def init_app(app, url, db=None):
+    """Installs the session backend for `url` on `app`; returns the storage URI for Flask-Limiter."""
+    scheme = url.split('://', 1)[0]
+    config = app.config
+    if scheme == 'sqlite':
+        app.session_interface = SQLiteSessionInterface(
+            app, SQLiteStateStore(sqlite_path(url)),
+            key_prefix=config.get('SESSION_KEY_PREFIX', Defaults.SESSION_KEY_PREFIX),
+            use_signer=config.get('SESSION_USE_SIGNER', Defaults.SESSION_USE_SIGNER),
+            permanent=config.get('SESSION_PERMANENT', Defaults.SESSION_PERMANENT),
+            sid_length=config.get('SESSION_ID_LENGTH', Defaults.SESSION_ID_LENGTH),
+            serialization_format=config.get('SESSION_SERIALIZATION_FORMAT', Defaults.SESSION_SERIALIZATION_FORMAT))
+        return url
+    if scheme in ('redis', 'rediss'):
+        import redis  # Optional dependency: pip install redis
+        config.update(SESSION_TYPE='redis', SESSION_REDIS=redis.Redis.from_url(url))
+        Session(app)
+        return url
+    if scheme == 'memory':
+        from cachelib import SimpleCache
+        config.update(SESSION_TYPE='cachelib', SESSION_CACHELIB=SimpleCache(threshold=10000))
+        Session(app)
+        return 'memory://'
+    if scheme == 'sqlalchemy':
+        config.update(SESSION_TYPE='sqlalchemy', SESSION_SQLALCHEMY=db)
+        Session(app)
+        return 'memory://'
+    raise ValueError(f"Unsupported FAST_STATE_URL scheme '{scheme}'")
@@ -0,0 +1,18 @@
+# Gunicorn settings (picked up automatically from the working directory).
+import gc
+import os
+
+# Import app.py once in the master: the catalog, problem index and eager
+# roadmaps are built before forking and shared copy-on-write by the workers.
+# (A catalog hot-reloaded later via `flask publish-catalog` is per worker.)
+preload_app = True
+
+# Threaded workers: a request waiting on a password hash (run on the app's
+# bcrypt pool, see passwords.py) doesn't hold up the worker's other threads.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+def pre_fork(server, worker):
+    # Move everything built so far out of the GC's tracked generations, so
+    # collections in the workers don't touch (and un-share) those pages.
+    gc.freeze()
@@ -1,90 +1,445 @@
-import requests
+import argparse
+import asyncio
 import csv
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
 
-API_ALL = "https://leetcode.com/api/problems/all/"
-API_GRAPHQL = "https://leetcode.com/graphql"
+BASE_URL = os.environ.get("LEETCODE_BASE_URL", "https://leetcode.com")
+CSV_FILE = "leetcode_with_submissions.csv"
 
-# GraphQL query for detailed info (with total submissions)
-QUERY = """
-query getQuestionDetails($titleSlug: String!) {
-  question(titleSlug: $titleSlug) {
+CSV_HEADER = [
+    "ID", "Title", "Difficulty", "Link", "Topics", "Acceptance Rate (%)",
+    "Premium Only", "Category", "Likes", "Dislikes", "Total Submissions",
+    "Total Accepted", "Similar Questions"
+]
+
+DETAIL_FIELDS = """
     topicTags { name }
     categoryTitle
     likes
     dislikes
     stats
     similarQuestions
-  }
-}
 """
 
-def fetch_all_problems():
+# GraphQL query for detailed info (with total submissions)
+QUERY = f"""
+query getQuestionDetails($titleSlug: String!) {{
+  question(titleSlug: $titleSlug) {{{DETAIL_FIELDS}  }}
+}}
+"""
+
+def batch_query(slugs):
+    """One aliased query for several problems: q0: question(titleSlug: "two-sum") { ... } q1: ..."""
+    aliases = "".join(f"  q{i}: question(titleSlug: {json.dumps(slug)}) {{ ...details }}\n" for i, slug in enumerate(slugs))
+    return f"query getQuestionsDetails {{\n{aliases}}}\nfragment details on QuestionNode {{{DETAIL_FIELDS}}}\n"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A request failed permanently (or ran out of retries)."""
+
+
+class RetryableError(FetchError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket shared by all in-flight requests (rate = requests/second)."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate: return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Checkpoint:
+    """
+    Append-only JSONL of fetched problems, flushed per line so an interrupted
+    run can resume. A final {"complete": true} line marks a finished run; the
+    completed file is the baseline for the next --incremental run. Entries
+    marked "stale" are older details kept as a fallback after a failed fetch;
+    a resumed run fetches those again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        entries, complete = {}, False
+        if not os.path.exists(self.path): return entries, complete
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break # Torn last line from a crash
+                if record.get("complete"):
+                    complete = True
+                else:
+                    entries[record["slug"]] = record
+        return entries, complete
+
+    def open(self, mode):
+        self.file = open(self.path, mode, encoding="utf-8")
+
+    def append(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self, complete):
+        if complete:
+            self.file.write(json.dumps({"complete": True}) + "\n")
+        self.file.close()
+
+
+def make_session(pool_size):
+    """One pooled session reused by every request (keep-alive instead of a TCP/TLS handshake each)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def fetch_all_problems(session, base_url=BASE_URL):
     """Fetch all problem metadata from REST API."""
-    resp = requests.get(API_ALL)
+    resp = session.get(f"{base_url}/api/problems/all/", timeout=30)
     resp.raise_for_status()
     return resp.json().get("stat_status_pairs", [])
 
-def fetch_graphql_details(slug):
-    """Fetch problem details from GraphQL API."""
+def post_graphql(session, base_url, payload, timeout=10):
+    """One GraphQL attempt. Raises RetryableError for throttling/server/network errors."""
+    try:
+        resp = session.post(f"{base_url}/graphql", json=payload, timeout=timeout)
+    except requests.RequestException as e:
+        raise RetryableError(f"network error: {e}")
+    if resp.status_code in RETRYABLE_STATUS:
+        retry_after = resp.headers.get("Retry-After")
+        raise RetryableError(f"HTTP {resp.status_code}", float(retry_after) if retry_after and retry_after.isdigit() else None)
+    if resp.status_code != 200:
+        raise FetchError(f"HTTP {resp.status_code}")
     try:
-        resp = requests.post(
-            API_GRAPHQL,
-            json={"query": QUERY, "variables": {"titleSlug": slug}},
-            timeout=10
-        )
-        resp.raise_for_status()
-        q = resp.json()["data"]["question"]
-
-        topics = [t["name"] for t in q.get("topicTags", [])]
-        category = q.get("categoryTitle", "")
-        likes = q.get("likes", 0)
-        dislikes = q.get("dislikes", 0)
-        stats_json = json.loads(q.get("stats", "{}"))
-        total_submissions = stats_json.get("totalSubmission", 0)
-        total_accepted = stats_json.get("totalAccepted", 0)
-        similar = q.get("similarQuestions", "")
-
-        return topics, category, likes, dislikes, total_submissions, total_accepted, similar
-    except Exception:
-        return [], "", 0, 0, 0, 0, ""
-
-def save_to_csv(problems, filename="leetcode_with_submissions.csv"):
-    """Save combined problem data to CSV."""
-    with open(filename, mode="w", newline='', encoding="utf-8") as csv_file:
-        writer = csv.writer(csv_file)
-        writer.writerow([
-            "ID", "Title", "Difficulty", "Link", "Topics", "Acceptance Rate (%)",
-            "Premium Only", "Category", "Likes", "Dislikes", "Total Submissions",
-            "Total Accepted", "Similar Questions"
-        ])
-        
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            future_to_problem = {
-                executor.submit(fetch_graphql_details, item["stat"]["question__title_slug"]): item
-                for item in problems
-            }
-            for future in as_completed(future_to_problem):
-                item = future_to_problem[future]
-                stat = item["stat"]
-                q_id = stat["frontend_question_id"]
-                title = stat["question__title"]
-                slug = stat["question__title_slug"]
-                link = f"https://leetcode.com/problems/{slug}/"
-                difficulty = {1: "Easy", 2: "Medium", 3: "Hard"}.get(item["difficulty"]["level"], "Unknown")
-                acceptance = round(stat.get("total_acs", 0) / stat.get("total_submitted", 1) * 100, 2)
-                premium = item.get("paid_only", False)
-                
-                topics, category, likes, dislikes, total_sub, total_acc, similar = future.result()
-                writer.writerow([
-                    q_id, title, difficulty, link, ", ".join(topics), acceptance,
-                    premium, category, likes, dislikes, total_sub, total_acc, similar
-                ])
-
-def main():
-    problems = fetch_all_problems()
-    save_to_csv(problems)
+        return resp.json()
+    except ValueError:
+        raise RetryableError("invalid JSON body")
+
+def parse_question(q):
+    """GraphQL question object -> the detail fields stored in the CSV. Raises ValueError/TypeError if malformed."""
+    stats_json = json.loads(q.get("stats") or "{}")
+    if not isinstance(stats_json, dict): raise TypeError(f"stats is {type(stats_json).__name__}, not an object")
+    return {
+        "topics": [t["name"] for t in q.get("topicTags") or []],
+        "category": q.get("categoryTitle", ""),
+        "likes": q.get("likes", 0),
+        "dislikes": q.get("dislikes", 0),
+        "total_submissions": stats_json.get("totalSubmission", 0),
+        "total_accepted": stats_json.get("totalAccepted", 0),
+        "similar": q.get("similarQuestions", ""),
+    }
+
+def rest_stats(item):
+    stat = item["stat"]
+    return [stat.get("total_acs", 0), stat.get("total_submitted", 0)]
+
+def stats_changed(old, new, min_change):
+    """True if the REST submission count moved by more than `min_change` (relative)."""
+    if old is None: return True
+    if min_change <= 0: return list(old) != list(new)
+    return abs(new[1] - old[1]) / max(old[1], 1) > min_change
+
+def csv_row(item, details):
+    stat = item["stat"]
+    slug = stat["question__title_slug"]
+    return [
+        stat["frontend_question_id"], stat["question__title"],
+        {1: "Easy", 2: "Medium", 3: "Hard"}.get(item["difficulty"]["level"], "Unknown"),
+        f"https://leetcode.com/problems/{slug}/", ", ".join(details["topics"]),
+        round(stat.get("total_acs", 0) / (stat.get("total_submitted") or 1) * 100, 2),
+        item.get("paid_only", False), details["category"], details["likes"], details["dislikes"],
+        details["total_submissions"], details["total_accepted"], details["similar"],
+    ]
+
+class CsvStream:
+    """
+    Writes CSV rows in catalog order while results arrive out of order.
+    Producers must reserve() an index before handing it over, and only
+    `window` indexes past the write cursor are admitted, so buffered rows are
+    bounded by the window rather than by catalog size. Written to a temp file
+    and renamed on commit() so readers never see a partial CSV, and never
+    one with rows missing.
+    """
+
+    def __init__(self, filename, window):
+        self.filename = filename
+        self.tmp = f"{filename}.tmp"
+        self.window = window
+        self.file = open(self.tmp, mode="w", newline='', encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_HEADER)
+        self.pending = {}
+        self.cursor = 0
+        self.rows = 0
+        self.missing = 0
+        self.peak_pending = 0
+        self.advanced = asyncio.Condition()
+
+    def fits(self, index):
+        return index < self.cursor + self.window
+
+    async def reserve(self, index):
+        async with self.advanced:
+            await self.advanced.wait_for(lambda: self.fits(index))
+
+    async def put(self, index, row):
+        """Hand over the row for `index` (None = no data for this problem: commit() will refuse)."""
+        self.pending[index] = row
+        self.peak_pending = max(self.peak_pending, len(self.pending))
+        if index != self.cursor: return
+        while self.cursor in self.pending:
+            row = self.pending.pop(self.cursor)
+            if row is None:
+                self.missing += 1
+            else:
+                self.writer.writerow(row)
+                self.rows += 1
+            self.cursor += 1
+        async with self.advanced:
+            self.advanced.notify_all()
+
+    def commit(self):
+        if self.missing:
+            self.abort()
+            raise FetchError(f"{self.missing} rows missing, {self.filename} left unchanged")
+        self.file.close()
+        os.replace(self.tmp, self.filename)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp)
+
+
+class Scraper:
+    def __init__(self, base_url=BASE_URL, concurrency=8, rate=10.0, retries=5, backoff=0.5, timeout=10, batch_size=20, recorder=None):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.recorder = recorder
+        self.session = make_session(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.stats = {"requests": 0, "retries": 0, "failed": 0}
+
+    async def request(self, payload):
+        """POST with rate limiting, retry and exponential backoff (+jitter, honouring Retry-After)."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire()
+            self.stats["requests"] += 1
+            try:
+                return await loop.run_in_executor(self.executor, post_graphql, self.session, self.base_url, payload, self.timeout)
+            except RetryableError as e:
+                if attempt == self.retries: raise
+                self.stats["retries"] += 1
+                delay = e.retry_after if e.retry_after is not None else self.backoff * 2 ** attempt
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    async def fetch_batch(self, slugs):
+        """[details or None] per slug; one aliased request for the whole batch."""
+        try:
+            if len(slugs) == 1:
+                body = await self.request({"query": QUERY, "variables": {"titleSlug": slugs[0]}})
+                questions = [(body.get("data") or {}).get("question")]
+            else:
+                body = await self.request({"query": batch_query(slugs)})
+                data = body.get("data") or {}
+                questions = [data.get(f"q{i}") for i in range(len(slugs))]
+        except FetchError as e:
+            print(f"⚠️ batch of {len(slugs)} starting at {slugs[0]}: {e}", file=sys.stderr)
+            questions = [None] * len(slugs)
+        results = []
+        for slug, q in zip(slugs, questions):
+            if not q:
+                self.stats["failed"] += 1
+                print(f"⚠️ {slug}: no question in response", file=sys.stderr)
+                results.append(None)
+                continue
+            try:
+                details = parse_question(q)
+            except (ValueError, TypeError, KeyError) as e:
+                self.stats["failed"] += 1 # Only this problem; the rest of the run carries on
+                print(f"⚠️ {slug}: malformed details ({e!r})", file=sys.stderr)
+                results.append(None)
+                continue
+            if self.recorder is not None: self.recorder[slug] = q
+            results.append(details)
+        return results
+
+    async def run(self, plan, stream, on_fetched):
+        """
+        plan yields (item, details) in catalog order; details=None means fetch it.
+        Fetched problems are grouped into batches of batch_size, at most
+        `concurrency` batches in flight; every row goes through `stream` in order.
+        on_fetched(item, details or None) returns the details to write.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks, batch = [], []
+
+        async def fetch(batch):
+            try:
+                results = await self.fetch_batch([item["stat"]["question__title_slug"] for _, item in batch])
+            finally:
+                slots.release()
+            for (index, item), details in zip(batch, results):
+                details = on_fetched(item, details)
+                await stream.put(index, csv_row(item, details) if details else None)
+
+        async def dispatch():
+            nonlocal batch
+            await slots.acquire()
+            tasks.append(asyncio.create_task(fetch(batch)))
+            batch = []
+
+        for index, (item, details) in enumerate(plan):
+            if batch and not stream.fits(index):
+                await dispatch() # The cursor can't pass a batch that was never sent
+            await stream.reserve(index)
+            if details is not None:
+                await stream.put(index, csv_row(item, details))
+                continue
+            batch.append((index, item))
+            if len(batch) == self.batch_size:
+                await dispatch()
+        if batch: await dispatch()
+        await asyncio.gather(*tasks)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+def scrape(args):
+    checkpoint = Checkpoint(args.checkpoint)
+    previous, complete = ({}, False) if args.fresh else checkpoint.load()
+    scraper = Scraper(args.base_url, args.concurrency, args.rate, args.retries, args.backoff,
+                      batch_size=args.batch_size, recorder={} if args.record else None)
+
+    problems = fetch_all_problems(scraper.session, args.base_url)
+    if scraper.recorder is not None:
+        recorded_all = {"stat_status_pairs": problems}
+
+    # Full mode refetches everything after a finished run, but `previous`
+    # stays the per-problem fallback for fetches that still fail
+    reuse = {} if complete and not args.incremental else previous
+    plan = [] # (item, details to reuse or None), in catalog order
+    checkpoint.open("a" if previous and not complete else "w")
+    for item in problems:
+        prev = reuse.get(item["stat"]["question__title_slug"])
+        if prev and not complete:
+            plan.append((item, None if prev.get("stale") else prev["details"])) # Resuming an interrupted run
+        elif prev and not stats_changed(prev["rest"], rest_stats(item), args.min_change):
+            plan.append((item, prev["details"])) # Incremental: unchanged since the baseline
+            checkpoint.append(prev)
+        else:
+            plan.append((item, None))
+
+    todo = sum(details is None for _, details in plan)
+    print(f"📋 {len(problems)} problems: {len(problems) - todo} reused, {todo} to fetch")
+
+    missing = [] # Failed fetches with no earlier details to fall back on
+
+    def on_fetched(item, details):
+        slug = item["stat"]["question__title_slug"]
+        if details is None:
+            # Keep the last good data rather than writing zeros or dropping the row
+            if slug not in previous:
+                missing.append(slug)
+                return None
+            prev = previous[slug]
+            checkpoint.append({**prev, "stale": True}) # Still the fallback if the checkpoint is rewritten
+            return prev["details"]
+        checkpoint.append({"slug": slug, "rest": rest_stats(item), "details": details})
+        return details
+
+    stream = CsvStream(args.out, args.window)
+    start = time.perf_counter()
+    try:
+        asyncio.run(scraper.run(plan, stream, on_fetched))
+    except BaseException:
+        stream.abort()
+        raise
+    else:
+        if stream.missing:
+            # Leave the last good CSV in place rather than publish a catalog with holes
+            stream.abort()
+        else:
+            stream.commit()
+    finally:
+        # Only a clean run becomes a baseline; otherwise the next run resumes
+        checkpoint.close(complete=scraper.stats["failed"] == 0)
+        scraper.close()
+    elapsed = time.perf_counter() - start
+
+    if scraper.recorder is not None:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump({"all": recorded_all, "questions": scraper.recorder}, f)
+
+    s = scraper.stats
+    if stream.missing:
+        print(f"❌ {stream.missing} problems failed with no earlier data to fall back on (e.g. {missing[0]}); "
+              f"{args.out} left unchanged, rerun to resume ({s['requests']} requests, {s['retries']} retries)", file=sys.stderr)
+        return 1
+    print(f"✅ Wrote {stream.rows} rows to {args.out} in {elapsed:.1f}s "
+          f"({s['requests']} requests, {s['retries']} retries, {s['failed']} failed)")
+    return 1 if s["failed"] else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape the LeetCode catalog into the CSV used by app.py.")
+    parser.add_argument("--base-url", default=BASE_URL, help="API host (point at a local stub for offline runs)")
+    parser.add_argument("--out", default=CSV_FILE)
+    parser.add_argument("--checkpoint", help="Checkpoint JSONL (default: <out>.checkpoint.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--batch-size", type=int, default=20, help="Problems per aliased GraphQL request")
+    parser.add_argument("--window", type=int, default=1000, help="Max rows buffered ahead of the CSV write cursor")
+    parser.add_argument("--rate", type=float, default=10.0, help="Max requests per second (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=0.5, help="Base backoff in seconds (doubles per retry)")
+    parser.add_argument("--incremental", action="store_true", help="Only refetch problems whose stats changed since the last complete run")
+    parser.add_argument("--min-change", type=float, default=0.01, help="Relative submission-count change that triggers a refetch in --incremental")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any existing checkpoint")
+    parser.add_argument("--record", help="Also save raw API responses to this JSON file (replayable by the stub server)")
+    args = parser.parse_args(argv)
+    args.checkpoint = args.checkpoint or os.path.splitext(args.out)[0] + ".checkpoint.jsonl"
+    return args
+
+def main(argv=None):
+    return scrape(parse_args(argv))
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Process-local instrumentation: counters, gauges and histograms rendered in
+the Prometheus text format, plus an opt-in sampling profiler.
+
+Everything is per process. A gunicorn worker reports its own requests, and
+each scrape of /metrics is answered by whichever worker accepts it. Values
+that already live elsewhere, like cache hit counts, are read at scrape time
+by collectors, so keeping them costs nothing per request.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Seconds; tuned for requests and SQL statements (sub-ms up to a slow page)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+KINDS = ('counter', 'gauge', 'histogram')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Named metric families with label sets. Families are declared once with
+    `describe`. After that, `inc` / `set` / `observe` take the labels as
+    keyword arguments. `collector` registers a function that yields
+    (name, labels, value) when /metrics is rendered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}  # name -> (kind, help, buckets)
+        self._values = {}    # name -> {label pairs: value, or [bucket counts..., sum] for histograms}
+        self._collectors = []
+
+    def describe(self, name, kind, help, buckets=DEFAULT_BUCKETS):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown metric kind '{kind}', expected one of {KINDS}")
+        self._families[name] = (kind, help, tuple(buckets))
+        self._values.setdefault(name, {})
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[name][key] = value
+
+    def observe(self, name, value, **labels):
+        buckets = self._families[name][2]
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(buckets, value)  # First bucket with le >= value
+        with self._lock:
+            state = self._values[name].get(key)
+            if state is None:
+                state = self._values[name][key] = [0] * (len(buckets) + 2)  # Buckets, +Inf, sum
+            state[i] += 1
+            state[-1] += value
+
+    def collector(self, fn):
+        """Registers `fn` (usable as a decorator); its samples are added to each render."""
+        self._collectors.append(fn)
+        return fn
+
+    def clear(self, name=None):
+        """Drops recorded values, of one family or of all of them."""
+        with self._lock:
+            for values in ([self._values[name]] if name else self._values.values()):
+                values.clear()
+
+    def render(self):
+        collected = {}
+        for fn in self._collectors:
+            for name, labels, value in fn():
+                collected.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+        with self._lock:
+            snapshot = {name: {key: list(v) if isinstance(v, list) else v for key, v in values.items()}
+                        for name, values in self._values.items()}
+        lines = []
+        for name, (kind, help, buckets) in sorted(self._families.items()):
+            values = {**snapshot.get(name, {}), **collected.get(name, {})}
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key, value in sorted(values.items()):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(key)} {_number(value)}')
+                    continue
+                cumulative = 0
+                for le, count in zip(buckets + ('+Inf',), value):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(key + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(key)} {_number(float(value[-1]))}')
+                lines.append(f'{name}_count{_labels(key)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+class PhaseTimer:
+    """Wall time per named phase: `with phases('parse'): ...`."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+class StackSampler:
+    """
+    Statistical profiler for selected request threads. One daemon thread
+    (started lazily in each process) wakes every `interval` seconds and
+    records the stack of every thread between `start` and `stop`. Stacks
+    are kept in the folded format that flamegraph.pl and speedscope read:
+    "label;outer;...;inner count". At most `max_stacks` distinct stacks are
+    kept; samples of any further new stacks only count as dropped.
+    """
+
+    def __init__(self, interval=0.005, max_stacks=5000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self._active = {}  # thread id -> label
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def start(self, label):
+        with self._lock:
+            self._active[threading.get_ident()] = label
+            if self._pid != os.getpid():  # First use in this process (gunicorn forks after import)
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='stack-sampler', daemon=True).start()
+        self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            if not self._active: self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            frames = sys._current_frames()
+            for tid, label in active:
+                frame = frames.get(tid)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                key = ';'.join([label] + stack[::-1])
+                with self._lock:
+                    self.samples += 1
+                    if key in self.stacks or len(self.stacks) < self.max_stacks:
+                        self.stacks[key] += 1
+                    else:
+                        self.dropped += 1
+
+    def folded(self):
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = self.dropped = 0
@@ -0,0 +1,26 @@
+"""Add composite index for due-review lookups on solved_problem.
+
+Revision ID: 3f9c1a7d52be
+Revises: e352d1907e8c
+Create Date: 2026-10-18 09:12:41.208315
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7d52be'
+down_revision = 'e352d1907e8c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py also creates this index on import (create_all skips indexes on
+    # existing tables), so tolerate it already being there.
+    op.create_index('ix_solved_problem_user_next_review', 'solved_problem',
+                    ['user_id', 'next_review_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_solved_problem_user_next_review', table_name='solved_problem', if_exists=True)
@@ -0,0 +1,64 @@
+"""Store notes as compressed, deduplicated blobs with revision history.
+
+Revision ID: 5d0b7e93a1c4
+Revises: c47e9a2b1f08
+Create Date: 2026-10-18 19:26:05.118342
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0b7e93a1c4'
+down_revision = 'c47e9a2b1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py creates these on import too, so skip whatever is already there.
+    # Existing note.content is moved into note_blob on the next start.
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    if 'note_blob' not in tables:
+        op.create_table('note_blob',
+                        sa.Column('digest', sa.String(length=64), nullable=False),
+                        sa.Column('data', sa.LargeBinary(), nullable=False),
+                        sa.Column('size', sa.Integer(), nullable=False),
+                        sa.Column('refs', sa.Integer(), nullable=False),
+                        sa.PrimaryKeyConstraint('digest'))
+    if 'note_revision' not in tables:
+        op.create_table('note_revision',
+                        sa.Column('id', sa.Integer(), nullable=False),
+                        sa.Column('note_id', sa.Integer(), nullable=False),
+                        sa.Column('saved_at', sa.DateTime(), nullable=False),
+                        sa.Column('created_at', sa.DateTime(), nullable=False),
+                        sa.Column('size', sa.Integer(), nullable=False),
+                        sa.Column('is_full', sa.Boolean(), nullable=False),
+                        sa.Column('data', sa.LargeBinary(), nullable=False),
+                        sa.ForeignKeyConstraint(['note_id'], ['note.id']),
+                        sa.PrimaryKeyConstraint('id'))
+        op.create_index('ix_note_revision_note', 'note_revision', ['note_id', 'id'], unique=False)
+    if 'content_hash' not in {c['name'] for c in inspector.get_columns('note')}:
+        with op.batch_alter_table('note') as batch_op:
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+            batch_op.add_column(sa.Column('size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    # Put the current text back into note.content before the blobs go
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT note.id, note_blob.data FROM note JOIN note_blob ON note_blob.digest = note.content_hash")).all()
+    for note_id, data in rows:
+        conn.execute(sa.text("UPDATE note SET content = :content WHERE id = :id"),
+                     {'content': zlib.decompress(data).decode('utf-8'), 'id': note_id})
+    with op.batch_alter_table('note') as batch_op:
+        batch_op.drop_column('size')
+        batch_op.drop_column('content_hash')
+    op.drop_index('ix_note_revision_note', table_name='note_revision')
+    op.drop_table('note_revision')
+    op.drop_table('note_blob')
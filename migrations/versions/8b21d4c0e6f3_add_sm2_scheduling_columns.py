@@ -0,0 +1,35 @@
+"""Add SM-2 scheduling columns to solved_problem.
+
+Revision ID: 8b21d4c0e6f3
+Revises: 3f9c1a7d52be
+Create Date: 2026-10-18 14:03:27.511904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b21d4c0e6f3'
+down_revision = '3f9c1a7d52be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py adds these on import too, so skip whatever is already there.
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('solved_problem')}
+    if 'srs_ease' in columns: return
+    with op.batch_alter_table('solved_problem') as batch_op:
+        batch_op.add_column(sa.Column('srs_ease', sa.Float(), nullable=False, server_default='2.5'))
+        batch_op.add_column(sa.Column('srs_reps', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('last_reviewed_at', sa.DateTime(), nullable=True))
+    # Intervals past the first day mean at least one successful review already
+    op.execute("UPDATE solved_problem SET srs_reps = 2 WHERE srs_interval > 1")
+
+
+def downgrade():
+    with op.batch_alter_table('solved_problem') as batch_op:
+        batch_op.drop_column('last_reviewed_at')
+        batch_op.drop_column('srs_reps')
+        batch_op.drop_column('srs_ease')
@@ -0,0 +1,46 @@
+"""Add the notes full-text search index.
+
+Revision ID: 9e61f3a8d2b7
+Revises: 5d0b7e93a1c4
+Create Date: 2026-10-18 22:04:51.602117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e61f3a8d2b7'
+down_revision = '5d0b7e93a1c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py creates these on import too, and fills whichever index its
+    # NOTE_SEARCH_BACKEND uses on the next start, so skip what's there.
+    # note_fts is FTS5 on SQLite (if compiled in) and a tsvector table on Postgres.
+    conn = op.get_bind()
+    tables = set(sa.inspect(conn).get_table_names())
+    if 'note_term' not in tables:
+        op.create_table('note_term',
+                        sa.Column('note_id', sa.Integer(), nullable=False),
+                        sa.Column('term', sa.String(length=64), nullable=False),
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('occurrences', sa.Integer(), nullable=False),
+                        sa.ForeignKeyConstraint(['note_id'], ['note.id']),
+                        sa.PrimaryKeyConstraint('note_id', 'term'))
+        op.create_index('ix_note_term_user_term', 'note_term', ['user_id', 'term'], unique=False)
+    if conn.dialect.name == 'postgresql':
+        op.execute("CREATE TABLE IF NOT EXISTS note_fts (note_id INTEGER PRIMARY KEY REFERENCES note (id), "
+                   "user_id INTEGER NOT NULL, body TSVECTOR NOT NULL)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_note_fts_body ON note_fts USING GIN (body)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_note_fts_user ON note_fts (user_id)")
+    elif conn.dialect.name == 'sqlite' and conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(body, content='', tokenize='ascii')")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS note_fts")
+    op.drop_index('ix_note_term_user_term', table_name='note_term')
+    op.drop_table('note_term')
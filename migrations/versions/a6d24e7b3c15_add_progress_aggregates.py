@@ -0,0 +1,55 @@
+"""Add the per-user progress aggregates.
+
+Revision ID: a6d24e7b3c15
+Revises: 9e61f3a8d2b7
+Create Date: 2026-10-18 23:12:40.318562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d24e7b3c15'
+down_revision = '9e61f3a8d2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py creates these on import too, so skip whatever is already there.
+    # They are filled per user on first visit (rebuild_user_stats).
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'user_stats' not in tables:
+        op.create_table('user_stats',
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('total_solved', sa.Integer(), nullable=False),
+                        sa.Column('last_active_on', sa.Date(), nullable=True),
+                        sa.Column('current_run', sa.Integer(), nullable=False),
+                        sa.Column('longest_streak', sa.Integer(), nullable=False),
+                        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+                        sa.PrimaryKeyConstraint('user_id'))
+    if 'user_daily_activity' not in tables:
+        op.create_table('user_daily_activity',
+                        sa.Column('id', sa.Integer(), nullable=False),
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('day', sa.Date(), nullable=False),
+                        sa.Column('solved_count', sa.Integer(), nullable=False),
+                        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+                        sa.PrimaryKeyConstraint('id'),
+                        sa.UniqueConstraint('user_id', 'day', name='_user_day_uc'))
+    if 'user_topic_progress' not in tables:
+        op.create_table('user_topic_progress',
+                        sa.Column('id', sa.Integer(), nullable=False),
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('topic_slug', sa.String(length=40), nullable=False),
+                        sa.Column('solved_count', sa.Integer(), nullable=False),
+                        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+                        sa.PrimaryKeyConstraint('id'),
+                        sa.UniqueConstraint('user_id', 'topic_slug', name='_user_topic_uc'))
+
+
+def downgrade():
+    op.drop_table('user_topic_progress')
+    op.drop_table('user_daily_activity')
+    op.drop_table('user_stats')
@@ -0,0 +1,45 @@
+"""Add the precomputed due-review queue.
+
+Revision ID: c47e9a2b1f08
+Revises: 8b21d4c0e6f3
+Create Date: 2026-10-18 16:40:12.734018
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e9a2b1f08'
+down_revision = '8b21d4c0e6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py creates these on import too (and backfills the queue), so skip
+    # whatever is already there. The queue itself is filled on the next start
+    # or by `flask backfill-due-queue`.
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'due_review' not in tables:
+        op.create_table('due_review',
+                        sa.Column('solved_id', sa.Integer(), nullable=False),
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('problem_id', sa.Integer(), nullable=False),
+                        sa.Column('due_at', sa.DateTime(), nullable=True),
+                        sa.PrimaryKeyConstraint('solved_id'))
+        op.create_index('ix_due_review_user_due', 'due_review', ['user_id', 'due_at'], unique=False)
+    if 'due_queue_state' not in tables:
+        op.create_table('due_queue_state',
+                        sa.Column('id', sa.Integer(), nullable=False),
+                        sa.Column('horizon', sa.DateTime(), nullable=False),
+                        sa.PrimaryKeyConstraint('id'))
+    op.create_index('ix_solved_problem_next_review', 'solved_problem',
+                    ['next_review_at'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_solved_problem_next_review', table_name='solved_problem', if_exists=True)
+    op.drop_table('due_queue_state')
+    op.drop_index('ix_due_review_user_due', table_name='due_review')
+    op.drop_table('due_review')
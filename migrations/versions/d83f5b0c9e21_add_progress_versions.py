@@ -0,0 +1,45 @@
+"""Add progress versions and the change log for /api/progress delta sync.
+
+Revision ID: d83f5b0c9e21
+Revises: a6d24e7b3c15
+Create Date: 2026-10-18 23:31:05.904127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f5b0c9e21'
+down_revision = 'a6d24e7b3c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py adds these on import too, so skip whatever is already there.
+    inspector = sa.inspect(op.get_bind())
+    if 'progress_version' not in {c['name'] for c in inspector.get_columns('user_stats')}:
+        with op.batch_alter_table('user_stats') as batch_op:
+            batch_op.add_column(sa.Column('progress_version', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('progress_floor', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('progress_updated_at', sa.DateTime(), nullable=True))
+    if 'progress_change' not in inspector.get_table_names():
+        op.create_table('progress_change',
+                        sa.Column('id', sa.Integer(), nullable=False),
+                        sa.Column('user_id', sa.Integer(), nullable=False),
+                        sa.Column('version', sa.Integer(), nullable=False),
+                        sa.Column('problem_id', sa.Integer(), nullable=False),
+                        sa.Column('solved_at', sa.DateTime(), nullable=True),
+                        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+                        sa.PrimaryKeyConstraint('id'))
+        op.create_index('ix_progress_change_user_version', 'progress_change', ['user_id', 'version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_progress_change_user_version', table_name='progress_change')
+    op.drop_table('progress_change')
+    with op.batch_alter_table('user_stats') as batch_op:
+        batch_op.drop_column('progress_updated_at')
+        batch_op.drop_column('progress_floor')
+        batch_op.drop_column('progress_version')
@@ -0,0 +1,105 @@
+"""
+Full-text search over a user's notes: query parsing, snippets, and the
+pieces of the portable inverted index.
+
+The database does the matching where it can: FTS5 on SQLite, a tsvector
+with a GIN index on Postgres. On anything else, app.py keeps a plain
+note_term table of (note, term, count) postings and ranks with bm25()
+below. Every backend gets its terms from tokenize() here (lowercase runs
+of letters and digits, no stemming) rather than from the database's own
+parser, so they all find the same notes: Postgres gets tsvector/tsquery
+literals, which its text search parser never sees, and FTS5 gets the tokens
+ready-made, each tagged with the note's owner, so a user's search only reads
+that user's postings rather than those of every note holding a common
+word. Query terms AND together, and the last one also matches as a prefix
+(search as you type).
+"""
+import math
+import re
+from collections import Counter
+
+from markupsafe import escape
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+MAX_TERMS = 8
+MAX_TERM_LENGTH = 64  # Longer "words" (base64, hashes) aren't worth indexing
+TSVECTOR_MAX_POSITION = 16383  # Postgres limits
+TSVECTOR_MAX_POSITIONS = 256
+SNIPPET_CHARS = 160
+BM25_K1, BM25_B = 1.2, 0.75
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) <= MAX_TERM_LENGTH]
+
+def term_counts(text):
+    """{term: occurrences} for one note: its postings in the portable index."""
+    return Counter(tokenize(text))
+
+def parse_query(query):
+    """Distinct query terms in order (at most MAX_TERMS); the last one matches as a prefix."""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+
+
+def fts5_document(owner, text):
+    """FTS5 body for a note: its tokens as owner-tagged terms ('u7xheap')."""
+    return ' '.join(f'u{owner}x{t}' for t in tokenize(text))
+
+def fts5_query(owner, terms):
+    """FTS5 MATCH expression: every term in the owner's notes, the last as a prefix."""
+    return ' '.join(f'"u{owner}x{t}"' for t in terms) + '*'
+
+def tsvector(text):
+    """tsvector literal of a note's terms with their positions ('heap':3,9 'two':1)."""
+    positions = {}
+    for i, t in enumerate(tokenize(text), 1):
+        kept = positions.setdefault(t, [])
+        if len(kept) < TSVECTOR_MAX_POSITIONS: kept.append(min(i, TSVECTOR_MAX_POSITION))
+    return ' '.join(f"'{t}':" + ','.join(map(str, dict.fromkeys(p))) for t, p in positions.items())
+
+def tsquery(terms):
+    """tsquery literal: every term, the last as a prefix ('two' & 'poin':*)."""
+    return ' & '.join([f"'{t}'" for t in terms[:-1]] + [f"'{terms[-1]}':*"])
+
+
+def bm25(postings, notes, total_size):
+    """
+    Ranks notes for the portable index. `postings` maps each query term to
+    {note_id: occurrences} (prefix expansions already merged). `notes` maps
+    every note of the user to its size in bytes. `total_size` is their sum.
+    Bytes stand in for token counts in the length normalization. Only notes
+    matching every term get a score. Returns {note_id: score}.
+    """
+    if not postings or not notes: return {}
+    matched = set.intersection(*(set(p) for p in postings.values()))
+    n, avg = len(notes), max(total_size / len(notes), 1)
+    scores = dict.fromkeys(matched, 0.0)
+    for hits in postings.values():
+        idf = math.log(1 + (n - len(hits) + 0.5) / (len(hits) + 0.5))
+        for note_id in matched:
+            tf = hits[note_id]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * (notes.get(note_id) or 0) / avg)
+            scores[note_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+def snippet(text, terms, width=SNIPPET_CHARS):
+    """
+    HTML-escaped excerpt of `text` around the first match, with the matched
+    words in <mark>. Falls back to the start of the note.
+    """
+    if not terms: return str(escape(text[:width]))
+    words = '|'.join(re.escape(t) for t in terms[:-1])
+    pattern = re.compile(r'(?<![^\W_])(?:' + (words + '|' if words else '') + re.escape(terms[-1]) + r'[^\W_]*)(?![^\W_])', re.I)
+    first = pattern.search(text)
+    start = max(0, (first.start() if first else 0) - width // 3)
+    if start:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < start + 20 else start  # Don't open mid-word
+    end = min(len(text), start + width)
+    excerpt, parts, last = text[start:end], [], 0
+    for m in pattern.finditer(excerpt):
+        parts += [str(escape(excerpt[last:m.start()])), '<mark>', str(escape(m.group())), '</mark>']
+        last = m.end()
+    parts.append(str(escape(excerpt[last:])))
+    return ('…' if start else '') + ''.join(parts).replace('\n', ' ') + ('…' if end < len(text) else '')
@@ -0,0 +1,78 @@
+"""
+Password hashing off the request thread.
+
+bcrypt is slow on purpose (~0.3 s at cost 12), but it releases the GIL.
+Hashes therefore run on a small dedicated thread pool: the request thread
+waits for its result while the worker's other threads keep serving. The
+pool is bounded. Once `max_pending` hashes are queued or running, new ones
+fail fast with HasherBusy (login/signup answer 503 + Retry-After) instead
+of piling up behind a burst of logins.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class HasherBusy(Exception):
+    """The hashing queue is full (or a hash timed out); the client should retry."""
+
+
+def hash_cost(pw_hash):
+    """Cost factor of a `$2b$12$...` hash, or None if it isn't bcrypt."""
+    parts = pw_hash.split('$')
+    if len(parts) < 4 or not parts[2].isdigit(): return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """
+    Wraps a Flask-Bcrypt instance. workers=0 hashes inline on the calling
+    thread (CLI commands, one-off scripts). The pool is created lazily per
+    process, so it is safe to build before gunicorn forks.
+    """
+
+    def __init__(self, bcrypt, rounds=12, workers=1, max_pending=4, timeout=10):
+        self.bcrypt = bcrypt
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.rejected = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='bcrypt')
+                    self._slots = threading.BoundedSemaphore(self.max_pending)
+                    self._pid = os.getpid()
+        return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        if self.workers <= 0: return fn(*args)
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy() from None  # Keeps its slot until the hash actually finishes
+
+    def hash(self, password):
+        return self._run(self.bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        return self._run(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """True if `pw_hash` was made with a different cost than the configured one."""
+        return hash_cost(pw_hash) != self.rounds
@@ -0,0 +1,190 @@
+"""
+Similar-problems graph over the loaded catalog.
+
+Built once per catalog load, next to ProblemIndex. Nodes are catalog row
+positions. Edges are stored as CSR arrays (indptr / indices):
+- similar: LeetCode's "Similar Questions" links, resolved from slugs once
+  and made symmetric. Each row is pre-sorted by signal score.
+- topic:   problem -> tag and tag -> problem incidence. Problems sharing
+  tags are scored at query time (IDF-weighted overlap). That keeps the
+  structure linear in the catalog size: materialized pairwise edges would
+  be quadratic, since "Array" alone covers a large share of the catalog.
+"""
+import json
+
+import numpy as np
+
+MAX_HOPS = 3
+NEIGHBOUR_KINDS = ('similar', 'topic', 'all')
+DIFFICULTY_CODES = {'Easy': 0, 'Medium': 1, 'Hard': 2}
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def slug_from_link(link):
+    return link.rstrip('/').rsplit('/', 1)[-1] if isinstance(link, str) else ''
+
+
+def csr(rows, cols, n, key=None):
+    """indptr / indices for edges rows[i] -> cols[i]; each row ordered by `key` (ascending), else as given."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    order = np.lexsort((key, rows)) if key is not None else np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+def gather(indptr, indices, rows):
+    """The neighbour lists of `rows`, concatenated (vectorized: no per-row Python loop)."""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if not total: return _EMPTY
+    offsets = np.arange(total) + np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets].astype(np.int64)
+
+
+class ProblemGraph:
+    """
+    Read-only neighbourhood queries over one catalog version:
+    - `similar`: k-hop BFS over similar-question edges.
+    - `shared_topics`: problems sharing tags with their overlap.
+    - `neighbours`: either or both, filtered and ranked for the API.
+    """
+    __slots__ = ('ids', 'score', 'rank', 'difficulty', 'topic_slugs', 'topic', 'similar_ptr', 'similar_idx',
+                 'tag_names', 'tag_idf', 'tags_ptr', 'tags_idx', 'members_ptr', 'members_idx')
+
+    def __init__(self, df):
+        n = len(df)
+        if not n:
+            self.ids, self.score, self.rank = _EMPTY, np.empty(0), _EMPTY
+            self.difficulty = np.empty(0, dtype=np.int8)
+            self.topic_slugs, self.topic = np.empty(0, dtype=str), np.empty(0, dtype=np.int64)
+            self.similar_ptr = self.tags_ptr = np.zeros(1, dtype=np.int64)
+            self.similar_idx = self.tags_idx = self.members_idx = np.empty(0, dtype=np.int32)
+            self.tag_names, self.tag_idf, self.members_ptr = (), np.empty(0), np.zeros(1, dtype=np.int64)
+            return
+        self.ids = df['ID'].to_numpy(dtype=np.int64)
+        self.score = df['signal_score'].to_numpy(dtype=float)
+        self.rank = np.empty(n, dtype=np.int64)  # 0 = highest signal score
+        self.rank[np.argsort(-self.score, kind='stable')] = np.arange(n)
+        self.difficulty = np.array([DIFFICULTY_CODES.get(d, -1) for d in df['Difficulty']], dtype=np.int8)
+        self.topic_slugs, self.topic = np.unique(df['AssignedTopic'].to_numpy(dtype=str), return_inverse=True)
+
+        # Similar-question edges: slugs -> positions, both directions, deduplicated
+        pos_by_slug = {slug_from_link(link): i for i, link in enumerate(df['Link'])}
+        src, dst = [], []
+        for i, raw in enumerate(df['Similar Questions']):
+            if not isinstance(raw, str) or len(raw) <= 2: continue
+            try:
+                entries = json.loads(raw)
+            except ValueError:
+                continue
+            for entry in entries:
+                j = pos_by_slug.get(entry.get('titleSlug'))
+                if j is not None and j != i:
+                    src.append(i)
+                    dst.append(j)
+        edges = np.unique(np.array(src + dst, dtype=np.int64) * n + np.array(dst + src, dtype=np.int64))
+        src, dst = edges // n, edges % n
+        self.similar_ptr, self.similar_idx = csr(src, dst, n, key=self.rank[dst])
+
+        # Tag incidence, both ways; tag members sorted by signal score
+        tag_ids = {}
+        rows, cols = [], []
+        for i, tags in enumerate(df['Topics']):
+            for tag in dict.fromkeys(tags):
+                rows.append(i)
+                cols.append(tag_ids.setdefault(tag, len(tag_ids)))
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        self.tag_names = tuple(tag_ids)
+        self.tag_idf = np.log1p(n / np.bincount(cols, minlength=len(tag_ids)))
+        self.tags_ptr, self.tags_idx = csr(rows, cols, n)
+        self.members_ptr, self.members_idx = csr(cols, rows, len(tag_ids), key=self.rank[rows])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__ if hasattr(getattr(self, name), 'nbytes'))
+
+    def similar(self, pos, hops=1):
+        """(positions, hop distances) within `hops` similar-question edges, unordered."""
+        visited = np.zeros(len(self.ids), dtype=bool)
+        visited[pos] = True
+        frontier = np.array([pos], dtype=np.int64)
+        found, dist = [], []
+        for d in range(1, hops + 1):
+            nbrs = gather(self.similar_ptr, self.similar_idx, frontier)
+            nbrs = np.unique(nbrs[~visited[nbrs]])
+            if not len(nbrs): break
+            visited[nbrs] = True
+            found.append(nbrs)
+            dist.append(np.full(len(nbrs), d, dtype=np.int64))
+            frontier = nbrs
+        if not found: return _EMPTY, _EMPTY
+        return np.concatenate(found), np.concatenate(dist)
+
+    def shared_topics(self, pos):
+        """(positions, shared tag counts, IDF-weighted overlap) of problems sharing a tag with `pos`, unordered."""
+        tags = self.tags_idx[self.tags_ptr[pos]:self.tags_ptr[pos + 1]].astype(np.int64)
+        members = gather(self.members_ptr, self.members_idx, tags)
+        if not len(members): return _EMPTY, _EMPTY, np.empty(0)
+        n = len(self.ids)
+        # Dense bincounts over the catalog beat sorting ~thousands of members for a few tags
+        overlap = np.bincount(members, weights=np.repeat(self.tag_idf[tags], np.diff(self.members_ptr)[tags]), minlength=n)
+        shared = np.bincount(members, minlength=n)
+        shared[pos] = 0
+        found = np.flatnonzero(shared)
+        return found, shared[found], overlap[found]
+
+    def _filter(self, found, difficulties, topics, exclude_ids):
+        keep = np.ones(len(found), dtype=bool)
+        if difficulties:
+            keep &= np.isin(self.difficulty[found], [DIFFICULTY_CODES.get(d, -1) for d in difficulties])
+        if topics:
+            keep &= np.isin(self.topic[found], np.flatnonzero(np.isin(self.topic_slugs, list(topics))))
+        if exclude_ids is not None and len(exclude_ids):
+            keep &= ~np.isin(self.ids[found], np.fromiter(exclude_ids, dtype=np.int64))
+        return np.flatnonzero(keep)
+
+    def neighbours(self, pos, kind='similar', hops=1, difficulties=None, topics=None, exclude_ids=None, limit=10):
+        """
+        Up to `limit` (positions, hops, shared tags) for the API, after
+        filtering by difficulty names, roadmap topic slugs and IDs to skip.
+        Similar-question neighbours rank nearest first; shared-tag ones by
+        overlap; ties by signal score. Kind 'all' lists similar-question
+        neighbours first, then fills up with shared-tag ones (hops 0).
+        """
+        n = len(self.ids)
+        parts = []
+        linked = _EMPTY
+        if kind in ('similar', 'all'):
+            found, dist = self.similar(pos, hops)
+            linked = found
+            keep = self._filter(found, difficulties, topics, exclude_ids)
+            keep = top_k(keep, dist[keep] * n + self.rank[found[keep]], limit)
+            parts.append((found[keep], dist[keep], np.zeros(len(keep), dtype=np.int64)))
+            limit -= len(keep)
+        if kind in ('topic', 'all') and limit > 0:
+            found, shared, overlap = self.shared_topics(pos)
+            keep = self._filter(found, difficulties, topics, exclude_ids)
+            if len(linked):
+                keep = keep[~np.isin(found[keep], linked)]
+            # Overlap in fixed point so (overlap desc, rank asc) packs into one exact int64 key
+            key = self.rank[found[keep]] - np.rint(overlap[keep] * 1e6).astype(np.int64) * n
+            keep = top_k(keep, key, limit)
+            parts.append((found[keep], np.zeros(len(keep), dtype=np.int64), shared[keep]))
+        if not parts: return _EMPTY, _EMPTY, _EMPTY
+        return tuple(np.concatenate(cols) for cols in zip(*parts))
+
+
+def top_k(rows, key, k):
+    """The `k` entries of `rows` with the smallest `key`, in key order."""
+    if len(rows) > k:
+        part = np.argpartition(key, k - 1)[:k]
+        rows, key = rows[part], key[part]
+    return rows[np.argsort(key, kind='stable')]
@@ -0,0 +1,91 @@
+"""
+Immutable ID -> problem record index over the loaded catalog.
+
+Built once per catalog load so lookups never touch the DataFrame again.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Problem(NamedTuple):
+    """One catalog row. Tuple-backed, so it is compact and read-only."""
+    id: int
+    title: str
+    difficulty: str
+    link: str
+    topics: tuple
+    acceptance_rate: float
+    likes: int
+    dislikes: int
+    total_submissions: int
+    assigned_topic: str
+    signal_score: float
+    similar_questions: str
+
+
+# DataFrame column -> Problem field, in field order
+COLUMN_MAP = [
+    ('ID', 'id'), ('Title', 'title'), ('Difficulty', 'difficulty'), ('Link', 'link'),
+    ('Topics', 'topics'), ('AcceptanceRate', 'acceptance_rate'), ('Likes', 'likes'),
+    ('Dislikes', 'dislikes'), ('TotalSubmissions', 'total_submissions'),
+    ('AssignedTopic', 'assigned_topic'), ('signal_score', 'signal_score'),
+    ('Similar Questions', 'similar_questions'),
+]
+
+
+class ProblemIndex:
+    """
+    Read-only lookup structure:
+    - `get` / `get_many`: O(1) dict lookups returning shared Problem records.
+    - `positions`: vectorized ID -> row position via a sorted ID array, for
+      callers that work on catalog columns rather than records.
+    """
+    __slots__ = ('_by_id', '_records', 'ids', '_sorted_ids', '_sorted_pos')
+
+    def __init__(self, df):
+        if df.empty:
+            self._records = ()
+            self.ids = np.empty(0, dtype=np.int64)
+        else:
+            cols = []
+            for col, field in COLUMN_MAP:
+                values = df[col].tolist()
+                if field == 'topics':
+                    values = [tuple(v) for v in values]
+                elif field == 'similar_questions':
+                    values = [v if isinstance(v, str) else '' for v in values]
+                cols.append(values)
+            self._records = tuple(Problem._make(row) for row in zip(*cols))
+            self.ids = df['ID'].to_numpy(dtype=np.int64)
+
+        self._by_id = {p.id: p for p in self._records}
+        self._sorted_pos = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._sorted_pos]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, pid):
+        return pid in self._by_id
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def get(self, pid):
+        return self._by_id.get(pid)
+
+    def get_many(self, pids):
+        """Bulk lookup; returns records in request order, None for unknown IDs."""
+        by_id = self._by_id
+        return [by_id.get(pid) for pid in pids]
+
+    def positions(self, pids):
+        """Row positions (in catalog order) for an array of IDs, -1 where unknown."""
+        pids = np.asarray(pids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(pids.shape, -1, dtype=np.int64)
+        slot = np.searchsorted(self._sorted_ids, pids)
+        slot = np.minimum(slot, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[slot] == pids
+        return np.where(found, self._sorted_pos[slot], -1)
@@ -0,0 +1,108 @@
+"""
+Personalized "next up" recommendations over one catalog version.
+
+Every catalog problem gets a score from whole-array operations. The score
+is a weighted sum of:
+- quality:   signal-score percentile (1 = best in the catalog).
+- weakness:  1 - the user's progress in the problem's radar group (the
+             dashboard's RADAR_GROUPS percentages, from the solved set).
+- proximity: similar-question links to the user's most recent solves,
+             capped at PROXIMITY_CAP links.
+Solved problems are masked out. Each of the top `limit` comes back with a
+reason: the component that lifts it furthest above the catalog median
+('quality' when none does).
+"""
+import numpy as np
+
+from problem_graph import gather
+
+WEIGHTS = {'quality': 1.0, 'weakness': 0.8, 'proximity': 0.6}
+PROXIMITY_CAP = 2
+RECENT_SEEDS = 30  # Most recent solves used for proximity
+
+
+class Recommender:
+    """
+    Catalog-level arrays are built once. Roadmap membership (for group
+    progress) is resolved on first use, so 'lazy' roadmap mode stays lazy
+    until someone asks for recommendations.
+    """
+
+    def __init__(self, graph, index, roadmaps, groups):
+        self.graph = graph
+        self.index = index
+        self.roadmaps = roadmaps
+        self.group_names = tuple(groups)
+        self.group_of_slug = {slug: g for g, slugs in enumerate(groups.values()) for slug in slugs}
+        n = len(graph)
+        self.quality = 1 - graph.rank / max(n - 1, 1)
+        slug_groups = np.array([self.group_of_slug.get(s, -1) for s in graph.topic_slugs.tolist()], dtype=np.int64)
+        self.group_of = slug_groups[graph.topic] if n else np.empty(0, dtype=np.int64)  # By assigned topic
+        self._roadmap_groups = None
+
+    def roadmap_groups(self):
+        """(radar group of each roadmap member, -1 elsewhere; roadmap problems per group)."""
+        if self._roadmap_groups is None:
+            member_group = np.full(len(self.graph), -1, dtype=np.int64)
+            for slug, ids in self.roadmaps.topic_ids().items():
+                positions = self.index.positions(ids)
+                member_group[positions[positions >= 0]] = self.group_of_slug.get(slug, -1)
+            sizes = np.bincount(member_group[member_group >= 0], minlength=len(self.group_names))
+            self._roadmap_groups = (member_group, sizes)
+        return self._roadmap_groups
+
+    def group_progress(self, solved):
+        """Share (0-1) of each radar group's roadmap problems among `solved` positions."""
+        member_group, sizes = self.roadmap_groups()
+        groups = member_group[solved]
+        counts = np.bincount(groups[groups >= 0], minlength=len(self.group_names))
+        return np.divide(counts, sizes, out=np.zeros(len(sizes)), where=sizes > 0)
+
+    def scores(self, solved, recent):
+        """(total, {component: weighted array}) for every catalog position."""
+        n = len(self.graph)
+        weakness = np.append(1 - self.group_progress(solved), 0.0)  # Index -1: no radar group
+        links = gather(self.graph.similar_ptr, self.graph.similar_idx, recent)
+        proximity = np.minimum(np.bincount(links, minlength=n), PROXIMITY_CAP) / PROXIMITY_CAP
+        parts = {
+            'quality': WEIGHTS['quality'] * self.quality,
+            'weakness': WEIGHTS['weakness'] * weakness[self.group_of],
+            'proximity': WEIGHTS['proximity'] * proximity,
+        }
+        total = parts['quality'] + parts['weakness'] + parts['proximity']
+        total[solved] = -np.inf
+        return total, parts
+
+    def recommend(self, solved, recent, limit=10):
+        """
+        Top `limit` unsolved problems as JSON-ready dicts, best first (ties by
+        signal score). `solved` / `recent` are catalog positions; `recent`
+        should be the latest solves, newest first.
+        """
+        n = len(self.graph)
+        limit = min(limit, n - len(np.unique(solved)))
+        if limit <= 0: return []
+        total, parts = self.scores(solved, recent)
+        top = np.argpartition(-total, limit - 1)[:limit]
+        top = top[np.lexsort((self.graph.rank[top], -total[top]))]
+        progress = self.group_progress(solved)
+        # Unweighted distance above the typical problem, per component
+        lift = {name: (part[top] - np.median(part)) / WEIGHTS[name] for name, part in parts.items()}
+
+        recent = recent.tolist()
+        recs = []
+        for i, (pos, record) in enumerate(zip(top.tolist(), self.index.get_many(self.graph.ids[top].tolist()))):
+            # Only a component that actually lifts the problem can explain it
+            reason = max((name for name in lift if lift[name][i] > 0), key=lambda name: lift[name][i], default='quality')
+            item = {'id': record.id, 'title': record.title, 'difficulty': record.difficulty,
+                    'link': record.link, 'topic': record.assigned_topic,
+                    'score': round(float(total[pos]), 4), 'reason': reason}
+            group = int(self.group_of[pos])
+            if reason == 'weakness' and group >= 0:
+                item.update(group=self.group_names[group], group_progress=round(float(progress[group]) * 100, 1))
+            elif reason == 'proximity':
+                linked = set(self.graph.similar_idx[self.graph.similar_ptr[pos]:self.graph.similar_ptr[pos + 1]].tolist())
+                seed = next((s for s in recent if s in linked), None)
+                if seed is not None: item['similar_to'] = int(self.graph.ids[seed])
+            recs.append(item)
+        return recs
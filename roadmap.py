@@ -0,0 +1,196 @@
+"""
+Roadmap engine: builds and caches the curated per-topic problem lists.
+
+Two modes:
+- eager: every topic is built at catalog load. Combined with gunicorn's
+  preload_app, the master builds once and forked workers share the pages.
+- lazy:  topics are built on first request, single-flight per topic so
+  concurrent requests for the same topic wait for one build.
+"""
+import threading
+import time
+
+ROADMAP_MODES = ('eager', 'lazy')
+
+
+# Roadmap layout. Wave patterns are picked by the topic's share of Hard
+# problems: the first entry whose threshold the ratio exceeds (None = always).
+DEFAULT_ROADMAP_CONFIG = {
+    'max_items': 60,
+    'tutorial': ['Easy', 'Easy', 'Medium'],
+    'wave_patterns': [
+        (0.25, ['Medium', 'Medium', 'Hard', 'Easy']),                   # Abundance of Hards: Standard Game Loop
+        (0.10, ['Medium', 'Medium', 'Medium', 'Hard', 'Easy']),         # Moderate Hards: Spaced out Boss fights
+        (None, ['Medium', 'Easy', 'Medium', 'Medium', 'Hard', 'Easy']), # Conservation Mode: Rarely use Hards
+    ],
+}
+
+# Per-topic overrides, merged over DEFAULT_ROADMAP_CONFIG,
+# e.g. {'math-geometry': {'max_items': 40}}
+TOPIC_ROADMAP_CONFIG = {}
+
+# Tier to pop from, then fallbacks when it runs dry
+TIER_FALLBACKS = {
+    'Easy': ('Easy', 'Medium', 'Hard'),    # Fallback: Doable Medium, then only Hards left
+    'Medium': ('Medium', 'Easy', 'Hard'),
+    'Hard': ('Hard', 'Medium', 'Easy'),    # Fallback: A chunky Medium
+}
+
+
+def roadmap_config_for(slug, overrides=None):
+    overrides = TOPIC_ROADMAP_CONFIG if overrides is None else overrides
+    return {**DEFAULT_ROADMAP_CONFIG, **overrides.get(slug, {})}
+
+
+def pick_wave_pattern(hard_ratio, wave_patterns):
+    for threshold, pattern in wave_patterns:
+        if threshold is None or hard_ratio > threshold:
+            return pattern
+    return wave_patterns[-1][1]
+
+
+def build_roadmap(df_topic, config=None):
+    """
+    GAME DESIGN PROGRESSION LOGIC (v2)
+    -----------------------------
+    1. Tutorial: 2 Easy -> 1 Medium
+    2. Adaptive Wave: Adjusts difficulty pattern based on the topic's inventory.
+
+    Pools are row labels sorted by signal score and consumed through cursors,
+    so building is linear in the topic size; only the chosen rows are turned
+    into dicts.
+    """
+    config = config or DEFAULT_ROADMAP_CONFIG
+    if df_topic.empty: return []
+
+    # 1. Bucket and Sort by Signal Score
+    pools = {
+        tier: df_topic.index[df_topic['Difficulty'] == tier]
+        for tier in ('Easy', 'Medium', 'Hard')
+    }
+    pools = {
+        tier: df_topic.loc[labels, 'signal_score'].sort_values(ascending=False).index.tolist()
+        for tier, labels in pools.items()
+    }
+    cursors = dict.fromkeys(pools, 0)
+    remaining = sum(len(p) for p in pools.values())
+
+    # 2. Determine Adaptive Pattern (Inventory Check)
+    hard_ratio = len(pools['Hard']) / remaining if remaining > 0 else 0
+    wave_pattern = pick_wave_pattern(hard_ratio, config['wave_patterns'])
+
+    ids = df_topic['ID']
+    chosen = []
+    seen_ids = set()
+
+    def pop_best(difficulty_tier):
+        """Attempts to pop from specific tier, with intelligent fallbacks."""
+        nonlocal remaining
+        for tier in TIER_FALLBACKS.get(difficulty_tier, ()):
+            pos = cursors[tier]
+            if pos < len(pools[tier]):
+                cursors[tier] = pos + 1
+                remaining -= 1
+                return pools[tier][pos]
+        return None
+
+    def take(label):
+        pid = ids[label]
+        if pid not in seen_ids:
+            seen_ids.add(pid)
+            chosen.append(label)
+
+    max_items = config['max_items']
+
+    # --- PHASE 1: THE TUTORIAL ---
+    for tier in config['tutorial']:
+        label = pop_best(tier)
+        if label is not None: take(label)
+
+    # --- PHASE 2: THE ADAPTIVE WAVE ---
+    idx = 0
+    pattern_len = len(wave_pattern)
+
+    while remaining and len(chosen) < max_items:
+        label = pop_best(wave_pattern[idx % pattern_len])
+        if label is None: break
+        take(label)
+        idx += 1
+
+    return df_topic.loc[chosen].to_dict('records')
+
+
+class RoadmapEngine:
+    """
+    Holds the roadmaps for one catalog. Only slugs in `slugs` are cached, so
+    arbitrary URLs can't grow the cache. Build timings and hit/miss counts are
+    kept for measuring first-request latency.
+    """
+
+    def __init__(self, data, slugs, mode='eager', topic_config=None):
+        if mode not in ROADMAP_MODES:
+            raise ValueError(f"Unknown roadmap mode '{mode}', expected one of {ROADMAP_MODES}")
+        self.data = data
+        self.slugs = tuple(slugs)
+        self._known = frozenset(self.slugs)
+        self.mode = mode
+        self.topic_config = TOPIC_ROADMAP_CONFIG if topic_config is None else topic_config
+        self.build_seconds = {}
+        self.hits = 0
+        self.misses = 0
+        self._roadmaps = {}
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._topic_ids = None
+        self._topic_of = None
+        if mode == 'eager':
+            self.precompute()
+
+    def _build(self, slug):
+        start = time.perf_counter()
+        df_topic = self.data[self.data['AssignedTopic'] == slug] if not self.data.empty else self.data
+        roadmap = build_roadmap(df_topic, roadmap_config_for(slug, self.topic_config))
+        self.build_seconds[slug] = time.perf_counter() - start
+        return roadmap
+
+    def precompute(self):
+        for slug in self.slugs:
+            if slug not in self._roadmaps:
+                self._roadmaps[slug] = self._build(slug)
+
+    def get(self, slug):
+        roadmap = self._roadmaps.get(slug)
+        if roadmap is not None:
+            self.hits += 1
+            return roadmap
+        if slug not in self._known: return []
+
+        # Single-flight: one builder per slug, latecomers block on its lock
+        with self._lock:
+            slug_lock = self._inflight.setdefault(slug, threading.Lock())
+        with slug_lock:
+            roadmap = self._roadmaps.get(slug)
+            if roadmap is None:
+                self.misses += 1
+                roadmap = self._build(slug)
+                self._roadmaps[slug] = roadmap
+            else:
+                self.hits += 1
+        with self._lock:
+            self._inflight.pop(slug, None)
+        return roadmap
+
+    def is_built(self, slug):
+        return slug in self._roadmaps
+
+    def topic_ids(self):
+        """{slug: [problem IDs in roadmap order]} for every topic (builds any missing)."""
+        if self._topic_ids is None:
+            self._topic_ids = {slug: [p['ID'] for p in self.get(slug)] for slug in self.slugs}
+        return self._topic_ids
+
+    def topic_of(self, pid):
+        """Slug of the roadmap containing a problem, or None if it isn't on any roadmap."""
+        if self._topic_of is None:
+            self._topic_of = {pid: slug for slug, ids in self.topic_ids().items() for pid in ids}
+        return self._topic_of.get(pid)
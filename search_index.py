@@ -0,0 +1,124 @@
+"""
+In-memory catalog search: an inverted index over title words, problem IDs
+and topic tags, plus facet bitmaps.
+
+Built once per catalog version (Catalog.search), so every reload rebuilds
+it. Token IDs follow sorted vocabulary order. Every prefix is then a
+contiguous range of token IDs, and so a contiguous slice of the CSR
+postings: typeahead on "bin" is one slice, however many words start with
+it. Query terms AND together, each matching by prefix. Problems with more
+terms matched in the title rank first, then by signal score.
+"""
+import bisect
+import functools
+import re
+
+import numpy as np
+
+from problem_graph import DIFFICULTY_CODES, csr, top_k
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+MAX_TERMS = 8
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    - `vocab`: sorted tokens; `title_*` / `tag_*`: CSR postings (token ID -> row positions).
+    - `difficulty_masks` / `topic_masks`: one bool bitmap per facet value.
+    - `search`: text + facet filters -> (page of positions, total, facet counts).
+    """
+    __slots__ = ('n', 'vocab', 'title_ptr', 'title_idx', 'tag_ptr', 'tag_idx', 'rank',
+                 'difficulty', 'topic_slugs', 'topic', 'difficulty_masks', 'topic_masks')
+
+    def __init__(self, df):
+        self.n = n = len(df)
+        title_tokens = [set(tokenize(title)) | {str(pid)} for pid, title in zip(df['ID'].tolist(), df['Title'].tolist())] if n else []
+        tag_words = functools.lru_cache(maxsize=None)(tokenize)  # A few dozen distinct tags
+        tag_tokens = [{w for tag in tags for w in tag_words(tag)} for tags in df['Topics']] if n else []
+        self.vocab = sorted(set().union(*title_tokens, *tag_tokens))
+        token_id = {token: i for i, token in enumerate(self.vocab)}
+        self.title_ptr, self.title_idx = self._postings(title_tokens, token_id)
+        self.tag_ptr, self.tag_idx = self._postings(tag_tokens, token_id)
+
+        score = df['signal_score'].to_numpy(dtype=float) if n else np.empty(0)
+        self.rank = np.empty(n, dtype=np.int64)  # 0 = highest signal score
+        self.rank[np.argsort(-score, kind='stable')] = np.arange(n)
+        self.difficulty = np.array([DIFFICULTY_CODES.get(d, -1) for d in df['Difficulty']] if n else [], dtype=np.int8)
+        self.topic_slugs, self.topic = np.unique(df['AssignedTopic'].to_numpy(dtype=str) if n else np.empty(0, dtype=str),
+                                                 return_inverse=True)
+        self.difficulty_masks = {name: self.difficulty == code for name, code in DIFFICULTY_CODES.items()}
+        self.topic_masks = {slug: self.topic == k for k, slug in enumerate(self.topic_slugs.tolist())}
+
+    @staticmethod
+    def _postings(row_tokens, token_id):
+        rows = np.repeat(np.arange(len(row_tokens)), [len(tokens) for tokens in row_tokens])
+        ids = np.fromiter((token_id[t] for tokens in row_tokens for t in tokens), dtype=np.int64, count=len(rows))
+        return csr(ids, rows, len(token_id))
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        arrays = [self.title_ptr, self.title_idx, self.tag_ptr, self.tag_idx, self.rank, self.difficulty, self.topic]
+        masks = list(self.difficulty_masks.values()) + list(self.topic_masks.values())
+        return sum(a.nbytes for a in arrays + masks)
+
+    def term_range(self, term):
+        """Token ID range [lo, hi) of every vocabulary word starting with `term`."""
+        lo = bisect.bisect_left(self.vocab, term)
+        return lo, bisect.bisect_left(self.vocab, term + '\x7f', lo)
+
+    def term_masks(self, term):
+        """(in title, in tags) bitmaps of the problems with a word starting with `term`."""
+        lo, hi = self.term_range(term)
+        in_title = np.zeros(self.n, dtype=bool)
+        in_title[self.title_idx[self.title_ptr[lo]:self.title_ptr[hi]]] = True
+        in_tags = np.zeros(self.n, dtype=bool)
+        in_tags[self.tag_idx[self.tag_ptr[lo]:self.tag_ptr[hi]]] = True
+        return in_title, in_tags
+
+    def _facet(self, masks, values):
+        """OR of the bitmaps for `values` (unknown values match nothing)."""
+        selected = np.zeros(self.n, dtype=bool)
+        for value in values:
+            mask = masks.get(value)
+            if mask is not None: selected |= mask
+        return selected
+
+    def search(self, query='', difficulties=(), topics=(), solved=None, solved_positions=None, limit=20, offset=0):
+        """
+        Positions for one page of results (best first), the total match
+        count and facet counts over all matches. `solved` (True/False/None)
+        filters on `solved_positions`, which also feeds the solved facet.
+        """
+        n = self.n
+        match = np.ones(n, dtype=bool)
+        title_hits = np.zeros(n, dtype=np.int64)
+        for term in list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]:
+            in_title, in_tags = self.term_masks(term)
+            match &= in_title | in_tags
+            title_hits += in_title
+        if difficulties: match &= self._facet(self.difficulty_masks, difficulties)
+        if topics: match &= self._facet(self.topic_masks, topics)
+        is_solved = np.zeros(n, dtype=bool)
+        if solved_positions is not None: is_solved[solved_positions] = True
+        if solved is not None: match &= is_solved if solved else ~is_solved
+
+        hits = np.flatnonzero(match)
+        difficulty_counts = np.bincount(self.difficulty[hits] + 1, minlength=len(DIFFICULTY_CODES) + 1)[1:]
+        topic_counts = np.bincount(self.topic[hits], minlength=len(self.topic_slugs))
+        solved_count = int(np.count_nonzero(is_solved[hits]))
+        facets = {
+            'difficulty': {name: int(difficulty_counts[code]) for name, code in DIFFICULTY_CODES.items()},
+            'topic': {slug: int(c) for slug, c in zip(self.topic_slugs.tolist(), topic_counts.tolist()) if c},
+            'solved': {'true': solved_count, 'false': len(hits) - solved_count},
+        }
+        if offset >= len(hits): return hits[:0], len(hits), facets
+        key = self.rank[hits] - title_hits[hits] * n
+        page = top_k(hits, key, offset + limit)[offset:]
+        return page, len(hits), facets
@@ -1,6 +1,6 @@
 import sys
 from datetime import datetime, timedelta
-from app import app, db, User, SolvedProblem, bcrypt, DATA
+from app import app, db, User, SolvedProblem, bcrypt, CATALOG, rebuild_user_stats, refresh_due_queue
 
 def seed_srs_alerts():
     """
@@ -10,7 +10,7 @@ def seed_srs_alerts():
     print("--- 🟢 INITIALIZING SRS SEED SEQUENCE ---")
 
     # Ensure Data is loaded (needed to check if Problem IDs exist)
-    if DATA.empty:
+    if CATALOG.data.empty:
         print("❌ Error: CSV Data not loaded. Please run helper.py first.")
         return
 
@@ -79,6 +79,10 @@ def seed_srs_alerts():
             db.session.add(problem)
             print(f"   -> Problem ID {s['id']}: {s['desc']} | Next Review: {due_date.strftime('%Y-%m-%d %H:%M')}")
 
+        # Rows were written directly, so resync the dashboard aggregates and due queue
+        db.session.flush()
+        rebuild_user_stats(user.id)
+        refresh_due_queue(user.id)
         db.session.commit()
         print("--- ✅ SEQUENCE COMPLETE ---")
         print(f"👉 Login with User: {username} | Pass: {password}")
@@ -0,0 +1,85 @@
+"""
+Spaced-repetition scheduling: SM-2 intervals with per-problem ease, and a
+load balancer that spreads clusters of reviews over neighbouring days.
+
+Everything works elementwise on numpy arrays. A single review (one resolve
+request) and the nightly rebalance over millions of rows use the same code.
+Intervals are in days.
+"""
+import numpy as np
+
+# Recall grade on SM-2's 0-5 scale; below PASSING_GRADE restarts the problem
+GRADES = {'again': 1, 'hard': 3, 'good': 4, 'easy': 5}
+PASSING_GRADE = 3
+DEFAULT_GRADE = GRADES['good']
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVALS = (1.0, 6.0)  # After the 1st and 2nd successful repetition; then interval * ease
+
+# Reviews may move by FUZZ * interval days (at most MAX_SPREAD_DAYS) to even out the daily load
+FUZZ = 0.1
+MAX_SPREAD_DAYS = 7
+
+
+def parse_grade(value):
+    """A grade name ('good') or number (0-5) -> int; None -> DEFAULT_GRADE. Raises ValueError."""
+    if value is None: return DEFAULT_GRADE
+    if isinstance(value, str) and value in GRADES: return GRADES[value]
+    try:
+        grade = int(value)
+    except (TypeError, ValueError):
+        grade = -1
+    if not 0 <= grade <= 5:
+        raise ValueError(f"grade must be 0-5 or one of {', '.join(GRADES)}")
+    return grade
+
+
+def review(interval, ease, reps, grade):
+    """
+    One SM-2 step: (interval, ease, reps) after recalling with `grade`.
+    `reps` counts consecutive successful repetitions (the first solve is
+    repetition 1). A failed recall keeps the ease penalty and starts over.
+    """
+    interval, ease = np.asarray(interval, dtype=float), np.asarray(ease, dtype=float)
+    reps, grade = np.asarray(reps, dtype=np.int64), np.asarray(grade, dtype=np.int64)
+    miss = 5 - grade
+    new_ease = np.maximum(MIN_EASE, ease + 0.1 - miss * (0.08 + miss * 0.02))
+    grown = np.where(reps <= 0, FIRST_INTERVALS[0],
+                     np.where(reps == 1, FIRST_INTERVALS[1], interval * new_ease))
+    passed = grade >= PASSING_GRADE
+    return np.where(passed, grown, FIRST_INTERVALS[0]), new_ease, np.where(passed, reps + 1, 0)
+
+
+def spread_window(interval):
+    """How many days a review due after `interval` days may move either way."""
+    return np.minimum(np.rint(np.asarray(interval, dtype=float) * FUZZ), MAX_SPREAD_DAYS).astype(np.int64)
+
+
+def spread_offsets(users, days, windows, ids):
+    """
+    Day offsets that deal each (user, due day) cluster round-robin across
+    its window: 0, +1, -1, +2, -2, ... Problems with narrower windows go
+    first, so they stay closest to their due day. Every cluster is spread
+    evenly over the days around it, so a user's daily load becomes a
+    moving average of the original. The result depends only on the inputs,
+    so rerunning over unchanged rows is a no-op.
+    """
+    n = len(days)
+    if not n: return np.empty(0, dtype=np.int64)
+    order = np.lexsort((ids, windows, days, users))
+    u, d, w = users[order], days[order], windows[order]
+    starts = np.flatnonzero(np.r_[True, (u[1:] != u[:-1]) | (d[1:] != d[:-1])])
+    rank = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))  # Position within the cluster
+    slot = rank % (2 * w + 1)
+    offsets = np.empty(n, dtype=np.int64)
+    offsets[order] = np.where(slot % 2 == 1, (slot + 1) // 2, -(slot // 2))
+    return offsets
+
+
+def daily_peaks(users, days, horizon):
+    """Largest single-day review count per user over days [0, horizon), as {user: peak}."""
+    keep = (days >= 0) & (days < horizon)
+    if not keep.any(): return {}
+    found, inverse = np.unique(users[keep], return_inverse=True)
+    load = np.bincount(inverse * horizon + days[keep], minlength=len(found) * horizon).reshape(len(found), horizon)
+    return dict(zip(found.tolist(), load.max(axis=1).tolist()))
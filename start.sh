@@ -3,8 +3,11 @@
 # Exit on error
 set -o errexit
 
+# Precompile the problem catalog snapshot (workers load it instead of the CSV)
+flask build-catalog
+
 # Apply database migrations
 flask db upgrade
 
-# Start the Gunicorn server
+# Start the Gunicorn server (preloads app.py, see gunicorn.conf.py)
 gunicorn --bind 0.0.0.0:10000 app:app
\ No newline at end of file
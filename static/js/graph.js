@@ -236,14 +236,28 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // --- 7. LOGIC & ANIMATION LOOP ---
     let solvedMapCache = new Map();
+    let progressVersion = null;
 
+    // First load fetches the full map; later refreshes (tab refocus, back nav)
+    // ask only for changes since the version we hold. 'no-cache' makes the
+    // browser revalidate via ETag, so an unchanged state is a bodyless 304.
     async function fetchProgress() {
         try {
-            const res = await fetch(`/api/progress?t=${Date.now()}`);
-            if(res.ok) {
-                solvedMapCache = new Map(Object.entries(await res.json()));
-                updateState();
+            const url = progressVersion === null ? '/api/progress' : `/api/progress?since=${progressVersion}`;
+            const res = await fetch(url, { cache: 'no-cache' });
+            if(!res.ok) return;
+            const data = await res.json();
+            if(progressVersion === null) {
+                solvedMapCache = new Map(Object.entries(data));
+            } else if(data.full) {
+                solvedMapCache = new Map(Object.entries(data.progress));
+            } else {
+                for(const [pid, entry] of Object.entries(data.changes)) {
+                    if(entry) solvedMapCache.set(pid, entry); else solvedMapCache.delete(pid);
+                }
             }
+            progressVersion = Number(res.headers.get('X-Progress-Version'));
+            updateState();
         } catch(e) {}
     }
 